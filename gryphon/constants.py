@@ -69,6 +69,9 @@ CONFIG_FILE = GRYPHON_HOME / "gryphon_config.json"
 DEFAULT_CONFIG_FILE = DATA_PATH / "gryphon_config.json"
 REQUIREMENTS = "requirements.txt"
 
+# files and folders left out when copying a template or listing the files of a project or template
+FILE_SCAN_EXCLUDED = (".git", ".github", "__pycache__", ".venv", "envs", "pipenv_venv", ".ipynb_checkpoints")
+
 # Python versions
 DEFAULT_PYTHON_VERSION = "3.8"
 ALWAYS_ASK = "always_ask"
@@ -80,8 +83,33 @@ MIN_MINOR_VERSION = 7
 
 
 REMOTE_INDEX = "remote_index"
+INDEX_FETCH_WORKERS = 4
+INDEX_FETCH_TIMEOUT = 60
+# name (and name prefix) of the threads loading the registries
+REGISTRY_THREAD_NAME = "gryphon-registry"
+GENERATE_ALL_WORKERS = 4
+COMPARE_WORKERS = 8
+MERGE_WORKERS = 8
+DIFF_WORKERS = 4
+DIFF_HTML_SIZE_LIMIT = 200 * 1024
+DOWNLOAD_ALL_WORKERS = 8
+DOWNLOAD_ALL_PER_HOST_LIMIT = 4
+DOWNLOAD_ALL_RETRIES = 2
+DOWNLOAD_ALL_RETRY_DELAY = 2
+HANDOVER_WORKERS = 4
+HANDOVER_ARCHIVE_FORMAT = "zip"
+HANDOVER_COMPRESSION_LEVEL = 6
+HANDOVER_STRIP_NOTEBOOK_OUTPUTS = False
+TEMPLATE_CACHE_FOLDER = GRYPHON_HOME / "cache" / "templates"
+TEMPLATE_CACHE_SIZE_LIMIT = 500.0
+LOCK_FOLDER = GRYPHON_HOME / "locks"
 LOCAL_TEMPLATE = "local"
 GRYPHON_RC = ".gryphon_rc"
+GRYPHON_HISTORY = ".gryphon_history"
+# journals of the rc history above this size (in bytes) are compacted
+HISTORY_COMPACTION_SIZE = 1024 ** 2
+# and compacted again only once they grow this many times the size left by the last compaction
+HISTORY_COMPACTION_GROWTH = 2
 PRE_COMMIT_YML = '.pre-commit-config.yaml'
 CHANGE_LIMIT = "CHANGE_LIMIT"
 
@@ -1,5 +1,6 @@
 from .add import add
 from .feedback import feedback
 from .generate import generate
+from .generate_all import generate_all
 from .init import init
 from .report_bug import report_bug
@@ -2,25 +2,36 @@
 File containing operations that are common to the commands.
 """
 import glob
+import io
 import logging
 import os
 import platform
 import shutil
+import stat
+import threading
 import zipfile
 import datetime
 import difflib
-from distutils.version import StrictVersion
+import filecmp
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack, nullcontext
+from fnmatch import fnmatch
 from pathlib import Path
 from urllib.parse import urljoin
 
 import git
-import json
 
-from .operations import BashUtils, PathUtils
-from ..constants import REQUIREMENTS, CONFIG_FILE
+from .operations import BashUtils, PathUtils, SettingsManager, TemplateCache
+from .versioning import sort_by_version
+from ..constants import REQUIREMENTS, FILE_SCAN_EXCLUDED, COMPARE_WORKERS, DIFF_WORKERS, DIFF_HTML_SIZE_LIMIT
 
 logger = logging.getLogger('gryphon')
 
+COMPARE_CHUNK_SIZE = 1024 * 1024
+# transformed template members larger than this wait for their write on disk, not in memory
+TRANSFORM_SPILL_SIZE = 1024 * 1024
+
 
 # GIT
 
@@ -93,6 +104,28 @@ def append_requirement(library_name, location=Path.cwd()):
         f.truncate()
 
 
+def append_requirements(libraries: list, location=Path.cwd()):
+    """
+    Same as append_requirement for a list of libraries, reading and
+    writing the requirements.txt file only once.
+    """
+    current_path = PathUtils.get_destination_path(location)
+    requirements_path = current_path / REQUIREMENTS
+    try:
+        with open(requirements_path, "r", encoding='UTF-8') as file:
+            lib_list = file.read().split("\n")
+    except FileNotFoundError:
+        lib_list = [""]
+
+    for library_name in libraries:
+        name = get_library_name(library_name)
+        lib_list = [lib for lib in lib_list if get_library_name(lib) != name]
+        lib_list.append(library_name)
+
+    with open(requirements_path, "w", encoding='UTF-8') as f:
+        f.write("\n".join(lib_list))
+
+
 def backup_requirements(cwd=Path.cwd()):
     """
     Creates a copy of the requirements.txt to prevent
@@ -129,13 +162,11 @@ def rollback_requirement(backup_file, location=Path.cwd()):
 # TEMPLATE DOWNLOAD
 def check_for_ssh(template):
     ssh_prefix = ""
-    with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-        settings_file = json.load(f)
-    
+
     repo_url = template.repo_url
     if repo_url is not None:
         # Check if any repos require ssh-agent
-        ssh_domains = settings_file.get("ssh_domains")
+        ssh_domains = SettingsManager.get_ssh_domains()
         
         if ssh_domains is not None:
             for ssh_domain in ssh_domains.keys():
@@ -151,10 +182,14 @@ def check_for_ssh(template):
 def _download_template(template, temp_folder=Path().cwd() / ".temp"):
     """
     Downloads a template and its dependencies in the zip format to a temporary folder.
+    Versions already downloaded before are copied from the template cache instead.
     """
     # TODO: This implementation doesn't address cases where one template depends
     #  on another from a different index
 
+    if TemplateCache.restore(template, template.template_index, temp_folder):
+        return
+
     status_code, _ = BashUtils.execute_and_log(
         f"{check_for_ssh(template)}"
         f"pip --disable-pip-version-check download {template.name}"
@@ -180,16 +215,22 @@ def _download_template(template, temp_folder=Path().cwd() / ".temp"):
     if status_code is not None:
         raise RuntimeError(f"Unable to pip download the repository. Status code: {status_code}")
 
+    TemplateCache.store(template, template.template_index, temp_folder)
+
 
 def _basic_download_template(template, temp_folder=Path().cwd() / ".temp"):
     """
     Downloads a template and its dependencies in the zip format to a temporary folder.
+    Versions already downloaded before are copied from the template cache instead.
     """
     
     repo_url = template.repo_url
     
     if repo_url is None:
         raise RuntimeError("Metadata.json files does not contain a repo_url")
+
+    if TemplateCache.restore(template, repo_url, temp_folder):
+        return
     
     # tag_url = urljoin(base_url, f"archive/refs/tags/{template.version}.zip")
     
@@ -220,88 +261,77 @@ def _basic_download_template(template, temp_folder=Path().cwd() / ".temp"):
     if os.path.exists(git_folder):
         clean_readonly_folder(git_folder) 
 
+    TemplateCache.store(template, repo_url, temp_folder)
 
-def _unzip_templates(origin_path: Path, target_folder) -> Path:
+
+def _read_normalized(source, chunk_size=COMPARE_CHUNK_SIZE):
     """
-    Unzips zip files contained in a given folder.
+    Yields the contents of the file (a path, or a function opening a binary stream, i.e. a zip
+    member) in chunks, with Windows line endings converted to Unix ones.
     """
-    zip_files = glob.glob(str(origin_path / "*.zip"))
+    with (source() if callable(source) else open(source, "rb")) as f:
+        pending = b""
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            chunk = pending + chunk
 
-    if not target_folder.is_dir():
-        os.makedirs(target_folder)
+            # a "\r" at the end may be the first half of a "\r\n" split between two chunks
+            pending = b""
+            if chunk.endswith(b"\r"):
+                chunk, pending = chunk[:-1], b"\r"
 
-    for file in zip_files:
-        with zipfile.ZipFile(file, 'r') as zip_ref:
-            zip_ref.extractall(target_folder)
-    return target_folder
+            yield chunk.replace(b"\r\n", b"\n")
 
+        if pending:
+            yield pending
 
-def _unify_templates(origin_folder: Path, destination_folder: Path, subfolder = "template") -> Path:
-    """
-    Copies the template and its dependencies to a single folder.
-    """
-    expanded_folders = glob.glob(str(origin_folder / "*"))
 
-    for folder in expanded_folders:
-    
-        if subfolder is not None:
-            source_folder = Path(folder) / subfolder
-        else:
-            source_folder = Path(folder)
-            
-        shutil.copytree(
-            src=source_folder,
-            dst=destination_folder,
-            dirs_exist_ok=True
-        )
-    return destination_folder
+def _same_streams(first, second, chunk_size=COMPARE_CHUNK_SIZE) -> bool:
+    """Compares two iterators of byte chunks, which may be split at different points."""
+    first_buffer, second_buffer = b"", b""
+    first_done, second_done = False, False
+
+    while True:
+        while len(first_buffer) < chunk_size and not first_done:
+            chunk = next(first, None)
+            first_done = chunk is None
+            first_buffer += chunk or b""
+
+        while len(second_buffer) < chunk_size and not second_done:
+            chunk = next(second, None)
+            second_done = chunk is None
+            second_buffer += chunk or b""
+
+        # a buffer only gets empty once its file was read until the end
+        size = min(len(first_buffer), len(second_buffer))
+        if size == 0:
+            return first_buffer == second_buffer
+
+        if first_buffer[:size] != second_buffer[:size]:
+            return False
 
+        first_buffer, second_buffer = first_buffer[size:], second_buffer[size:]
 
-def _find_matching_files(origin_folder: Path, destination_folder: Path, exclude_extensions=[]) -> tuple:
+
+def _same_contents(first_path, second_path) -> bool:
     """
-    Compare the files within two folders to identify files with the same relative filepaths but different content. Return a list of those file paths.
+    Checks if two files have the same contents, ignoring differences in line endings.
+    Files with the same size are compared byte by byte first, which settles most cases
+    without normalizing anything. Only files whose bytes differ are compared again with
+    their line endings normalized, in chunks.
+    The second file may also be a function opening a binary stream, which is compared
+    with the first file chunk by chunk.
     """
-    
-    # Get file paths from origin folder
-    origin_file_list = []
-    for root, dirs, files in os.walk(origin_folder):
-        for file in files:
-            file_path = os.path.join(root, file)
-            origin_file_list.append(os.path.relpath(file_path, origin_folder))
-    
-    # Get file paths from origin folder
-    shared_files = []
-    for root, dirs, files in os.walk(destination_folder):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_rel_path = os.path.relpath(file_path, destination_folder)
-    
-            # Check if this file exists in the origin folder
-            if file_rel_path in origin_file_list:
-                
-                # Check if file is in list of extensions to be excluded (i.e. overwritten instead of renamed)
-                if len(exclude_extensions) and _has_specific_extension(file_rel_path, exclude_extensions):
-                    continue
-                    
-                # Check for differences between text
-                try:
-                    with open(origin_folder / file_rel_path, 'r') as file:
-                        new_file_contents = file.read().replace('\r\n', '\n')
-                except UnicodeDecodeError:
-                    with open(origin_folder / file_rel_path, 'r', encoding='utf8') as file:
-                        new_file_contents = file.read().replace('\r\n', '\n')
-
-                try:
-                    with open(destination_folder / file_rel_path, 'r') as file:
-                        prior_file_contents = file.read().replace('\r\n', '\n')
-                except UnicodeDecodeError:
-                    with open(destination_folder / file_rel_path, 'r', encoding='utf8') as file:
-                        prior_file_contents = file.read().replace('\r\n', '\n')
-                
-                if new_file_contents != prior_file_contents:
-                    shared_files.append(file_rel_path)
-                
-    return shared_files
+    if callable(second_path):
+        return _same_streams(_read_normalized(first_path), _read_normalized(second_path))
+
+    first_stat, second_stat = os.stat(first_path), os.stat(second_path)
+    if os.path.samestat(first_stat, second_stat):
+        return True
+
+    if first_stat.st_size == second_stat.st_size and filecmp.cmp(first_path, second_path, shallow=False):
+        return True
+
+    return _same_streams(_read_normalized(first_path), _read_normalized(second_path))
 
 
 def _has_specific_extension(file_name, extensions):
@@ -319,6 +349,10 @@ def _rename_files(folder, files, suffix) -> tuple:
             file_to_copy = folder / file
             file_path, file_ext = os.path.splitext(file_to_copy )
             new_file_name = str(file_path) + str(suffix) + str(file_ext)
+
+            # keeps the first backup made at this time, the one with the user's version
+            if os.path.exists(new_file_name):
+                continue
             
             shutil.copy(file_to_copy, new_file_name)
             copied_files.append(new_file_name)
@@ -331,32 +365,94 @@ def _rename_files(folder, files, suffix) -> tuple:
     return 0, copied_files
 
 
+def _find_changed_files(destination_folder: Path, sources: dict, exclude_extensions=(),
+                        workers=COMPARE_WORKERS) -> list:
+    """
+    Returns the relative paths (keys of sources) of the files already on the destination folder
+    whose contents differ from their source, a path or a function opening a binary stream
+    (i.e. a zip member). Files with the excluded extensions are overwritten, not compared.
+    """
+    candidates = [
+        relative_path
+        for relative_path in sources
+        if (destination_folder / relative_path).is_file()
+        and not (len(exclude_extensions) and _has_specific_extension(relative_path, exclude_extensions))
+    ]
+
+    if not len(candidates):
+        return []
+
+    # the comparisons are I/O bound
+    def _differs(relative_path):
+        return not _same_contents(destination_folder / relative_path, sources[relative_path])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(candidates)))) as executor:
+        differences = list(executor.map(_differs, candidates))
+
+    return [
+        relative_path
+        for relative_path, differs in zip(candidates, differences)
+        if differs
+    ]
+
+
 def backup_files_to_be_overwritten(origin_folder: Path, destination_folder: Path, subfolders, exclude_extensions=[]):
-    
+    """
+    Backs up the files of the destination subfolders that would change if the same subfolders of
+    the origin folder were copied over them. Returns the backups made and the suffix they got.
+    """
     suffix = datetime.datetime.now().strftime("_%Y%m%d %H%M")
-    all_renamed_files = [] # List to hold full path of all files renamed
-    
-    for folder in subfolders:
-        
-        # Check if folder exists
-        if not (os.path.exists(origin_folder / folder) and os.path.exists(destination_folder / folder)):
-            continue
-        
-        # Find files
-        matched_files = _find_matching_files(origin_folder / folder, destination_folder / folder, exclude_extensions)
 
-        # Rename files by copying the existing file
-        rename_error, renamed_files = _rename_files(destination_folder / folder, matched_files, suffix)
-        all_renamed_files.extend([destination_folder / folder / file for file in renamed_files])
-        
-        if rename_error:
-            _remove_files(all_renamed_files)
-            raise IOError(f"Unable to back up files to be overwritten in the folder {destination_folder / folder}. ")
-            
-    return all_renamed_files, suffix
+    sources = {
+        Path(folder) / relative_path: origin_folder / folder / relative_path
+        for folder in subfolders
+        if (origin_folder / folder).is_dir() and (destination_folder / folder).is_dir()
+        for relative_path in list_files(origin_folder / folder)
+    }
+
+    changed_files = _find_changed_files(destination_folder, sources, exclude_extensions)
+
+    # Rename files by copying the existing file
+    rename_error, renamed_files = _rename_files(destination_folder, changed_files, suffix)
+    if rename_error:
+        _remove_files(renamed_files)
+        raise IOError(f"Unable to back up files to be overwritten in the folder {destination_folder}. ")
+
+    return [Path(file) for file in renamed_files], suffix
+
+
+def _read_lines(path) -> list:
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="replace").replace("\r\n", "\n").splitlines()
+
+
+def _render_diff(backup_file, new_file, output_file, html_size_limit) -> str:
+    """
+    Writes the comparison between the backed up file and the new one. Files above the size
+    limit get a plain unified diff, as the html one is slow to render and too large to open.
+    Returns the path written. Meant to run on a separate process.
+    """
+    old_contents = _read_lines(backup_file)
+    new_contents = _read_lines(new_file)
+
+    if max(os.path.getsize(backup_file), os.path.getsize(new_file)) > html_size_limit:
+        output_file = f"{output_file}.diff"
+        diff = "\n".join(difflib.unified_diff(
+            old_contents, new_contents,
+            fromfile=os.path.basename(backup_file), tofile=os.path.basename(new_file),
+            lineterm=""
+        ))
+    else:
+        output_file = f"{output_file}.html"
+        diff = difflib.HtmlDiff(wrapcolumn=100).make_file(old_contents, new_contents, context=True)
 
+    os.makedirs(os.path.dirname(output_file), mode=0o777, exist_ok=True)
+    Path(output_file).write_text(diff, encoding="utf-8")
+    return output_file
 
-def log_changes(destination_folder, renamed_files, suffix):
+
+def log_changes(destination_folder, renamed_files, suffix, html_size_limit=DIFF_HTML_SIZE_LIMIT,
+                workers=DIFF_WORKERS):
     """
     Create a log describing all changes
     """
@@ -372,31 +468,46 @@ def log_changes(destination_folder, renamed_files, suffix):
     # Create the log folder
     os.makedirs(log_folder, mode = 0o777, exist_ok = True)
 
+    diffs = []
     for file in renamed_files:
         
         if not _has_specific_extension(file, extensions = [".py"]):
             continue
         
         new_file = str(file).replace(suffix, "")
-        
-        # Compare both files using difflib
+        output_file, _ = os.path.splitext(log_folder / str(os.path.relpath(new_file, destination_folder)))
+        diffs.append((str(file), new_file, output_file, html_size_limit))
+
+    # Compare the files using difflib, rendering the diffs is CPU bound
+    failures = {}
+    rendered = False
+    if len(diffs) > 1 and workers > 1:
         try:
-            with open(file, 'r') as file_input, open(new_file, 'r') as new_file_input:
-                file_contents = file_input.read().replace('\r\n', '\n').splitlines()
-                new_file_contents = new_file_input.read().replace('\r\n', '\n').splitlines()
-        except: 
-            with open(file, 'r', encoding='utf8') as file_input, open(new_file, 'r', encoding='utf8') as new_file_input:
-                file_contents = file_input.read().replace('\r\n', '\n').splitlines()
-                new_file_contents = new_file_input.read().replace('\r\n', '\n').splitlines()
-
-        diff_html = difflib.HtmlDiff(wrapcolumn = 100).make_file(file_contents, new_file_contents, context=True)
-        
-        output_file = log_folder / str(os.path.relpath(new_file, destination_folder))
-        output_file, _ = os.path.splitext(output_file)
-        output_file = str(output_file) + ".html"
-        
-        os.makedirs(os.path.dirname(output_file), mode=0o777, exist_ok = True)
-        Path(output_file).write_text(diff_html)
+            with ProcessPoolExecutor(max_workers=min(workers, len(diffs))) as executor:
+                futures = {executor.submit(_render_diff, *diff): diff[1] for diff in diffs}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        failures[futures[future]] = e
+            rendered = True
+
+        except (OSError, BrokenProcessPool) as e:
+            logger.debug(f"Could not compare the files on separate processes, comparing them here: {e}")
+            failures = {}
+
+    if not rendered:
+        for diff in diffs:
+            try:
+                _render_diff(*diff)
+            except Exception as e:
+                failures[diff[1]] = e
+
+    for new_file, error in failures.items():
+        logger.warning(f"Could not create the code comparison for "
+                       f"{os.path.relpath(new_file, destination_folder)}: {error}")
         
     # Create the log file
     with open(log_file_name, 'w') as log_file:
@@ -410,7 +521,12 @@ def log_changes(destination_folder, renamed_files, suffix):
         log_file.write(f"\nFor any changed .py scripts, you can find a 'code comparison' in the "
                        f"\".gryphon_logs/changes{suffix}\" folder. If you want to keep your old files, "
                        f"rename them back. Once you are done, you can delete this file and the .gryphon_logs folder.")
-    
+
+        if len(failures):
+            log_file.write("\n\nThe code comparison could not be created for the following files: \n")
+            for new_file, error in failures.items():
+                log_file.write(f" - {os.path.relpath(new_file, destination_folder)} ({error})\n")
+
 # NOT IMPLEMENTED. NOT NEEDED CURRENTLY
 #def scrub_files(folder: Path, folder_pattern = ["__pycache__", ".ipynb_checkpoints"], file_pattern = [""]):
 #    """
@@ -418,29 +534,168 @@ def log_changes(destination_folder, renamed_files, suffix):
 #    """
     
 
-def fetch_template(template, project_folder):
-    download_folder = project_folder / ".temp"
-    zip_folder = project_folder / ".unzip"
-    template_folder = project_folder / ".target"
-    
+def _get_file_state(path: Path):
+    """Size and modification time of the file, None if there is no file."""
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+
+    return file_stat.st_size, file_stat.st_mtime_ns
+
+
+def _list_template_members(zip_files: list) -> dict:
+    """
+    Maps the relative path of each file inside the "template" folder of the zips to the
+    zip and member holding it. Later zips take precedence, as if they were extracted one over
+    the other. Members inside ignored folders are left out.
+    """
+    members = {}
+    for zip_file in zip_files:
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                parts = info.filename.split("/")
+                if info.is_dir() or len(parts) < 3 or parts[1] != "template":
+                    continue
+
+                if any(fnmatch(part, pattern) for part in parts[2:] for pattern in FILE_SCAN_EXCLUDED):
+                    continue
+
+                members[Path(*parts[2:])] = (zip_file, info.filename)
+
+    return members
+
+
+def materialize_template(template, destination: Path, transform=None, backup_subfolders=(),
+                         exclude_extensions=(), overwrite=True, readonly_notebooks=False,
+                         download_folder=None, write_lock=None) -> tuple:
+    """
+    Downloads a remote template and writes the files inside the "template" folder of its zips
+    straight to the destination, without extracting or copying them to staging folders first.
+
+    transform(relative_path, contents) may rename a file and change its contents on the way,
+    it is applied once per member, while looking for backups, and the result is kept until the
+    member is written (on the download folder, when large). Existing files on the backup
+    subfolders whose contents change are backed up before anything is written, and existing
+    files are left untouched when overwrite is False.
+    When a write_lock is given, it is held from the backups until the last file is written, so
+    templates downloaded concurrently are written to the destination one at a time. The members
+    are transformed and compared before taking it, the files other templates wrote meanwhile are
+    compared again once it is held.
+
+    Returns the relative paths written, the backed up files and the suffix used on the backups.
+    """
+    if download_folder is None:
+        download_folder = destination / ".temp"
+
     try:
         _download_template(template, download_folder)
-        _unzip_templates(download_folder, zip_folder)
 
-        enable_files_overwrite(
-            source_folder=zip_folder / "notebooks",
-            destination_folder=template_folder / "notebooks"
-        )
-        
-        _unify_templates(zip_folder, template_folder)
-        
+        zip_files = sorted(glob.glob(str(download_folder / "*.zip")))
+        members = _list_template_members(zip_files)
+
+        if write_lock is None:
+            write_lock = nullcontext()
+
+        with ExitStack() as stack:
+            # each thread reads through its own handles, a ZipFile is not safe to share between threads
+            handles = threading.local()
+            opened = []
+            stack.callback(lambda: [zip_handle.close() for zip_handle in opened])
+
+            def _get_zip(zip_file) -> zipfile.ZipFile:
+                if not hasattr(handles, "zips"):
+                    handles.zips = {}
+                if zip_file not in handles.zips:
+                    handles.zips[zip_file] = zipfile.ZipFile(zip_file, 'r')
+                    opened.append(handles.zips[zip_file])
+                return handles.zips[zip_file]
+
+            def _get_target(item) -> tuple:
+                """Returns the target path of the member and a function opening its (transformed) contents."""
+                relative_path, (zip_file, member) = item
+                if transform is None:
+                    return relative_path, lambda: _get_zip(zip_file).open(member)
+
+                target_path, contents = transform(relative_path, _get_zip(zip_file).read(member))
+                if len(contents) <= TRANSFORM_SPILL_SIZE:
+                    return target_path, lambda: io.BytesIO(contents)
+
+                spilled_file = download_folder / "transformed" / relative_path
+                os.makedirs(spilled_file.parent, exist_ok=True)
+                spilled_file.write_bytes(contents)
+                return target_path, lambda: open(spilled_file, "rb")
+
+            to_check = [
+                item for item in members.items()
+                if item[0].parts[0] in backup_subfolders or transform is not None
+            ]
+
+            # target path and contents of the transformed (or compared) members, by relative path
+            targets = {}
+            with ThreadPoolExecutor(max_workers=max(1, min(COMPARE_WORKERS, len(to_check)))) as executor:
+                for (relative_path, _), target in zip(to_check, executor.map(_get_target, to_check)):
+                    targets[relative_path] = target
+
+            sources = {
+                target_path: source
+                for target_path, source in targets.values()
+                if overwrite and target_path.parts[0] in backup_subfolders
+            }
+            compared = {target_path: _get_file_state(destination / target_path) for target_path in sources}
+            changed = set(_find_changed_files(destination, sources, exclude_extensions))
+
+            stack.enter_context(write_lock)
+            suffix = datetime.datetime.now().strftime("_%Y%m%d %H%M")
+
+            # files written by other templates since they were compared
+            rewritten = {
+                target_path: source
+                for target_path, source in sources.items()
+                if _get_file_state(destination / target_path) != compared[target_path]
+            }
+            changed.difference_update(rewritten)
+            changed.update(_find_changed_files(destination, rewritten, exclude_extensions))
+            to_backup = [target_path for target_path in sources if target_path in changed]
+
+            rename_error, renamed_files = _rename_files(destination, to_backup, suffix)
+            if rename_error:
+                _remove_files(renamed_files)
+                raise IOError(f"Unable to back up files to be overwritten in the folder {destination}. ")
+
+            written_files = []
+            for relative_path, (zip_file, member) in members.items():
+                target_path, source = targets.get(
+                    relative_path,
+                    (relative_path, lambda: _get_zip(zip_file).open(member))
+                )
+                destination_file = destination / target_path
+
+                if destination_file.is_file():
+                    if not overwrite:
+                        continue
+
+                    # notebooks from previous templates are read only
+                    if not os.access(destination_file, os.W_OK):
+                        os.chmod(destination_file, os.stat(destination_file).st_mode | stat.S_IWUSR)
+
+                os.makedirs(destination_file.parent, exist_ok=True)
+                with source() as source_file, open(destination_file, "wb") as target_file:
+                    shutil.copyfileobj(source_file, target_file)
+                # the transformed contents are not needed anymore
+                targets.pop(relative_path, None)
+
+                if readonly_notebooks and target_path.parts[0] == "notebooks" and target_path.suffix == ".ipynb":
+                    os.chmod(destination_file, 0o444)
+
+                written_files.append(target_path)
+
     finally:
-        shutil.rmtree(download_folder, ignore_errors=True)   # UNCOMMENT
-        shutil.rmtree(zip_folder, ignore_errors=True)  # UNCOMMENT
-        pass
-    return template_folder
-    
-    
+        shutil.rmtree(download_folder, ignore_errors=True)
+
+    return written_files, [Path(file) for file in renamed_files], suffix
+
+
 def _remove_files(files_to_remove):
     
     for file in files_to_remove:
@@ -524,8 +779,7 @@ def sort_versions(versions: list) -> list:
     """
     Sorts a list of versions according to the semantic versioning scheme.
     """
-    versions.sort(key=lambda x: StrictVersion(x[1:]) if x[0] == 'v' else StrictVersion(x))
-    return versions
+    return sort_by_version(versions)
 
 
 def multiple_file_types(*patterns):
@@ -537,22 +791,11 @@ def multiple_file_types(*patterns):
 
 
 def list_files(path: Path):
-    pattern = str(path / "**" / '**')
-    pattern2 = str(path / "**" / '.**')
-
-    all_files = multiple_file_types(pattern, pattern2)
-
+    """
+    Lists the files inside the folder, relative to it. Virtual environments, git
+    and cache folders are skipped without being descended into.
+    """
     return [
-        # f.split(base_path)[1][1:]
-        Path(f).relative_to(path)
-        for f in all_files
-        if Path(f).is_file() and
-        ".git" not in f and
-        "__pycache__" not in f and
-        ".github" not in f and
-        ".venv" not in f and
-        "envs" not in f and
-        "pipenv_venv" not in f and
-        ".ipynb_checkpoints" not in f
+        relative_path
+        for relative_path, _ in PathUtils.scan_files(path, FILE_SCAN_EXCLUDED)
     ]
-
@@ -13,6 +13,8 @@ class Text:
                     to activate and enter the virtual environment."""
 
     handover_end_message = "Handover package successfully generated:"
+    handover_verify_success = "Every file matches the handover manifest."
+    handover_verify_failure = "The handover package does not match its manifest."
 
     feedback_email_template = """Hello Gryphon team!
 
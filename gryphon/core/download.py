@@ -1,7 +1,6 @@
 """
 Module containing the code for the init command in the CLI.
 """
-import json
 import logging
 import os
 import shutil
@@ -12,7 +11,7 @@ from .common_operations import (
     download_template, clean_readonly_folder
 )
 from .operations import (
-    BashUtils, RCManager, SettingsManager
+    BashUtils, RCManager
 )
 from .registry import Template
 from ..constants import (
@@ -75,10 +74,11 @@ def download(template: Template, location, **kwargs):
 
     # RC file
     rc_file = RCManager.get_rc_file(project_home)
-    RCManager.log_operation(template, performed_action=DOWNLOAD, logfile=rc_file)
+    with RCManager.session(rc_file):
+        RCManager.log_operation(template, performed_action=DOWNLOAD, logfile=rc_file)
 
-    # TEMPLATE
-    handle_template(template, project_home, rc_file)
+        # TEMPLATE
+        handle_template(template, project_home, rc_file)
 
     # Check if any shell script is provided
     if template.shell_exec is not None and kwargs['confirm_shell_exec']:
@@ -0,0 +1,141 @@
+"""
+Module containing the code to download many standalone templates at once.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List
+from urllib.parse import urlparse
+
+from .common_operations import clean_readonly_folder
+from .download import handle_template
+from .operations import RCManager
+from .registry import Template
+from ..constants import (
+    DOWNLOAD, SUCCESS, DOWNLOAD_ALL_WORKERS, DOWNLOAD_ALL_PER_HOST_LIMIT,
+    DOWNLOAD_ALL_RETRIES, DOWNLOAD_ALL_RETRY_DELAY
+)
+
+logger = logging.getLogger('gryphon')
+
+
+def get_host(repo_url) -> str:
+    """Returns the host of a git url, either "https://host/..." or "git@host:..."."""
+    if not repo_url:
+        return ""
+
+    if "://" in repo_url:
+        return urlparse(repo_url).hostname or ""
+
+    return repo_url.split("@")[-1].split(":")[0]
+
+
+class DownloadProgress:
+    """Thread safe counters used to log an aggregate summary while the templates are downloaded."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.active = 0
+        self.done = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            self.active += 1
+
+    def finish(self, template_name: str, success: bool):
+        with self.lock:
+            self.active -= 1
+            self.done += 1
+            if not success:
+                self.failed += 1
+
+            logger.info(f"[{self.done}/{self.total}] {template_name} "
+                        f"{'downloaded' if success else 'failed'} "
+                        f"({self.active} in progress, {self.failed} failed)")
+
+
+def _download_template(template: Template, project_home: Path, host_limit, retries: int, retry_delay: float,
+                       progress: DownloadProgress):
+    """
+    Clones a single template into its own folder, retrying when the clone fails. The host
+    slot is only held while cloning, so other clones to the host go on during the backoff.
+    """
+    progress.start()
+    try:
+        os.makedirs(project_home, exist_ok=True)
+        rc_file = RCManager.get_rc_file(project_home)
+
+        for attempt in range(retries + 1):
+            try:
+                with host_limit:
+                    handle_template(template, project_home, rc_file)
+                break
+
+            except RuntimeError as e:
+                # a partial clone makes the next attempt fail
+                clean_readonly_folder(project_home / ".target")
+                if attempt == retries:
+                    raise
+
+                logger.debug(f"Failed to download {template.name} ({e}), trying again.")
+                time.sleep(retry_delay * 2 ** attempt)
+
+        RCManager.log_operation(template, performed_action=DOWNLOAD, logfile=rc_file)
+
+    except Exception:
+        progress.finish(template.name, success=False)
+        raise
+
+    progress.finish(template.name, success=True)
+
+
+def download_all(templates: List[Template], location=Path.cwd(), workers=DOWNLOAD_ALL_WORKERS,
+                 per_host_limit=DOWNLOAD_ALL_PER_HOST_LIMIT, retries=DOWNLOAD_ALL_RETRIES,
+                 retry_delay=DOWNLOAD_ALL_RETRY_DELAY) -> dict:
+    """
+    Downloads each template into its own folder inside the location. Templates are cloned
+    concurrently, with at most per_host_limit clones running against the same git host.
+    Failed clones are retried with an exponential backoff, a template failing does not stop
+    the others. Shell setup scripts are not executed.
+
+    Returns the templates that failed, by name, with the error raised.
+    """
+    location = Path(location)
+    logger.info(f"Downloading {len(templates)} templates into {location}")
+
+    host_limits = {
+        host: threading.BoundedSemaphore(per_host_limit)
+        for host in {get_host(template.repo_url) for template in templates}
+    }
+    progress = DownloadProgress(len(templates))
+
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(templates)))) as executor:
+        futures = {
+            executor.submit(
+                _download_template, template, location / template.name,
+                host_limits[get_host(template.repo_url)], retries, retry_delay, progress
+            ): template
+            for template in templates
+        }
+
+        for future in as_completed(futures):
+            template = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed[template.name] = e
+                logger.error(f"Failed to download the template \"{template.name}\": {e}")
+
+    if len(failed):
+        logger.warning(f"{len(failed)} out of {len(templates)} templates could not be downloaded: "
+                       f"{', '.join(failed)}.")
+    else:
+        logger.log(SUCCESS, f"{len(templates)} templates downloaded successfully.")
+
+    return failed
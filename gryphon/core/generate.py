@@ -9,13 +9,14 @@ import shutil
 from pathlib import Path
 
 from .common_operations import (
-    fetch_template,    mark_notebooks_as_readonly,
-    enable_files_overwrite, clean_readonly_folder,
-    append_requirement, backup_files_to_be_overwritten, log_changes
+    materialize_template, mark_notebooks_as_readonly,
+    append_requirement, log_changes
 )
 from .operations import EnvironmentManagerOperations, PathUtils, RCManager
 from .registry import Template
-from ..constants import GENERATE, VENV, CONDA, PIPENV, REMOTE_INDEX, LOCAL_TEMPLATE, REQUIREMENTS
+from ..constants import (
+    GENERATE, VENV, CONDA, PIPENV, REMOTE_INDEX, LOCAL_TEMPLATE, REQUIREMENTS, FILE_SCAN_EXCLUDED
+)
 
 logger = logging.getLogger('gryphon')
 
@@ -34,73 +35,73 @@ def generate(template: Template, folder=Path.cwd(), install_dependencies=True, *
     env_path = RCManager.get_environment_manager_path(logfile=rc_file)
     env_type = RCManager.get_environment_manager(logfile=rc_file)
 
-    logger.info("Generating template.")
-    if template.registry_type == REMOTE_INDEX:
-
-        template_folder = fetch_template(template, folder)
-        all_renamed_files = None
-        try:
-            enable_files_overwrite(
-                source_folder=template_folder / "notebooks",
-                destination_folder=folder / "notebooks"
+    # changes to the rc file are kept in memory and written at once
+    with RCManager.session(rc_file) as rc_session:
+        logger.info("Generating template.")
+        if template.registry_type == REMOTE_INDEX:
+
+            logger.info(f"Creating files at {folder}")
+            all_renamed_files = None
+            try:
+                new_files, all_renamed_files, suffix = materialize_template(
+                    template, folder,
+                    transform=lambda path, contents: replace_patterns(path, contents, kwargs),
+                    backup_subfolders=["utilities"]
+                )
+
+                mark_notebooks_as_readonly(folder / "notebooks")
+                RCManager.log_new_files(template, folder, performed_action=GENERATE, logfile=rc_file, files=new_files)
+
+            except Exception as e:
+                logger.error("Failed to move template files into target folder.")
+                logger.error(str(e))
+
+            finally:
+                # Log changes to files            
+                if (all_renamed_files is not None) and (len(all_renamed_files) > 0):
+                    log_changes(destination_folder = folder, renamed_files = all_renamed_files, suffix = suffix)
+
+                    logger.info(f"The following files were overwritten and the old version has been backed up with new file names: ")
+                    logger.info([str(os.path.relpath(file, folder)) for file in all_renamed_files])
+
+        elif template.registry_type == LOCAL_TEMPLATE:
+            parse_project_template(template.path / "template", kwargs)
+            RCManager.log_new_files(template, Path(template.path) / "template", performed_action=GENERATE, logfile=rc_file)
+
+        else:
+            raise RuntimeError(f"Invalid registry type: {template.registry_type}.")
+
+        if env_type != PIPENV:
+            for r in template.dependencies:
+                append_requirement(r, location=folder)
+        else:
+            pipenv_requirements = []
+            pipenv_requirements.extend(template.dependencies)
+            pipenv_requirements = list(set(pipenv_requirements))
+
+        RCManager.log_add_library(template.dependencies, logfile=rc_file)
+
+        # the files and requirements are on disk already, a failed install must not drop their records
+        rc_session.commit()
+
+        if env_type == VENV and install_dependencies:
+            EnvironmentManagerOperations.install_libraries_venv(
+                environment_path=env_path,
+                requirements_path=current_path / REQUIREMENTS
+            )
+        elif env_type == CONDA and install_dependencies:
+            EnvironmentManagerOperations.install_libraries_conda(
+                environment_path=env_path,
+                requirements_path=current_path / REQUIREMENTS
             )
-            
-            all_renamed_files, suffix = backup_files_to_be_overwritten(Path(template_folder), Path(folder), subfolders = ["utilities"])
-            
-            parse_project_template(template_folder, kwargs)
-            mark_notebooks_as_readonly(folder / "notebooks")
-            RCManager.log_new_files(template, template_folder,
-                                    performed_action=GENERATE, logfile=rc_file)
+        elif env_type == PIPENV and install_dependencies:
 
-        
-        except Exception as e:
-            logger.error("Failed to move template files into target folder.")
-            logger.error(str(e))
-        
-        finally:
-            clean_readonly_folder(template_folder)
-            
-            # Log changes to files            
-            if (all_renamed_files is not None) and (len(all_renamed_files) > 0):
-                log_changes(destination_folder = folder, renamed_files = all_renamed_files, suffix = suffix)
-                
-                logger.info(f"The following files were overwritten and the old version has been backed up with new file names: ")
-                logger.info([str(os.path.relpath(file, folder)) for file in all_renamed_files])
-            
-    elif template.registry_type == LOCAL_TEMPLATE:
-        parse_project_template(template.path / "template", kwargs)
-        RCManager.log_new_files(template, Path(template.path) / "template", performed_action=GENERATE, logfile=rc_file)
-
-    else:
-        raise RuntimeError(f"Invalid registry type: {template.registry_type}.")
-        
-    if env_type != PIPENV:
-        for r in template.dependencies:
-            append_requirement(r, location=folder)
-    else:
-        pipenv_requirements = []
-        pipenv_requirements.extend(template.dependencies)
-        pipenv_requirements = list(set(pipenv_requirements))
-
-    RCManager.log_add_library(template.dependencies)
-    if env_type == VENV and install_dependencies:
-        EnvironmentManagerOperations.install_libraries_venv(
-            environment_path=env_path,
-            requirements_path=current_path / REQUIREMENTS
-        )
-    elif env_type == CONDA and install_dependencies:
-        EnvironmentManagerOperations.install_libraries_conda(
-            environment_path=env_path,
-            requirements_path=current_path / REQUIREMENTS
-        )
-    elif env_type == PIPENV and install_dependencies:
-    
-        # Check where to install these libraries
-        
-        EnvironmentManagerOperations.install_libraries_pipenv(pipenv_requirements)
+            # Check where to install these libraries
 
-    # RC file
-    RCManager.log_operation(template, performed_action=GENERATE, logfile=rc_file)
+            EnvironmentManagerOperations.install_libraries_pipenv(pipenv_requirements)
+
+        # RC file
+        RCManager.log_operation(template, performed_action=GENERATE, logfile=rc_file)
     # RCManager.log_new_files(template, performed_action=GENERATE, logfile=rc_file)
 
 
@@ -134,6 +135,25 @@ def pattern_replacement(input_file, mapper):
         logger.debug("There are binary files (Excels) inside template folder.")
 
 
+def replace_patterns(relative_path: Path, contents: bytes, mapper) -> tuple:
+    """
+    Same replacements as pattern_replacement, applied to a file read straight from
+    the template zip. Binary files are kept as they are.
+    """
+    try:
+        text = contents.decode("UTF-8")
+    except UnicodeDecodeError:
+        logger.debug("There are binary files (Excels) inside template folder.")
+        return relative_path, contents
+
+    output_path = str(relative_path).replace(".handlebars", "")
+    for before, after in mapper.items():
+        output_path = output_path.replace(before.lower(), after)
+        text = text.replace("{{" + before + "}}", after)
+
+    return Path(output_path), text.encode("UTF-8")
+
+
 def parse_project_template(template_path: Path, mapper, destination_folder=None):
     """
     Routine that copies the template to the selected folder
@@ -152,15 +172,7 @@ def parse_project_template(template_path: Path, mapper, destination_folder=None)
         src=origin,
         dst=Path(temp_path),
         dirs_exist_ok=True,
-        ignore=shutil.ignore_patterns(
-            ".git",
-            ".github",
-            "__pycache__",
-            "envs",
-            ".venv",
-            "pipenv_venv",
-            ".ipynb_checkpoints"
-        )
+        ignore=shutil.ignore_patterns(*FILE_SCAN_EXCLUDED)
     )
 
     try:
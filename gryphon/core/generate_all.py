@@ -0,0 +1,183 @@
+"""
+Module containing the code to generate many templates at once into a project.
+"""
+import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+
+from .common_operations import (
+    materialize_template, mark_notebooks_as_readonly,
+    append_requirements, log_changes
+)
+from .generate import parse_project_template, replace_patterns
+from .operations import EnvironmentManagerOperations, PathUtils, RCManager
+from .registry import Template
+from ..constants import (
+    GENERATE, VENV, CONDA, PIPENV, REMOTE_INDEX, LOCAL_TEMPLATE,
+    REQUIREMENTS, GENERATE_ALL_WORKERS, SUCCESS, FILE_SCAN_EXCLUDED
+)
+
+logger = logging.getLogger('gryphon')
+
+
+class _WriteTurns:
+    """
+    Lets the templates write to the project one at a time and in the order they were given
+    (files shared by many templates end up with the contents of the last one), while their
+    downloads run concurrently.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.next_index = 0
+        self.finished = set()
+
+    @contextmanager
+    def turn(self, index: int):
+        with self.condition:
+            self.condition.wait_for(lambda: self.next_index == index)
+        try:
+            yield
+        finally:
+            self.finish(index)
+
+    def finish(self, index: int):
+        """Gives the turn away, templates failing before writing anything must call it too."""
+        with self.condition:
+            self.finished.add(index)
+            while self.next_index in self.finished:
+                self.next_index += 1
+            self.condition.notify_all()
+
+
+def _generate_template(template: Template, folder: Path, download_folder: Path, turns: _WriteTurns,
+                       index: int, mapper) -> tuple:
+    """
+    Downloads a single template and writes it to the project on its turn.
+    Returns the files written (relative to the project), the backed up files and the backup suffix.
+    """
+    try:
+        if template.registry_type == REMOTE_INDEX:
+            return materialize_template(
+                template, folder,
+                transform=lambda path, contents: replace_patterns(path, contents, mapper),
+                backup_subfolders=["utilities"],
+                download_folder=download_folder,
+                write_lock=turns.turn(index)
+            )
+
+        elif template.registry_type == LOCAL_TEMPLATE:
+            template_folder = Path(template.path) / "template"
+            with turns.turn(index):
+                parse_project_template(template_folder, mapper, destination_folder=folder)
+
+            new_files = [
+                relative_path
+                for relative_path, _ in PathUtils.scan_files(template_folder, FILE_SCAN_EXCLUDED)
+            ]
+            return new_files, [], None
+
+        else:
+            raise RuntimeError(f"Invalid registry type: {template.registry_type}.")
+
+    finally:
+        turns.finish(index)
+
+
+def generate_all(templates: List[Template], folder=Path.cwd(), install_dependencies=True,
+                 workers=GENERATE_ALL_WORKERS, **kwargs) -> dict:
+    """
+    Generates many templates into the project at once. Templates are downloaded concurrently
+    and written to the project one at a time, in the given order. A template failing does not
+    stop the others.
+    The rc file and the requirements are updated only once, after every template is done.
+
+    Returns the templates that failed, by name, with the error raised.
+    """
+    current_path = PathUtils.get_destination_path(folder)
+    try:
+        rc_file = RCManager.get_rc_file(folder, create=False)
+    except FileNotFoundError:
+        raise RuntimeError("Please run Gryphon from inside your project folder before attempting to render a new "
+                           "template.")
+
+    env_path = RCManager.get_environment_manager_path(logfile=rc_file)
+    env_type = RCManager.get_environment_manager(logfile=rc_file)
+
+    logger.info(f"Generating {len(templates)} templates.")
+
+    turns = _WriteTurns()
+    download_folder = folder / ".temp"
+
+    generated = {}
+    failed = {}
+    renamed_files = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(templates)))) as executor:
+            futures = {
+                executor.submit(
+                    _generate_template, template, folder, download_folder / str(index), turns, index, kwargs
+                ): index
+                for index, template in enumerate(templates)
+            }
+
+            for counter, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                template = templates[index]
+                try:
+                    new_files, renamed, suffix = future.result()
+
+                except Exception as e:
+                    failed[template.name] = e
+                    logger.error(f"Failed to generate the template \"{template.name}\": {e}")
+
+                else:
+                    generated[index] = (template, new_files)
+                    if len(renamed):
+                        renamed_files.setdefault(suffix, []).extend(renamed)
+
+                logger.info(f"Processed {counter} out of {len(templates)} templates.")
+
+    finally:
+        shutil.rmtree(download_folder, ignore_errors=True)
+
+    mark_notebooks_as_readonly(folder / "notebooks")
+
+    # Log changes to files
+    for suffix, files in renamed_files.items():
+        log_changes(destination_folder=folder, renamed_files=files, suffix=suffix)
+        logger.info("The following files were overwritten and the old version has been backed up with new file names: ")
+        logger.info([str(file.relative_to(folder)) for file in files])
+
+    # RC file and requirements, in the same order the templates were given
+    generated = [generated[index] for index in sorted(generated)]
+    RCManager.log_templates(generated, performed_action=GENERATE, logfile=rc_file)
+
+    dependencies = [r for template, _ in generated for r in template.dependencies]
+    if env_type != PIPENV:
+        append_requirements(dependencies, location=folder)
+
+    if env_type == VENV and install_dependencies:
+        EnvironmentManagerOperations.install_libraries_venv(
+            environment_path=env_path,
+            requirements_path=current_path / REQUIREMENTS
+        )
+    elif env_type == CONDA and install_dependencies:
+        EnvironmentManagerOperations.install_libraries_conda(
+            environment_path=env_path,
+            requirements_path=current_path / REQUIREMENTS
+        )
+    elif env_type == PIPENV and install_dependencies:
+        EnvironmentManagerOperations.install_libraries_pipenv(list(set(dependencies)))
+
+    if len(failed):
+        logger.warning(f"{len(failed)} out of {len(templates)} templates could not be generated: "
+                       f"{', '.join(failed)}.")
+    else:
+        logger.log(SUCCESS, f"{len(templates)} templates generated successfully.")
+
+    return failed
@@ -1,5 +1,4 @@
 import time
-import zipfile
 from os.path import normpath, basename
 from pathlib import Path
 from typing import List
@@ -7,15 +6,21 @@ from typing import List
 import yaml
 
 from .core_text import Text
+from .handover_archive import HandoverArchive, ZIP, get_archive_extension, strip_archive_extension
+from .handover_manifest import HandoverManifest, DELETED_FILES_NAME, MANIFEST_NAME, get_manifest_file_name
 from .operations import RCManager
-from ..constants import SUCCESS, GRYPHON_RC
+from ..constants import SUCCESS, GRYPHON_RC, GRYPHON_HISTORY, HANDOVER_COMPRESSION_LEVEL, HANDOVER_WORKERS
 from ..logger import logger
 
 
-def get_output_file_name(path):
+def get_output_file_name(path, archive_format: str = ZIP):
     timestamp = time.strftime("%Y%m%d_%Hh%Mm%Ss", time.localtime())
     project_name = basename(normpath(path))
-    return path.parent / f"{project_name}_handover_{timestamp}.zip"
+    return path.parent / f"{project_name}_handover_{timestamp}{get_archive_extension(archive_format)}"
+
+
+def get_log_file_name(output_file_name):
+    return strip_archive_extension(str(output_file_name)) + "_log.txt"
 
 
 def write_log_file(excluded_large_files, excluded_gryphon_files, output_file_name, handover_settings):
@@ -24,7 +29,7 @@ def write_log_file(excluded_large_files, excluded_gryphon_files, output_file_nam
         excluded_gryphon_files=excluded_gryphon_files,
         **handover_settings
     )
-    with open(str(output_file_name)[:-4] + "_log.txt", "w") as f:
+    with open(get_log_file_name(output_file_name), "w") as f:
         yaml.dump(data, f)
 
 
@@ -34,23 +39,60 @@ def handover(
     gryphon_exclusion_list: List[str],
     large_files_exclusion_list: List[str],
     file_list: List[str],
-    configs: dict
+    configs: dict,
+    archive_format: str = ZIP,
+    compression_level: int = HANDOVER_COMPRESSION_LEVEL,
+    workers: int = HANDOVER_WORKERS,
+    previous_manifest: Path = None,
+    strip_notebooks: bool = False
 ):
-    logger.info("Creating zip package.")
+    # files go inside a folder named after the project
+    project_name = basename(normpath(path.absolute()))
+    excluded = set(map(Path, gryphon_exclusion_list)) | set(map(Path, large_files_exclusion_list))
+    files = [Path(f) for f in file_list if Path(f) not in excluded]
+
+    previous = HandoverManifest.load(previous_manifest) if previous_manifest is not None else None
+    # full packages hash the files while archiving them, delta ones need the hashes first
+    manifest = HandoverManifest.build(
+        path, files, previous, previous_manifest, workers,
+        hash_files=previous is not None,
+        strip_notebooks=strip_notebooks
+    )
+
+    if manifest.is_delta:
+        logger.info(f"Creating {archive_format} package with the {len(manifest.changed)} files added or changed "
+                    f"and the {len(manifest.deleted)} files deleted since {previous_manifest}.")
+        changed = set(manifest.changed)
+        files = [f for f in files if f.as_posix() in changed]
+    else:
+        logger.info(f"Creating {archive_format} package.")
+
+    with HandoverArchive(output_path, archive_format, compression_level, workers, strip_notebooks) as archive:
+        hashes = archive.add_files(
+            (path / f, (Path(project_name) / f).as_posix())
+            for f in files
+        )
+        manifest.set_hashes(zip((f.as_posix() for f in files), hashes))
+
+        if len(manifest.deleted):
+            archive.add_bytes(
+                f"{project_name}/{DELETED_FILES_NAME}",
+                "\n".join(manifest.deleted).encode("utf-8")
+            )
+
+        archive.add_bytes(f"{project_name}/{MANIFEST_NAME}", manifest.dumps())
 
-    relative_path = path.absolute().relative_to(Path.cwd())
+    manifest.save(get_manifest_file_name(output_path))
 
-    rc_present = False
-    with zipfile.ZipFile(output_path, mode="w") as zip_file:
-        for f in file_list:
-            if f not in gryphon_exclusion_list and f not in large_files_exclusion_list:
-                zip_file.write(filename=relative_path / f)
-                if GRYPHON_RC in str(f):
-                    rc_present = True
+    if strip_notebooks:
+        logger.info(f"Stripping the notebook outputs saved {archive.bytes_saved / 1e6:.2f} MB.")
 
-    if rc_present:
-        logger.warning(f"WARNING: The {GRYPHON_RC} file was handed over inside the .zip package generated. "
+    if any(GRYPHON_RC in str(f) for f in files):
+        logger.warning(f"WARNING: The {GRYPHON_RC} file was handed over inside the package generated. "
                        f"If you don't want it you should remove it manually.")
+    if any(f.parts[0] == GRYPHON_HISTORY for f in files):
+        logger.warning(f"WARNING: The {GRYPHON_HISTORY} folder was handed over inside the package generated. "
+                       f"Turn off the inclusion of Gryphon generated files on the handover settings to leave it out.")
     logfile = RCManager.get_rc_file(path)
     RCManager.get_environment_manager_path(logfile)
     # TODO: call pip freeze and log the installed libs
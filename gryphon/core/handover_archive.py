@@ -0,0 +1,325 @@
+"""
+File containing the HandoverArchive class, used to write the handover package as a
+compressed zip, tar.gz or tar.xz file.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from ..constants import HANDOVER_COMPRESSION_LEVEL, HANDOVER_WORKERS
+
+logger = logging.getLogger('gryphon')
+
+ZIP = "zip"
+TAR_GZ = "tar.gz"
+TAR_XZ = "tar.xz"
+ARCHIVE_FORMATS = (ZIP, TAR_GZ, TAR_XZ)
+
+# compressing these again only costs time, they go into zip files as they are
+COMPRESSED_EXTENSIONS = {
+    ".parquet", ".feather", ".h5", ".hdf5",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".whl",
+    ".xlsx", ".xlsm", ".docx", ".pptx", ".pdf",
+    ".mp3", ".mp4", ".avi", ".mov",
+}
+
+# files up to this size are read ahead by the worker threads, larger ones are streamed by the writer
+PREFETCH_SIZE = 4 * 1024 ** 2
+HASH_CHUNK_SIZE = 1024 ** 2
+
+NOTEBOOK_EXTENSION = ".ipynb"
+# cell metadata nbstripout drops along with the outputs
+VOLATILE_CELL_METADATA = ("collapsed", "scrolled", "ExecuteTime", "execution")
+
+
+def get_archive_extension(archive_format: str) -> str:
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown handover package format \"{archive_format}\". "
+                         f"Expected one of: {', '.join(ARCHIVE_FORMATS)}.")
+    return f".{archive_format}"
+
+
+def strip_archive_extension(file_name: str) -> str:
+    """Removes the archive extension from the file name, i.e. "a.tar.gz" becomes "a"."""
+    for archive_format in ARCHIVE_FORMATS:
+        extension = get_archive_extension(archive_format)
+        if file_name.endswith(extension):
+            return file_name[:-len(extension)]
+
+    return file_name
+
+
+def is_compressed(path) -> bool:
+    return Path(path).suffix.lower() in COMPRESSED_EXTENSIONS
+
+
+def hash_stream(stream) -> str:
+    file_hash = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hash_stream(f)
+
+
+def is_stripped(path, strip_notebooks: bool) -> bool:
+    """Tells whether the file goes into the package with its notebook outputs stripped."""
+    return strip_notebooks and Path(path).suffix == NOTEBOOK_EXTENSION
+
+
+def hash_stripped_notebook(path: Path) -> str:
+    """Hashes the notebook as it goes into a package with strip_notebooks set."""
+    with open(path, "rb") as f:
+        contents = f.read()
+
+    try:
+        contents = strip_notebook_outputs(contents)
+    except ValueError:
+        # handed over as it is, as done by HandoverArchive
+        pass
+
+    return hashlib.sha256(contents).hexdigest()
+
+
+class _HashingReader:
+    """Wraps a binary file, hashing everything read through it."""
+
+    def __init__(self, f, file_hash):
+        self.f = f
+        self.file_hash = file_hash
+
+    def read(self, size=-1) -> bytes:
+        data = self.f.read(size)
+        self.file_hash.update(data)
+        return data
+
+
+def strip_notebook_outputs(contents: bytes) -> bytes:
+    """
+    Removes the outputs and execution counts of the code cells of a notebook, like the
+    nbstripout add-on. Cells (or notebooks) with "keep_output" on their metadata are kept.
+    """
+    notebook = json.loads(contents)
+    if notebook.get("metadata", {}).get("keep_output"):
+        return contents
+
+    notebook.get("metadata", {}).pop("signature", None)
+    notebook.get("metadata", {}).pop("widgets", None)
+
+    for cell in notebook.get("cells", []):
+        if cell.get("cell_type") != "code":
+            continue
+
+        metadata = cell.get("metadata", {})
+        if metadata.get("keep_output"):
+            continue
+
+        cell["outputs"] = []
+        cell["execution_count"] = None
+        for key in VOLATILE_CELL_METADATA:
+            metadata.pop(key, None)
+
+    # same layout as the notebooks saved by jupyter
+    return (json.dumps(notebook, indent=1, sort_keys=True, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class HandoverArchive:
+    """
+    Writes files into a zip (deflated), tar.gz or tar.xz archive.
+
+    Worker threads read the small files ahead of the writer, which keeps a bounded amount
+    of them in memory at a time, and hash them with SHA-256. Large files are streamed from
+    disk in chunks and hashed on the way, so every file is read once. Already compressed
+    file types are stored as they are on zip archives.
+
+    Members are compressed by the writer alone, through the public zipfile and tarfile
+    interfaces: ZipFile has no public way to add a member compressed elsewhere, and tar
+    archives are a single compressed stream anyway. Before Python 3.13 (which added
+    ZipInfo.compress_level) the large zip members get zlib's default compression level.
+
+    With strip_notebooks, the outputs of the notebooks are removed on their way into the
+    archive (on separate processes), the files on disk are left untouched.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        archive_format: str = ZIP,
+        compression_level: int = HANDOVER_COMPRESSION_LEVEL,
+        workers: int = HANDOVER_WORKERS,
+        strip_notebooks: bool = False
+    ):
+        get_archive_extension(archive_format)
+
+        self.output_path = output_path
+        self.archive_format = archive_format
+        self.compression_level = compression_level
+        self.workers = max(workers, 1)
+        self.strip_notebooks = strip_notebooks
+        self.notebook_executor = None
+        self.bytes_saved = 0
+        self.archive = None
+
+    def __enter__(self):
+        if self.archive_format == ZIP:
+            self.archive = zipfile.ZipFile(
+                self.output_path, mode="w",
+                compression=zipfile.ZIP_DEFLATED,
+                compresslevel=self.compression_level,
+                strict_timestamps=False
+            )
+        elif self.archive_format == TAR_GZ:
+            self.archive = tarfile.open(self.output_path, mode="w:gz", compresslevel=self.compression_level)
+        else:
+            self.archive = tarfile.open(self.output_path, mode="w:xz", preset=self.compression_level)
+
+        if self.strip_notebooks and self.workers > 1:
+            self.notebook_executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.notebook_executor is not None:
+            self.notebook_executor.shutdown()
+            self.notebook_executor = None
+
+        self.archive.close()
+        self.archive = None
+
+    def _strip_notebook(self, path: Path, contents: bytes) -> bytes:
+        executor = self.notebook_executor
+        try:
+            if executor is not None:
+                try:
+                    return executor.submit(strip_notebook_outputs, contents).result()
+                except (OSError, BrokenProcessPool) as e:
+                    logger.debug(f"Could not strip the notebooks on separate processes, stripping them here: {e}")
+                    self.notebook_executor = None
+
+            return strip_notebook_outputs(contents)
+
+        except ValueError as e:
+            logger.debug(f"Could not strip the outputs of {path}, handing it over as it is: {e}")
+            return contents
+
+    def _read(self, path: Path) -> Tuple[Optional[bytes], Optional[str], int]:
+        """
+        Returns the contents of the file along with its SHA-256 hash and how many bytes were
+        saved by stripping it. Files too large to be read at once return (None, None, 0).
+        """
+        is_notebook = is_stripped(path, self.strip_notebooks)
+        if not is_notebook and os.path.getsize(path) > PREFETCH_SIZE:
+            return None, None, 0
+
+        with open(path, "rb") as f:
+            contents = f.read()
+
+        bytes_saved = 0
+        if is_notebook:
+            stripped = self._strip_notebook(path, contents)
+            bytes_saved = len(contents) - len(stripped)
+            contents = stripped
+
+        return contents, hashlib.sha256(contents).hexdigest(), bytes_saved
+
+    def _get_compress_type(self, path: Path) -> int:
+        return zipfile.ZIP_STORED if is_compressed(path) else zipfile.ZIP_DEFLATED
+
+    def _write(self, path: Path, arcname: str, contents: bytes):
+        if self.archive_format == ZIP:
+            info = zipfile.ZipInfo.from_file(path, arcname=arcname, strict_timestamps=False)
+            self.archive.writestr(
+                info, contents,
+                compress_type=self._get_compress_type(path),
+                compresslevel=self.compression_level
+            )
+            return
+
+        info = self.archive.gettarinfo(path, arcname=arcname)
+        info.size = len(contents)
+        self.archive.addfile(info, io.BytesIO(contents))
+
+    def _stream(self, path: Path, arcname: str) -> str:
+        """Streams a large file into the archive, hashing it on the way so it is read only once."""
+        file_hash = hashlib.sha256()
+
+        with open(path, "rb") as f:
+            source = _HashingReader(f, file_hash)
+
+            if self.archive_format == ZIP:
+                info = zipfile.ZipInfo.from_file(path, arcname=arcname, strict_timestamps=False)
+                info.compress_type = self._get_compress_type(path)
+                if hasattr(info, "compress_level"):
+                    info.compress_level = self.compression_level
+
+                with self.archive.open(info, "w") as target:
+                    shutil.copyfileobj(source, target, HASH_CHUNK_SIZE)
+            else:
+                self.archive.addfile(self.archive.gettarinfo(path, arcname=arcname), source)
+
+        return file_hash.hexdigest()
+
+    def add_bytes(self, arcname: str, contents: bytes):
+        """Adds a file created in memory (i.e. a generated list of files) to the archive."""
+        if self.archive_format == ZIP:
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            self.archive.writestr(
+                info, contents,
+                compress_type=zipfile.ZIP_DEFLATED,
+                compresslevel=self.compression_level
+            )
+            return
+
+        info = tarfile.TarInfo(arcname)
+        info.size = len(contents)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, io.BytesIO(contents))
+
+    def add_files(self, files: Iterable[Tuple[Path, str]]) -> List[str]:
+        """
+        Adds the (file path, name inside the archive) pairs to the archive, in the given order.
+        Returns the SHA-256 hashes of the files, in the same order.
+        """
+        hashes = []
+
+        def _write_next():
+            path, arcname, future = pending.popleft()
+            contents, file_hash, bytes_saved = future.result()
+            if contents is None:
+                file_hash = self._stream(path, arcname)
+            else:
+                self._write(path, arcname, contents)
+            hashes.append(file_hash)
+            self.bytes_saved += bytes_saved
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            for path, arcname in files:
+                pending.append((path, arcname, executor.submit(self._read, path)))
+
+                # bounds the memory taken by the files read ahead
+                if len(pending) > self.workers * 2:
+                    _write_next()
+
+            while len(pending):
+                _write_next()
+
+        return hashes
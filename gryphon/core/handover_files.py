@@ -0,0 +1,111 @@
+"""
+File containing the HandoverFileTable class, with the sizes of the files of a project read
+once per handover and queried again every time the handover settings change.
+"""
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .handover_archive import is_compressed
+from .operations import PathUtils
+from ..constants import FILE_SCAN_EXCLUDED
+
+# rough compressed size / original size, used to estimate the size of the package
+TEXT_EXTENSIONS = {
+    ".py", ".ipynb", ".r", ".sql", ".sh", ".txt", ".md", ".rst",
+    ".csv", ".tsv", ".json", ".xml", ".html", ".yml", ".yaml", ".cfg", ".toml", ".ini",
+}
+TEXT_COMPRESSION_RATIO = 0.3
+COMPRESSED_FILE_RATIO = 1.0
+DEFAULT_COMPRESSION_RATIO = 0.7
+
+
+def get_compression_ratio(file: Path) -> float:
+    if is_compressed(file):
+        return COMPRESSED_FILE_RATIO
+
+    if file.suffix.lower() in TEXT_EXTENSIONS:
+        return TEXT_COMPRESSION_RATIO
+
+    return DEFAULT_COMPRESSION_RATIO
+
+
+class HandoverFileTable:
+    """
+    Files of a project (relative to its folder) along with their sizes in bytes.
+    The folder is scanned only when the table is created; size thresholds and
+    exclusions are answered from memory.
+    """
+
+    def __init__(self, path: Path, files: List[Path], sizes: List[int]):
+        self.path = path
+        self.files = files
+        self.sizes = dict(zip(files, sizes))
+
+        # sorted once, threshold queries become a binary search
+        self.by_size = sorted(files, key=self.sizes.__getitem__)
+        self.sorted_sizes = [self.sizes[f] for f in self.by_size]
+
+    @classmethod
+    def scan(cls, path: Path, excluded=FILE_SCAN_EXCLUDED) -> "HandoverFileTable":
+        files = []
+        sizes = []
+        for relative_path, entry in PathUtils.scan_files(path, excluded):
+            files.append(relative_path)
+            sizes.append(entry.stat().st_size)
+
+        return cls(path, files, sizes)
+
+    def __len__(self):
+        return len(self.files)
+
+    def get_large_files(self, limit: float) -> Dict[Path, float]:
+        """Returns the files larger than the limit (in MB) with their sizes in MB, largest first."""
+        position = bisect_right(self.sorted_sizes, limit * 1e6)
+        return {
+            f: self.sizes[f] / 1e6
+            for f in reversed(self.by_size[position:])
+        }
+
+    def get_included_files(self, *exclusion_lists: Iterable) -> List[Path]:
+        """Returns the files that are in none of the exclusion lists, in the scan order."""
+        excluded = set()
+        for exclusion_list in exclusion_lists:
+            excluded.update(map(Path, exclusion_list))
+
+        return [f for f in self.files if f not in excluded]
+
+    def get_total_size(self, *exclusion_lists: Iterable) -> int:
+        return sum(self.sizes[f] for f in self.get_included_files(*exclusion_lists))
+
+    def get_largest_files_by_folder(self, *exclusion_lists: Iterable, n: int = 5) -> Dict[str, List[Tuple[Path, int]]]:
+        """
+        Returns the n largest files inside each top level folder of the project (files at the
+        root are under "."), largest folders first. Files in the exclusion lists are left out.
+        """
+        excluded = set()
+        for exclusion_list in exclusion_lists:
+            excluded.update(map(Path, exclusion_list))
+
+        folders = {}
+        for f in reversed(self.by_size):
+            if f in excluded:
+                continue
+
+            folder = f.parts[0] if len(f.parts) > 1 else "."
+            folders.setdefault(folder, [0, []])
+            folders[folder][0] += self.sizes[f]
+            if len(folders[folder][1]) < n:
+                folders[folder][1].append((f, self.sizes[f]))
+
+        return {
+            folder: largest
+            for folder, (_, largest) in sorted(folders.items(), key=lambda item: -item[1][0])
+        }
+
+    def estimate_compressed_size(self, *exclusion_lists: Iterable) -> int:
+        """Estimates the size in bytes of the package from the type of each included file."""
+        return int(sum(
+            self.sizes[f] * get_compression_ratio(f)
+            for f in self.get_included_files(*exclusion_lists)
+        ))
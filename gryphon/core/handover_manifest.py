@@ -0,0 +1,255 @@
+"""
+File containing the HandoverManifest class, which records the files handed over so the
+package can be verified by whoever receives it and the next handover can package only
+the files that changed since then.
+"""
+import json
+import os
+import tarfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from os.path import normpath, basename
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .handover_archive import (
+    strip_archive_extension, hash_file, hash_stream, is_stripped, hash_stripped_notebook
+)
+from ..constants import HANDOVER_WORKERS
+
+MANIFEST_NAME = "handover_manifest.json"
+MANIFEST_SUFFIX = "_manifest.json"
+DELETED_FILES_NAME = "handover_deleted_files.txt"
+
+
+def get_manifest_file_name(output_file_name) -> Path:
+    return Path(strip_archive_extension(str(output_file_name)) + MANIFEST_SUFFIX)
+
+
+def find_previous_manifests(path: Path) -> List[Path]:
+    """Returns the manifests of the previous handovers of the project, newest first."""
+    project_name = basename(normpath(path.absolute()))
+    manifests = path.absolute().parent.glob(f"{project_name}_handover_*{MANIFEST_SUFFIX}")
+    return sorted(manifests, key=os.path.getmtime, reverse=True)
+
+
+class HandoverManifest:
+    """
+    Path, size, modification time and SHA-256 hash of every file in a handover package.
+    The size and modification time are the ones of the file on disk, the hash is taken from
+    the contents packaged (notebooks packaged without their outputs are marked as "stripped").
+
+    A delta manifest still lists the whole project, along with the files that were added or
+    changed since the previous manifest (the ones actually packaged) and the deleted ones.
+    """
+
+    def __init__(self, files: dict, previous_manifest: str = None, changed: list = None, deleted: list = None):
+        self.files = files
+        self.previous_manifest = previous_manifest
+        self.changed = changed
+        self.deleted = deleted if deleted is not None else []
+
+    @property
+    def is_delta(self) -> bool:
+        return self.changed is not None
+
+    @classmethod
+    def build(
+        cls,
+        path: Path,
+        file_list: Iterable[Path],
+        previous: "HandoverManifest" = None,
+        previous_manifest: Path = None,
+        workers: int = HANDOVER_WORKERS,
+        hash_files: bool = True,
+        strip_notebooks: bool = False
+    ) -> "HandoverManifest":
+        """
+        Describes the given files (relative to path). Files with the same size and modification
+        time as on the previous manifest (and packaged the same way) keep their hash, only the
+        others are read. With hash_files=False they are left for set_hashes, i.e. hashed while
+        being archived. With strip_notebooks, notebooks are hashed without their outputs, as
+        they go into the package.
+        """
+        files = {}
+        to_hash = []
+        for f in file_list:
+            stat = os.stat(path / f)
+            name = Path(f).as_posix()
+            files[name] = dict(size=stat.st_size, mtime=stat.st_mtime)
+            if is_stripped(name, strip_notebooks):
+                files[name]["stripped"] = True
+
+            previous_entry = previous.files.get(name) if previous is not None else None
+            if previous_entry is not None and \
+                    (previous_entry["size"], previous_entry["mtime"]) == (stat.st_size, stat.st_mtime) and \
+                    previous_entry.get("stripped", False) == files[name].get("stripped", False):
+                files[name]["sha256"] = previous_entry["sha256"]
+            else:
+                to_hash.append(name)
+
+        def _hash(name):
+            if files[name].get("stripped"):
+                return hash_stripped_notebook(path / name)
+            return hash_file(path / name)
+
+        if hash_files:
+            with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+                for name, file_hash in zip(to_hash, executor.map(_hash, to_hash)):
+                    files[name]["sha256"] = file_hash
+
+        if previous is None:
+            return cls(files)
+
+        changed = [
+            name
+            for name, entry in files.items()
+            if previous.files.get(name, {}).get("sha256") != entry.get("sha256")
+        ]
+        deleted = sorted(set(previous.files) - set(files))
+        previous_manifest = str(previous_manifest) if previous_manifest is not None else None
+        return cls(files, previous_manifest, changed, deleted)
+
+    def set_hashes(self, hashes: Iterable[Tuple[str, str]]):
+        for name, file_hash in hashes:
+            self.files[name]["sha256"] = file_hash
+
+    @classmethod
+    def from_dict(cls, contents: dict) -> "HandoverManifest":
+        return cls(
+            files=contents["files"],
+            previous_manifest=contents.get("previous_manifest"),
+            changed=contents.get("changed"),
+            deleted=contents.get("deleted")
+        )
+
+    @classmethod
+    def load(cls, manifest_file: Path) -> "HandoverManifest":
+        with open(manifest_file, "r", encoding="UTF-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self) -> dict:
+        contents = dict(files=self.files)
+        if self.is_delta:
+            contents.update(
+                previous_manifest=self.previous_manifest,
+                changed=self.changed,
+                deleted=self.deleted
+            )
+        return contents
+
+    def dumps(self) -> bytes:
+        return json.dumps(self.to_dict(), indent=4).encode("utf-8")
+
+    def save(self, manifest_file: Path):
+        with open(manifest_file, "wb") as f:
+            f.write(self.dumps())
+
+    def get_packaged_files(self) -> List[str]:
+        """Returns the files that went into the package, only the changed ones on delta packages."""
+        return self.changed if self.is_delta else list(self.files)
+
+    def compare(self, hashes: dict) -> dict:
+        """Checks the hashes found on the package (or folder) against the manifest."""
+        missing = []
+        mismatched = []
+        for name in self.get_packaged_files():
+            file_hash = hashes.get(name)
+            if file_hash is None:
+                missing.append(name)
+            elif file_hash != self.files[name]["sha256"]:
+                mismatched.append(name)
+
+        verified = len(self.get_packaged_files()) - len(missing) - len(mismatched)
+        return dict(verified=verified, missing=missing, mismatched=mismatched)
+
+
+def _is_manifest_member(member_name: str) -> bool:
+    # the manifest sits right inside the project folder
+    return member_name.endswith(f"/{MANIFEST_NAME}") and member_name.count("/") == 1
+
+
+def _verify_folder(folder: Path, workers: int) -> dict:
+    manifest = HandoverManifest.load(folder / MANIFEST_NAME)
+
+    def _hash(name):
+        file_path = folder / name
+        return hash_file(file_path) if file_path.is_file() else None
+
+    names = manifest.get_packaged_files()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return manifest.compare(dict(zip(names, executor.map(_hash, names))))
+
+
+def _verify_zip(archive_path: Path, workers: int) -> dict:
+    with zipfile.ZipFile(archive_path) as zip_file:
+        member_names = set(zip_file.namelist())
+        manifest_member = next(filter(_is_manifest_member, member_names), None)
+        if manifest_member is None:
+            raise FileNotFoundError(f"Could not find the {MANIFEST_NAME} file inside the handover package.")
+
+        manifest = HandoverManifest.from_dict(json.loads(zip_file.read(manifest_member)))
+
+    prefix = manifest_member[:-len(MANIFEST_NAME)]
+
+    # each thread reads through its own handle, so members are inflated in parallel
+    handles = threading.local()
+    opened = []
+
+    def _hash(name):
+        if prefix + name not in member_names:
+            return None
+
+        if not hasattr(handles, "zip_file"):
+            handles.zip_file = zipfile.ZipFile(archive_path)
+            opened.append(handles.zip_file)
+        with handles.zip_file.open(prefix + name) as f:
+            return hash_stream(f)
+
+    names = manifest.get_packaged_files()
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            hashes = dict(zip(names, executor.map(_hash, names)))
+    finally:
+        for zip_file in opened:
+            zip_file.close()
+
+    return manifest.compare(hashes)
+
+
+def _verify_tar(archive_path: Path) -> dict:
+    # tar packages are a single compressed stream, read once from start to end
+    hashes = {}
+    manifest_contents = None
+    with tarfile.open(archive_path, mode="r:*") as tar_file:
+        for member in tar_file:
+            if not member.isfile():
+                continue
+
+            f = tar_file.extractfile(member)
+            if _is_manifest_member(member.name):
+                manifest_contents = f.read()
+            else:
+                hashes[member.name.split("/", 1)[-1]] = hash_stream(f)
+
+    if manifest_contents is None:
+        raise FileNotFoundError(f"Could not find the {MANIFEST_NAME} file inside the handover package.")
+
+    return HandoverManifest.from_dict(json.loads(manifest_contents)).compare(hashes)
+
+
+def verify_handover(target: Path, workers: int = HANDOVER_WORKERS) -> dict:
+    """
+    Re-hashes the files of a handover package, or of the project folder extracted from it,
+    and compares them with the manifest written inside the package.
+    Returns the number of files verified and the lists of missing and mismatched files.
+    """
+    target = Path(target)
+    if target.is_dir():
+        return _verify_folder(target, workers)
+
+    if zipfile.is_zipfile(target):
+        return _verify_zip(target, workers)
+
+    return _verify_tar(target)
@@ -1,19 +1,15 @@
 """
 Module containing the code for the init command in the CLI.
 """
-import json
 import logging
 import os
-import shutil
 import platform
 from pathlib import Path
 
 from .common_operations import (
     init_new_git_repo, initial_git_commit,
-    fetch_template, append_requirement,
-    mark_notebooks_as_readonly,
-    clean_readonly_folder, enable_files_overwrite,
-    backup_files_to_be_overwritten, log_changes
+    materialize_template, append_requirement,
+    log_changes
 )
 from .operations import (
     BashUtils, EnvironmentManagerOperations, NBStripOutManager,
@@ -22,7 +18,7 @@ from .operations import (
 from .registry import Template
 from ..constants import (
     DEFAULT_ENV, INIT, VENV, PIPENV, CONDA, REMOTE_INDEX, SUCCESS,
-    LOCAL_TEMPLATE, VENV_FOLDER, CONDA_FOLDER, REQUIREMENTS, CONFIG_FILE
+    LOCAL_TEMPLATE, VENV_FOLDER, CONDA_FOLDER, REQUIREMENTS
 )
 
 logger = logging.getLogger('gryphon')
@@ -31,31 +27,15 @@ logger = logging.getLogger('gryphon')
 def handle_template(template, project_home, rc_file):
     if template.registry_type == REMOTE_INDEX:
 
-        template_folder = fetch_template(template, project_home)
+        new_files = []
         all_renamed_files = []
         
         try:
-            enable_files_overwrite(
-                source_folder=template_folder / "notebooks",
-                destination_folder=project_home / "notebooks"
-            )
-            mark_notebooks_as_readonly(template_folder / "notebooks")
-            
-            all_renamed_files, suffix = backup_files_to_be_overwritten(Path(template_folder), Path(project_home), subfolders = ["utilities"])
-            
-            # Move files to destination
-            shutil.copytree(
-                src=Path(template_folder),
-                dst=project_home,
-                dirs_exist_ok=True,
-                ignore=shutil.ignore_patterns(
-                    ".git",
-                    ".github",
-                    "__pycache__",
-                    "envs",
-                    ".venv",
-                    ".ipynb_checkpoints"
-                )
+            # Write files to destination
+            new_files, all_renamed_files, suffix = materialize_template(
+                template, project_home,
+                backup_subfolders=["utilities"],
+                readonly_notebooks=True
             )
             
         except Exception as e:
@@ -63,8 +43,7 @@ def handle_template(template, project_home, rc_file):
             logger.error(str(e))
         
         finally:
-            RCManager.log_new_files(template, template_folder, performed_action=INIT, logfile=rc_file)
-            clean_readonly_folder(template_folder)
+            RCManager.log_new_files(template, project_home, performed_action=INIT, logfile=rc_file, files=new_files)
             
             # Log changes to files            
             if (all_renamed_files is not None) and (len(all_renamed_files) > 0):
@@ -103,9 +82,7 @@ def init(template: Template, location, python_version,
     if force_env:
         env_type = force_env
     else:
-        with open(SettingsManager.get_config_path(), "r", encoding="UTF-8") as f:
-            data = json.load(f)
-            env_type = data.get("environment_management", DEFAULT_ENV)
+        env_type = SettingsManager.get_settings().get("environment_management", DEFAULT_ENV)
 
     project_home = Path.cwd() / location
 
@@ -119,127 +96,125 @@ def init(template: Template, location, python_version,
         
     # RC file
     rc_file = RCManager.get_rc_file(project_home)
-    RCManager.log_operation(template, performed_action=INIT, logfile=rc_file)
-    
-    # TEMPLATE
-    handle_template(template, project_home, rc_file)
+    # changes to the rc file are kept in memory and written at once when the project is set up
+    with RCManager.session(rc_file) as rc_session:
+        RCManager.log_operation(template, performed_action=INIT, logfile=rc_file)
+
+        # TEMPLATE
+        handle_template(template, project_home, rc_file)
+
+        if install_pre_commit_hooks:
+            PreCommitManager.initial_setup(project_home)
+
+        # Git, with the template files already logged on the committed rc file
+        rc_session.commit()
+        repo = init_new_git_repo(folder=project_home)
+        # initial_git_commit_os(project_home)
+        initial_git_commit(repo)
+
+        # Requirements
+        if env_type != PIPENV:
+            for r in template.dependencies:
+                append_requirement(r, project_home)
+        else:
+            pipenv_requirements = []
+            pipenv_requirements.extend(template.dependencies)
+            pipenv_requirements = list(set(pipenv_requirements))
 
-    if install_pre_commit_hooks:
-        PreCommitManager.initial_setup(project_home)
+        RCManager.log_add_library(template.dependencies, logfile=rc_file)
 
-    # Git
-    repo = init_new_git_repo(folder=project_home)
-    # initial_git_commit_os(project_home)
-    initial_git_commit(repo)
+        # ENV Manager
+        if env_type == PIPENV:
 
-    # Requirements
-    if env_type != PIPENV:
-        for r in template.dependencies:
-            append_requirement(r, project_home)
-    else:
-        pipenv_requirements = []
-        pipenv_requirements.extend(template.dependencies)
-        pipenv_requirements = list(set(pipenv_requirements))
-        
-    RCManager.log_add_library(template.dependencies, logfile=rc_file)
+            use_this_folder = SettingsManager.get_pipenv_in_project()
 
-    # ENV Manager
-    if env_type == PIPENV:
-        
-        with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-            settings_file = json.load(f)
-        use_this_folder = settings_file.get("pipenv_in_project")
-        
-        logger.debug(f"use folder: {use_this_folder}")
-        
-        if use_this_folder is None:
-            use_this_folder = False
-            
-        EnvironmentManagerOperations.create_pipenv_venv(project_folder = project_home, current_folder=use_this_folder)
-        
-        RCManager.set_environment_manager(PIPENV, logfile=rc_file)
-        
-        if use_this_folder:
-            RCManager.set_environment_manager_path("project_folder", logfile=rc_file)
-        else:
-            RCManager.set_environment_manager_path("default", logfile=rc_file)
-            
-        # Install libraries
-        logger.debug(pipenv_requirements)
-        
-        print(pipenv_requirements)
-        
-        EnvironmentManagerOperations.install_libraries_pipenv(pipenv_requirements)
+            logger.debug(f"use folder: {use_this_folder}")
 
-    elif env_type == VENV:
-        # VENV
-        env_path = EnvironmentManagerOperations.create_venv(
-            folder=project_home / VENV_FOLDER,
-            python_version=python_version
-        )
+            EnvironmentManagerOperations.create_pipenv_venv(project_folder = project_home, current_folder=use_this_folder)
 
-        RCManager.set_environment_manager(VENV, logfile=rc_file)
-        RCManager.set_environment_manager_path(env_path, logfile=rc_file)
+            RCManager.set_environment_manager(PIPENV, logfile=rc_file)
 
-        EnvironmentManagerOperations.install_libraries_venv(
-            environment_path=project_home / VENV_FOLDER,
-            requirements_path=project_home / REQUIREMENTS
-        )
+            if use_this_folder:
+                RCManager.set_environment_manager_path("project_folder", logfile=rc_file)
+            else:
+                RCManager.set_environment_manager_path("default", logfile=rc_file)
+
+            # Install libraries
+            logger.debug(pipenv_requirements)
 
-        if install_nbextensions:
-            logger.info("Installing extra notebook extensions.")
+            print(pipenv_requirements)
 
-            NBExtensionsManager.install_extra_nbextensions_venv(
+            EnvironmentManagerOperations.install_libraries_pipenv(pipenv_requirements)
+
+        elif env_type == VENV:
+            # VENV
+            env_path = EnvironmentManagerOperations.create_venv(
+                folder=project_home / VENV_FOLDER,
+                python_version=python_version
+            )
+
+            RCManager.set_environment_manager(VENV, logfile=rc_file)
+            RCManager.set_environment_manager_path(env_path, logfile=rc_file)
+
+            EnvironmentManagerOperations.install_libraries_venv(
                 environment_path=project_home / VENV_FOLDER,
                 requirements_path=project_home / REQUIREMENTS
             )
-            logger.log(SUCCESS, "Notebook extensions installed successfully.")
 
-    elif env_type == CONDA:
-        # CONDA
+            if install_nbextensions:
+                logger.info("Installing extra notebook extensions.")
 
-        env_path = EnvironmentManagerOperations.create_conda_env(
-            project_home / CONDA_FOLDER,
-            python_version=python_version
-        )
+                NBExtensionsManager.install_extra_nbextensions_venv(
+                    environment_path=project_home / VENV_FOLDER,
+                    requirements_path=project_home / REQUIREMENTS
+                )
+                logger.log(SUCCESS, "Notebook extensions installed successfully.")
 
-        RCManager.set_environment_manager(CONDA, logfile=rc_file)
-        RCManager.set_environment_manager_path(env_path, logfile=rc_file)
+        elif env_type == CONDA:
+            # CONDA
 
-        EnvironmentManagerOperations.install_libraries_conda(
-            environment_path=project_home / CONDA_FOLDER,
-            requirements_path=project_home / REQUIREMENTS
-        )
+            env_path = EnvironmentManagerOperations.create_conda_env(
+                project_home / CONDA_FOLDER,
+                python_version=python_version
+            )
 
-        if install_nbextensions:
-            logger.info("Installing extra notebook extensions.")
-            NBExtensionsManager.install_extra_nbextensions_conda(
+            RCManager.set_environment_manager(CONDA, logfile=rc_file)
+            RCManager.set_environment_manager_path(env_path, logfile=rc_file)
+
+            EnvironmentManagerOperations.install_libraries_conda(
                 environment_path=project_home / CONDA_FOLDER,
                 requirements_path=project_home / REQUIREMENTS
             )
-            logger.log(SUCCESS, "Notebook extensions installed successfully.")
 
-    else:
-        raise RuntimeError("Invalid \"environment_management\" option on gryphon_config.json file."
-                           f"Should be one of {[INIT, CONDA]} but \"{env_type}\" was given.")
-
-    if install_nb_strip_out:
-        logger.info("Installing nbstripout")
-        NBStripOutManager.setup(project_home, environment_path=env_path)
-        logger.log(SUCCESS, "Nbstripout installed successfully.")
-
-    if install_pre_commit_hooks:
-        logger.info("Installing pre-commit hooks")
-        PreCommitManager.final_setup(project_home)
-        logger.log(SUCCESS, "Pre-commit hooks installed successfully.")
-
-    # update addons in gryphon_rc
-    RCManager.set_addon_states(
-        install_nb_strip_out=install_nb_strip_out,
-        install_nbextensions=install_nbextensions,
-        install_pre_commit_hooks=install_pre_commit_hooks,
-        logfile=rc_file
-    )
+            if install_nbextensions:
+                logger.info("Installing extra notebook extensions.")
+                NBExtensionsManager.install_extra_nbextensions_conda(
+                    environment_path=project_home / CONDA_FOLDER,
+                    requirements_path=project_home / REQUIREMENTS
+                )
+                logger.log(SUCCESS, "Notebook extensions installed successfully.")
+
+        else:
+            raise RuntimeError("Invalid \"environment_management\" option on gryphon_config.json file."
+                               f"Should be one of {[INIT, CONDA]} but \"{env_type}\" was given.")
+
+        if install_nb_strip_out:
+            logger.info("Installing nbstripout")
+            NBStripOutManager.setup(project_home, environment_path=env_path)
+            logger.log(SUCCESS, "Nbstripout installed successfully.")
+
+        if install_pre_commit_hooks:
+            logger.info("Installing pre-commit hooks")
+            PreCommitManager.final_setup(project_home)
+            logger.log(SUCCESS, "Pre-commit hooks installed successfully.")
+
+        # update addons in gryphon_rc
+        RCManager.set_addon_states(
+            install_nb_strip_out=install_nb_strip_out,
+            install_nbextensions=install_nbextensions,
+            install_pre_commit_hooks=install_pre_commit_hooks,
+            logfile=rc_file
+        )
     
     # Check if any shell script is provided
     if template.shell_exec is not None:
@@ -1,3 +1,4 @@
+import glob
 import logging
 import os
 import shutil
@@ -5,11 +6,11 @@ from pathlib import Path
 from textwrap import wrap
 
 from .common_operations import (
-    init_new_git_repo, initial_git_commit_os,
-    fetch_template, append_requirement,
-    mark_notebooks_as_readonly,
-    clean_readonly_folder, list_files, enable_files_overwrite
+    init_new_git_repo,
+    append_requirement, enable_files_overwrite,
+    _download_template
 )
+from .merge_plan import MergePlan
 from .operations import EnvironmentManagerOperations, RCManager, PathUtils, SettingsManager
 from ..constants import (
     GRYPHON_RC, VENV, CONDA, REMOTE_INDEX, LOCAL_TEMPLATE,
@@ -110,64 +111,56 @@ def process_environment(
             path = create_environment(path, env_manager=env_manager)
 
     logfile = RCManager.get_rc_file(location)
-    RCManager.initialize_log(logfile)
-    RCManager.set_environment_manager(env_manager, logfile)
-    RCManager.set_environment_manager_path(path, logfile)
+    with RCManager.session(logfile):
+        RCManager.initialize_log(logfile)
+        RCManager.set_environment_manager(env_manager, logfile)
+        RCManager.set_environment_manager_path(path, logfile)
 
     return path
 
 
 # TEMPLATE
 
-def handle_template(template, project_home):
-    template_folder = None
+def handle_template(template, project_home, dry_run=False):
+    """
+    Adds the template files to the project, keeping every file the project already has.
+    With dry_run, the planned actions are only shown. Remote templates are downloaded first
+    and planned straight from the members of their zips.
+    """
+    download_folder = project_home / ".temp"
     try:
         if template.registry_type == REMOTE_INDEX:
-
-            template_folder = fetch_template(template, project_home)
-            mark_notebooks_as_readonly(template_folder / "notebooks")
+            _download_template(template, download_folder)
+            template_folder = None
+            plan = MergePlan.from_zips(sorted(glob.glob(str(download_folder / "*.zip"))), project_home)
 
         elif template.registry_type == LOCAL_TEMPLATE:
             template_folder = Path(template.path) / "template"
+            plan = MergePlan(template_folder, project_home)
 
         else:
             raise RuntimeError(f"Invalid registry type: {template.registry_type}.")
 
-        new_files = list_files(template_folder)
-        existing_files = list_files(project_home)
-
-        enable_files_overwrite(
-            source_folder=template_folder,
-            destination_folder=project_home
-        )
-
-        not_collided = [
-            file
-            for file in new_files
-            if file not in existing_files
-        ]
-
-        for file in not_collided:
+        if dry_run:
+            for line in plan.describe():
+                logger.info(line)
+            return
 
-            origin = template_folder / file
-            destination = project_home / file
-
-            os.makedirs(destination.parent, exist_ok=True)
-            shutil.copy2(
-                src=origin,
-                dst=destination
+        if template_folder is not None:
+            enable_files_overwrite(
+                source_folder=template_folder,
+                destination_folder=project_home
             )
 
-        #if template.registry_type == REMOTE_INDEX:
-        #    clean_readonly_folder(template_folder)
-            
+        # notebooks coming from remote templates are read only
+        plan.execute(readonly_notebooks=template_folder is None)
+
     except Exception as e:
         logger.error("Failed to move template files into target folder.")
         logger.error(str(e))
-            
+
     finally:
-        if template_folder is not None and template_folder.is_dir():
-            clean_readonly_folder(template_folder)
+        shutil.rmtree(download_folder, ignore_errors=True)
 
 
 def init_from_existing(template, location: Path, env_manager, use_existing_environment, existing_env_path,
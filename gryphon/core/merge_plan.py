@@ -0,0 +1,135 @@
+"""
+Module containing the MergePlan class, used to adopt a template into an existing project.
+"""
+import logging
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import List
+
+from .common_operations import list_files, _find_changed_files, _list_template_members
+from ..constants import MERGE_WORKERS
+
+logger = logging.getLogger('gryphon')
+
+COPY = "copy"
+SKIP = "skip"
+CONFLICT = "conflict"
+
+
+class MergePlan:
+    """
+    Decides what happens to each file of a template folder when it is merged into a project:
+    files missing from the project are copied, files the project already has with the same
+    contents are skipped and files the project has with other contents are conflicts, which
+    keep the project version.
+
+    The template files are read from the template folder or, for remote templates, straight
+    from the members of the downloaded zips (see from_zips).
+    """
+
+    def __init__(self, template_folder: Path, project_folder: Path, members: dict = None, workers=MERGE_WORKERS):
+        self.template_folder = Path(template_folder) if template_folder is not None else None
+        self.project_folder = Path(project_folder)
+
+        # zip and member holding each template file, when reading from zips
+        self.members = members
+
+        if members is None:
+            template_files = set(list_files(self.template_folder))
+        else:
+            template_files = set(members)
+
+        project_files = set(list_files(self.project_folder))
+
+        self.actions = {file: COPY for file in template_files - project_files}
+        with ExitStack() as stack:
+            get_zip = self._open_zips(stack)
+
+            # the files both have are compared concurrently
+            shared_files = template_files & project_files
+            changed_files = set(_find_changed_files(
+                self.project_folder,
+                {file: self._get_source(file, get_zip) for file in shared_files},
+                workers=workers
+            ))
+            for file in shared_files:
+                self.actions[file] = CONFLICT if file in changed_files else SKIP
+
+    @classmethod
+    def from_zips(cls, zip_files: list, project_folder: Path) -> "MergePlan":
+        """Plans the merge of the "template" folder of the zips of a downloaded template."""
+        return cls(None, project_folder, members=_list_template_members(zip_files))
+
+    @staticmethod
+    def _open_zips(stack: ExitStack):
+        """
+        Returns a function giving each thread its own handle on a zip, as a ZipFile is not
+        safe to share between threads. The handles are closed along with the stack.
+        """
+        handles = threading.local()
+        opened = []
+        stack.callback(lambda: [zip_handle.close() for zip_handle in opened])
+
+        def _get_zip(zip_file) -> zipfile.ZipFile:
+            if not hasattr(handles, "zips"):
+                handles.zips = {}
+            if zip_file not in handles.zips:
+                handles.zips[zip_file] = zipfile.ZipFile(zip_file, 'r')
+                opened.append(handles.zips[zip_file])
+            return handles.zips[zip_file]
+
+        return _get_zip
+
+    def _get_source(self, file: Path, get_zip):
+        """Returns the template file path, or a function opening the zip member with it."""
+        if self.members is None:
+            return self.template_folder / file
+
+        zip_file, member = self.members[file]
+        return lambda: get_zip(zip_file).open(member)
+
+    def get_files(self, action: str) -> List[Path]:
+        return sorted(file for file, file_action in self.actions.items() if file_action == action)
+
+    def describe(self) -> List[str]:
+        """Returns one line per file of the plan, used to show it as a dry run."""
+        return [
+            f"{action.ljust(8)} {file}"
+            for action in [COPY, SKIP, CONFLICT]
+            for file in self.get_files(action)
+        ]
+
+    def execute(self, workers=MERGE_WORKERS, readonly_notebooks=False) -> List[Path]:
+        """Copies the planned files into the project, returning the files copied."""
+        files = self.get_files(COPY)
+
+        # folders are created upfront so the copies don't race for them
+        for folder in {(self.project_folder / file).parent for file in files}:
+            os.makedirs(folder, exist_ok=True)
+
+        with ExitStack() as stack:
+            get_zip = self._open_zips(stack)
+
+            def _copy(file):
+                source = self._get_source(file, get_zip)
+                if callable(source):
+                    with source() as f, open(self.project_folder / file, "wb") as target:
+                        shutil.copyfileobj(f, target)
+                else:
+                    shutil.copy2(src=source, dst=self.project_folder / file)
+
+                if readonly_notebooks and file.parts[0] == "notebooks" and file.suffix == ".ipynb":
+                    os.chmod(self.project_folder / file, 0o444)
+
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as executor:
+                list(executor.map(_copy, files))
+
+        for file in self.get_files(CONFLICT):
+            logger.warning(f"Kept the project version of {file}, which differs from the template one.")
+
+        return files
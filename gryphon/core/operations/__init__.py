@@ -1,11 +1,14 @@
 from .bash_utils import BashUtils
 from .ci_cd_manager import CICDManager
 from .environment_manager_operations import EnvironmentManagerOperations
+from .file_lock import FileLock, write_atomically
 from .nb_stripout_manager import NBStripOutManager
 from .nbextesions_manager import NBExtensionsManager
 from .path_utils import PathUtils
 from .pre_commit_manager import PreCommitManager
+from .rc_history import RCHistory
 from .rc_manager import RCManager
 from .settings import SettingsManager
+from .template_cache import TemplateCache
 
 # TODO: Create addons folder and common interface class to make it straightforward to implement new ones
@@ -0,0 +1,145 @@
+"""
+File containing the FileLock class, an advisory lock shared by every gryphon process on the
+machine, used around the files and folders more than one of them may change at a time
+(the .gryphon_rc files, the config file and the local copies of the indexes).
+"""
+import hashlib
+import logging
+import os
+import platform
+import threading
+import time
+from pathlib import Path
+
+from ...constants import LOCK_FOLDER
+
+logger = logging.getLogger('gryphon')
+
+LOCK_POLL_INTERVAL = 0.1
+
+if platform.system() == "Windows":
+    # noinspection PyUnresolvedReferences
+    import msvcrt
+
+    def _try_lock(fd) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(fd) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def write_atomically(path: Path, text: str):
+    """Writes the file through a temporary file, so readers never see it half written."""
+    path = Path(path)
+    temp_file = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_file, path)
+
+    except BaseException:
+        if temp_file.is_file():
+            os.remove(temp_file)
+        raise
+
+
+class FileLock:
+    """
+    Exclusive lock on a file or folder, held by one thread of one process at a time.
+
+    The lock files are kept under the gryphon home folder (not next to the resource, so
+    they never end up on project repositories or handover packages). The lock is reentrant:
+    a thread already holding it can take it again, it is released when the outermost
+    holder releases it.
+    """
+
+    # lock state by lock file: thread lock, depth and file descriptor
+    _held = {}
+    _held_lock = threading.Lock()
+
+    def __init__(self, path: Path, timeout: float = None):
+        resolved = str(Path(path).resolve())
+        digest = hashlib.sha256(resolved.encode("utf-8")).hexdigest()[:16]
+
+        self.path = Path(path)
+        self.lock_file = LOCK_FOLDER / f"{self.path.name}.{digest}.lock"
+        self.timeout = timeout
+
+    def _get_state(self) -> dict:
+        with self._held_lock:
+            return self._held.setdefault(
+                self.lock_file,
+                dict(lock=threading.RLock(), depth=0, fd=None)
+            )
+
+    def acquire(self):
+        state = self._get_state()
+        if not state["lock"].acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise TimeoutError(f"Timed out waiting for the lock on \"{self.path}\".")
+
+        if state["depth"] > 0:
+            state["depth"] += 1
+            return
+
+        try:
+            os.makedirs(LOCK_FOLDER, exist_ok=True)
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+            start = time.monotonic()
+            waiting = False
+            while not _try_lock(fd):
+                if not waiting:
+                    logger.debug(f"Waiting for another gryphon process to release \"{self.path}\".")
+                    waiting = True
+
+                if self.timeout is not None and time.monotonic() - start > self.timeout:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for the lock on \"{self.path}\".")
+
+                time.sleep(LOCK_POLL_INTERVAL)
+
+        except BaseException:
+            state["lock"].release()
+            raise
+
+        state["fd"] = fd
+        state["depth"] = 1
+
+    def release(self):
+        state = self._get_state()
+        state["depth"] -= 1
+        if state["depth"] == 0:
+            _unlock(state["fd"])
+            os.close(state["fd"])
+            state["fd"] = None
+
+        state["lock"].release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
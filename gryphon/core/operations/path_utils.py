@@ -1,4 +1,10 @@
+import logging
+import os
+from fnmatch import fnmatch
 from pathlib import Path
+from typing import Iterator, Tuple
+
+logger = logging.getLogger('gryphon')
 
 
 class PathUtils:
@@ -21,3 +27,30 @@ class PathUtils:
             return path_obj.resolve()
 
         return path_obj
+
+    @staticmethod
+    def scan_files(folder, excluded=()) -> Iterator[Tuple[Path, os.DirEntry]]:
+        """
+        Walks the folder with os.scandir, yielding the path of each file relative to the
+        folder along with its DirEntry, whose stat() result is cached after the first call.
+
+        Files and folders whose name matches one of the excluded patterns are skipped,
+        folders before being descended into. Symbolic links to folders are not followed.
+        """
+        stack = [(str(folder), Path())]
+        while len(stack):
+            current, relative = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if any(fnmatch(entry.name, pattern) for pattern in excluded):
+                            continue
+
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, relative / entry.name))
+
+                        elif entry.is_file():
+                            yield relative / entry.name, entry
+
+            except OSError as e:
+                logger.debug(f"Could not read the folder {current}: {e}")
@@ -0,0 +1,200 @@
+"""
+File containing the RCHistory class, the append-only journals with the operations, files
+and libraries logged on a Gryphon project, kept next to its .gryphon_rc file.
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List
+
+from .file_lock import FileLock, write_atomically
+from ...constants import GRYPHON_HISTORY, HISTORY_COMPACTION_SIZE, HISTORY_COMPACTION_GROWTH
+
+logger = logging.getLogger('gryphon')
+
+OPERATIONS = "operations"
+FILES = "files"
+LIBRARIES = "libraries"
+HISTORY_KINDS = (OPERATIONS, FILES, LIBRARIES)
+
+# fields each kind of entry can be queried by ("folder" is the first folder of the file path)
+INDEXED_FIELDS = {
+    OPERATIONS: ("template_name", "action"),
+    FILES: ("path", "folder", "template_name", "action"),
+    LIBRARIES: ("name",),
+}
+
+# on compaction, only the latest entry with each value of this field is kept on the journal,
+# the ones it supersedes are moved to the archive journal
+COMPACTION_KEYS = {
+    FILES: "path",
+    LIBRARIES: "name",
+}
+
+
+def get_field(entry: dict, field: str):
+    if field == "folder":
+        parts = Path(entry.get("path", "")).parts
+        return parts[0] if len(parts) > 1 else ""
+
+    return entry.get(field)
+
+
+def matches(entry: dict, filters: dict) -> bool:
+    return all(get_field(entry, field) == value for field, value in filters.items())
+
+
+class RCHistory:
+    """
+    One JSON lines file per kind of entry, only ever appended to (and compacted once it grows,
+    moving the superseded entries to an archive journal, so no history is lost).
+    The size left by each compaction is recorded next to the journal, so a journal holding
+    mostly distinct entries is not compacted again on every append.
+    Reading a journal builds an index by the fields on INDEXED_FIELDS, which is kept until
+    the journal changes on disk.
+    """
+
+    # parsed journals by path: (modification time, size), entries, indexes
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder) / GRYPHON_HISTORY
+
+    @classmethod
+    def from_rc_file(cls, logfile: Path) -> "RCHistory":
+        return cls(Path(logfile).parent)
+
+    def get_journal(self, kind: str) -> Path:
+        assert kind in HISTORY_KINDS
+        return self.folder / f"{kind}.jsonl"
+
+    def get_archive(self, kind: str) -> Path:
+        assert kind in HISTORY_KINDS
+        return self.folder / f"{kind}.archive.jsonl"
+
+    def get_compacted_size(self, kind: str) -> int:
+        """Returns the size of the journal right after its last compaction (0 if never compacted)."""
+        try:
+            return int(self.get_journal(kind).with_suffix(".compacted").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def append(self, kind: str, entries: list):
+        if not len(entries):
+            return
+
+        journal = self.get_journal(kind)
+        with FileLock(self.folder):
+            os.makedirs(self.folder, exist_ok=True)
+
+            # a single write per call, entries from one call are never interleaved with others
+            with open(journal, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry, sort_keys=True) + "\n" for entry in entries))
+
+            if kind in COMPACTION_KEYS:
+                threshold = max(HISTORY_COMPACTION_SIZE, HISTORY_COMPACTION_GROWTH * self.get_compacted_size(kind))
+                if journal.stat().st_size > threshold:
+                    self.compact(kind)
+
+    def _load(self, kind: str):
+        journal = self.get_journal(kind)
+        try:
+            stat = journal.stat()
+        except FileNotFoundError:
+            return [], {field: {} for field in INDEXED_FIELDS[kind]}
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            cached = self._cache.get(journal)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        entries = []
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # a line cut short by a crash while appending
+                    logger.debug(f"Skipping an invalid line on {journal}.")
+
+        indexes = {field: {} for field in INDEXED_FIELDS[kind]}
+        for position, entry in enumerate(entries):
+            for field, index in indexes.items():
+                index.setdefault(get_field(entry, field), []).append(position)
+
+        with self._cache_lock:
+            self._cache[journal] = (signature, entries, indexes)
+
+        return entries, indexes
+
+    def read(self, kind: str, include_archived=False) -> List[dict]:
+        """Returns the entries on the journal, oldest first, after the archived ones if requested."""
+        entries, _ = self._load(kind)
+        if not include_archived:
+            return list(entries)
+
+        archived = []
+        try:
+            with open(self.get_archive(kind), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        archived.append(json.loads(line))
+                    except ValueError:
+                        logger.debug(f"Skipping an invalid line on {self.get_archive(kind)}.")
+        except FileNotFoundError:
+            pass
+
+        return archived + entries
+
+    def query(self, kind: str, **filters) -> List[dict]:
+        """Returns the entries with the given values on the indexed fields, oldest first."""
+        entries, indexes = self._load(kind)
+
+        positions = None
+        for field, value in filters.items():
+            if field not in indexes:
+                raise ValueError(f"The {kind} history can not be queried by \"{field}\".")
+
+            found = set(indexes[field].get(value, ()))
+            positions = found if positions is None else positions & found
+
+        if positions is None:
+            return list(entries)
+
+        return [entries[position] for position in sorted(positions)]
+
+    def compact(self, kind: str = None):
+        """
+        Rewrites the journals keeping only the latest entry for each file and library,
+        the superseded entries are appended to the archive journal first.
+        """
+        for kind in [kind] if kind is not None else HISTORY_KINDS:
+            key = COMPACTION_KEYS.get(kind)
+            journal = self.get_journal(kind)
+            if key is None or not journal.is_file():
+                continue
+
+            with FileLock(self.folder):
+                latest = {}
+                superseded = []
+                for entry in self.read(kind):
+                    if entry.get(key) in latest:
+                        superseded.append(latest.pop(entry.get(key)))
+                    latest[entry.get(key)] = entry
+
+                # archived before the journal is rewritten, a crash in between only duplicates entries
+                if len(superseded):
+                    with open(self.get_archive(kind), "a", encoding="utf-8") as f:
+                        f.write("".join(json.dumps(entry, sort_keys=True) + "\n" for entry in superseded))
+
+                write_atomically(
+                    journal,
+                    "".join(json.dumps(entry, sort_keys=True) + "\n" for entry in latest.values())
+                )
+                write_atomically(journal.with_suffix(".compacted"), str(journal.stat().st_size))
@@ -1,29 +1,184 @@
-import glob
 import json
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+from .file_lock import FileLock, write_atomically
+from .path_utils import PathUtils
+from .rc_history import RCHistory, HISTORY_KINDS, OPERATIONS, FILES, LIBRARIES, matches
 from ...constants import (
-    GENERATE, INIT, DOWNLOAD, GRYPHON_RC, CONDA, VENV, PIPENV, NB_STRIP_OUT, NB_EXTENSIONS, PRE_COMMIT_HOOKS
+    GENERATE, INIT, DOWNLOAD, GRYPHON_RC, CONDA, VENV, PIPENV, NB_STRIP_OUT, NB_EXTENSIONS, PRE_COMMIT_HOOKS,
+    FILE_SCAN_EXCLUDED
 )
 
 logger = logging.getLogger('gryphon')
 
 
+class RCSession:
+    """
+    Contents of a rc file loaded once, changed in memory by every RCManager
+    call made while the session is open. The changes are kept so they can be applied
+    again, on commit, over the rc file as it is by then (it may have been changed by
+    another process meanwhile).
+    """
+
+    def __init__(self, logfile: Path):
+        self.logfile = logfile
+        self.contents = RCManager._load_rc(logfile)
+        self.lock = threading.RLock()
+        self.updates = []
+        self.depth = 0
+        # entries to append to the history journals, by kind
+        self.history = {}
+
+    def commit(self):
+        """Appends the pending entries to the history and writes the pending changes to the rc file."""
+        with self.lock, FileLock(self.logfile):
+            history = RCHistory.from_rc_file(self.logfile)
+            for kind, entries in self.history.items():
+                history.append(kind, entries)
+            self.history = {}
+
+            if len(self.updates):
+                contents = RCManager._load_rc(self.logfile)
+                for update in self.updates:
+                    update(contents)
+
+                RCManager._write_rc(self.logfile, contents)
+                self.contents = contents
+                self.updates = []
+
+
 class RCManager:
 
+    # open sessions by rc file path
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
     # RC FILE
     @staticmethod
-    def _get_key_rc(key, logfile=None):
-        """
-        Add information about each and every file added to the project into the rc file.
-        """
+    def _get_logfile(logfile=None) -> Path:
         if logfile is None:
             logfile = Path.cwd() / GRYPHON_RC
 
-        with open(logfile, "r+", encoding="utf-8") as f:
-            contents = json.load(f)
+        return Path(logfile).resolve()
+
+    @staticmethod
+    def _load_rc(logfile: Path) -> dict:
+        with open(logfile, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_rc(logfile: Path, contents: dict):
+        """Writes the whole rc file at once, so it is never left half written."""
+        write_atomically(logfile, json.dumps(contents, sort_keys=True, indent=4))
+
+    @classmethod
+    def _read_rc(cls, logfile=None) -> dict:
+        logfile = cls._get_logfile(logfile)
+
+        session = cls._sessions.get(logfile)
+        if session is not None:
+            return session.contents
+
+        return cls._load_rc(logfile)
+
+    @classmethod
+    def _update_rc(cls, update, logfile=None):
+        """
+        Applies the update (a function changing the contents in place) to the rc file.
+        Inside a session the update may be applied more than once, it should only depend
+        on the contents it is given.
+        """
+        logfile = cls._get_logfile(logfile)
+
+        session = cls._sessions.get(logfile)
+        if session is not None:
+            with session.lock:
+                update(session.contents)
+                session.updates.append(update)
+            return
+
+        with FileLock(logfile):
+            contents = cls._load_rc(logfile)
+            update(contents)
+            cls._write_rc(logfile, contents)
+
+    @classmethod
+    def _append_history(cls, kind: str, entries: list, logfile=None):
+        logfile = cls._get_logfile(logfile)
+
+        session = cls._sessions.get(logfile)
+        if session is not None:
+            with session.lock:
+                session.history.setdefault(kind, []).extend(entries)
+            return
+
+        RCHistory.from_rc_file(logfile).append(kind, entries)
+
+    @classmethod
+    def _get_history(cls, kind: str, logfile=None, **filters) -> list:
+        """
+        Returns the entries logged on the history with the given values on the indexed fields,
+        oldest first. Entries still on the rc file (from older versions) come first.
+        """
+        logfile = cls._get_logfile(logfile)
+
+        contents = cls._read_rc(logfile)
+        if kind not in contents and not RCHistory.from_rc_file(logfile).folder.is_dir():
+            raise KeyError(f"Could not find the key \"{kind}\" in the contents \"{contents}\" read from the"
+                           f" gryphon_rc file at \"{logfile}\".")
+
+        entries = [entry for entry in contents.get(kind, []) if matches(entry, filters)]
+        entries.extend(RCHistory.from_rc_file(logfile).query(kind, **filters))
+
+        session = cls._sessions.get(logfile)
+        if session is not None:
+            with session.lock:
+                entries.extend(entry for entry in session.history.get(kind, []) if matches(entry, filters))
+
+        return entries
+
+    @classmethod
+    @contextmanager
+    def session(cls, logfile=None):
+        """
+        Loads the rc file once and keeps the changes made through RCManager in memory
+        until the outermost session on the same file ends, then writes them at once.
+        If the session ends with an exception, the changes not committed yet are discarded.
+        """
+        logfile = cls._get_logfile(logfile)
+
+        with cls._sessions_lock:
+            session = cls._sessions.get(logfile)
+            if session is None:
+                session = RCSession(logfile)
+                cls._sessions[logfile] = session
+            session.depth += 1
+
+        succeeded = False
+        try:
+            yield session
+            succeeded = True
+
+        finally:
+            with cls._sessions_lock:
+                session.depth -= 1
+                is_outermost = session.depth == 0
+                if is_outermost:
+                    del cls._sessions[logfile]
+
+            if is_outermost and succeeded:
+                session.commit()
+
+    @classmethod
+    def _get_key_rc(cls, key, logfile=None):
+        """
+        Add information about each and every file added to the project into the rc file.
+        """
+        contents = cls._read_rc(logfile)
 
         try:
             return contents[key]
@@ -32,24 +187,12 @@ class RCManager:
             raise KeyError(f"Could not find the key \"{key}\" in the contents \"{contents}\" read from the"
                            f" gryphon_rc file at \"{logfile}\".")
 
-    @staticmethod
-    def _set_key_rc(key, value, logfile=None):
+    @classmethod
+    def _set_key_rc(cls, key, value, logfile=None):
         """
         Add information about each and every file added to the project into the rc file.
         """
-
-        if logfile is None:
-            logfile = Path.cwd() / GRYPHON_RC
-
-        with open(logfile, "r+", encoding="utf-8") as f:
-            contents = json.load(f)
-
-            new_contents = contents.copy()
-            new_contents[key] = value
-
-            f.seek(0)
-            f.write(json.dumps(new_contents, sort_keys=True, indent=4))
-            f.truncate()
+        cls._update_rc(lambda contents: contents.update({key: value}), logfile)
 
     @staticmethod
     def get_rc_file(folder=Path.cwd(), create=True):
@@ -73,23 +216,25 @@ class RCManager:
     def initialize_log(cls, logfile=None):
         """
         Initialize the log file with require keys 
+        The files, operations and libraries logged by older versions inside the rc file are
+        moved to the history journals.
         """
         if logfile is None:
             raise FileNotFoundError("Could not find .gryphon_rc file inside folder.")
 
-        with open(logfile, "r+", encoding="utf-8") as f:
-            contents = json.load(f)
+        with cls.session(logfile):
+            contents = cls._read_rc(logfile)
+            legacy = {kind: contents[kind] for kind in HISTORY_KINDS if contents.get(kind)}
 
-            new_contents = contents.copy()
-            if "files" not in new_contents:
-                new_contents["files"] = []
+            def _update(contents):
+                for kind in legacy:
+                    contents.pop(kind, None)
 
-            if "operations" not in new_contents:
-                new_contents["operations"] = []
+            cls._update_rc(_update, logfile)
+            for kind, entries in legacy.items():
+                cls._append_history(kind, entries, logfile)
 
-            f.seek(0)
-            f.write(json.dumps(new_contents, sort_keys=True, indent=4))
-            f.truncate()
+            RCHistory.from_rc_file(logfile).folder.mkdir(exist_ok=True)
 
     # SET
     @classmethod
@@ -132,9 +277,10 @@ class RCManager:
         """
         Add information about each and every file added to the project into the rc file.
         """
-        cls._set_key_rc(key=NB_STRIP_OUT, value=install_nb_strip_out, logfile=logfile)
-        cls._set_key_rc(key=NB_EXTENSIONS, value=install_nbextensions, logfile=logfile)
-        cls._set_key_rc(key=PRE_COMMIT_HOOKS, value=install_pre_commit_hooks, logfile=logfile)
+        with cls.session(logfile):
+            cls._set_key_rc(key=NB_STRIP_OUT, value=install_nb_strip_out, logfile=logfile)
+            cls._set_key_rc(key=NB_EXTENSIONS, value=install_nbextensions, logfile=logfile)
+            cls._set_key_rc(key=PRE_COMMIT_HOOKS, value=install_pre_commit_hooks, logfile=logfile)
 
     # GET
     @classmethod
@@ -152,18 +298,30 @@ class RCManager:
         return cls._get_key_rc("environment_manager", logfile)
 
     @classmethod
-    def get_gryphon_files(cls, logfile=None):
+    def get_gryphon_files(cls, logfile=None, folder=None, template_name=None, action=None):
         """
-        Add information about each and every file added to the project into the rc file.
+        Returns the files added to the project by gryphon, optionally only the ones inside the
+        given top level folder, from the given template or added by the given action.
         """
-        return cls._get_key_rc("files", logfile)
+        filters = dict(folder=folder, template_name=template_name, action=action)
+        return cls._get_history(FILES, logfile, **{k: v for k, v in filters.items() if v is not None})
 
     @classmethod
-    def get_gryphon_operations(cls, logfile=None):
+    def get_gryphon_operations(cls, logfile=None, template_name=None, action=None):
         """
-        Add information about each and every file added to the project into the rc file.
+        Returns the operations made on the project, optionally only the ones with the given
+        template or action.
         """
-        return cls._get_key_rc("operations", logfile)
+        filters = dict(template_name=template_name, action=action)
+        return cls._get_history(OPERATIONS, logfile, **{k: v for k, v in filters.items() if v is not None})
+
+    @classmethod
+    def get_gryphon_libraries(cls, logfile=None, name=None):
+        """
+        Returns the libraries added to the project, optionally only the entries of the given one.
+        """
+        filters = dict(name=name) if name is not None else {}
+        return cls._get_history(LIBRARIES, logfile, **filters)
 
     @classmethod
     def get_handover_include_gryphon_generated_files(cls, logfile=None):
@@ -180,8 +338,8 @@ class RCManager:
         return cls._get_key_rc("handover_include_large_files", logfile)
 
     # RC LOGS
-    @staticmethod
-    def log_operation(template, performed_action: str, logfile=None):
+    @classmethod
+    def log_operation(cls, template, performed_action: str, logfile=None):
         """
         Add information about the operations made on the project into the rc file.
         """
@@ -189,93 +347,67 @@ class RCManager:
         if performed_action not in [INIT, GENERATE, DOWNLOAD]:
             logger.warning(f"In log_operation, the performed action was not INIT, GENERATE, or DOWNLOAD.")
 
-        if logfile is None:
-            logfile = Path.cwd() / GRYPHON_RC
-
-        with open(logfile, "r+", encoding="utf-8") as f:
-            contents = json.load(f)
-
-            new_contents = contents.copy()
-            if "operations" not in new_contents:
-                new_contents["operations"] = []
-
-            new_contents["operations"].append(
-                dict(
-                    template_name=template.name,
-                    version=template.version,
-                    action=performed_action,
-                    created_at=str(datetime.now())
-                )
+        cls._append_history(OPERATIONS, [
+            dict(
+                template_name=template.name,
+                version=template.version,
+                action=performed_action,
+                created_at=str(datetime.now())
             )
+        ], logfile)
 
-            f.seek(0)
-            f.write(json.dumps(new_contents, sort_keys=True, indent=4))
-            f.truncate()
-
-    @staticmethod
-    def log_add_library(libraries: list, logfile=None):
+    @classmethod
+    def log_add_library(cls, libraries: list, logfile=None):
         """
         Add information about installed inside the project into the rc file.
         """
-        if logfile is None:
-            logfile = Path.cwd() / GRYPHON_RC
         try:
-            with open(logfile, "r+", encoding="utf-8") as f:
-                contents = json.load(f)
-
-                new_contents = contents.copy()
-                if "libraries" not in new_contents:
-                    new_contents["libraries"] = []
-
-                for lib in libraries:
-                    new_contents["libraries"].append(
-                        dict(
-                            name=lib,
-                            added_at=str(datetime.now())
-                        )
-                    )
-
-                f.seek(0)
-                f.write(json.dumps(new_contents, sort_keys=True, indent=4))
-                f.truncate()
+            if not cls._get_logfile(logfile).is_file():
+                raise FileNotFoundError
+
+            cls._append_history(LIBRARIES, [
+                dict(
+                    name=lib,
+                    added_at=str(datetime.now())
+                )
+                for lib in libraries
+            ], logfile)
         except FileNotFoundError:
             logger.warning(f"The {GRYPHON_RC} file was not found, therefore you are not inside a "
                            "Gryphon project directory.")
 
-    @staticmethod
-    def log_new_files(template, folder: Path, performed_action: str, logfile=None):
+    @classmethod
+    def log_new_files(cls, template, folder: Path, performed_action: str, logfile=None, files=None):
         """
         Add information about each and every file added to the project into the rc file.
+        When the list of files (relative to the folder) is given, the folder is not scanned.
         """
 
         if performed_action not in [INIT, GENERATE, DOWNLOAD]:
             logger.warning(f"The performed_action in log_new_files is not INIT, GENERATE, or DOWNLOAD")
 
-        if logfile is None:
-            logfile = Path.cwd() / GRYPHON_RC
-
-        files_and_folders = glob.glob(str(folder / "**"), recursive=True)
-
-        files = list(filter(lambda x: x.is_file(), map(Path, files_and_folders)))
-
-        with open(logfile, "r+", encoding="utf-8") as f:
-            contents = json.load(f)
-
-            new_contents = contents.copy()
-            if "files" not in new_contents:
-                new_contents["files"] = []
+        if files is None:
+            files = [relative_path for relative_path, _ in PathUtils.scan_files(folder, FILE_SCAN_EXCLUDED)]
 
-            for file in files:
-                new_contents["files"].append(
-                    dict(
-                        path=str(file.relative_to(folder)),
-                        template_name=template.name,
-                        version=template.version,
-                        action=performed_action,
-                        created_at=str(datetime.now())
-                    )
-                )
+        cls._append_history(FILES, [
+            dict(
+                path=str(file),
+                template_name=template.name,
+                version=template.version,
+                action=performed_action,
+                created_at=str(datetime.now())
+            )
+            for file in files
+        ], logfile)
 
-            f.seek(0)
-            f.write(json.dumps(new_contents, sort_keys=True, indent=4))
-            f.truncate()
+    @classmethod
+    def log_templates(cls, templates_and_files: list, performed_action: str, logfile=None):
+        """
+        Same as log_operation, log_new_files and log_add_library for each (template, files)
+        pair, with the files relative to the project folder, writing the history only once.
+        """
+        with cls.session(logfile):
+            for template, files in templates_and_files:
+                cls.log_operation(template, performed_action, logfile)
+                cls.log_new_files(template, None, performed_action, logfile, files=files)
+                cls.log_add_library(template.dependencies, logfile)
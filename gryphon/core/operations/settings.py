@@ -1,11 +1,16 @@
+import copy
 import json
 import logging
 import os
 import shutil
+import threading
+from contextlib import contextmanager
 
+from .file_lock import FileLock, write_atomically
 from ...constants import (
     CONFIG_FILE, DEFAULT_CONFIG_FILE, VENV, USE_LATEST, ALWAYS_ASK,
-    DEFAULT_PYTHON_VERSION
+    DEFAULT_PYTHON_VERSION, TEMPLATE_CACHE_SIZE_LIMIT, HANDOVER_ARCHIVE_FORMAT, HANDOVER_COMPRESSION_LEVEL,
+    HANDOVER_STRIP_NOTEBOOK_OUTPUTS
 )
 
 logger = logging.getLogger('gryphon')
@@ -13,6 +18,14 @@ logger = logging.getLogger('gryphon')
 
 class SettingsManager:
 
+    # contents of the config file as last read, along with its path, modification time and size
+    _cache = None
+    _cache_lock = threading.RLock()
+
+    # changes made inside a batch, written when the outermost batch ends
+    _pending = None
+    _batch_depth = 0
+
     def __init__(self):
         """
         init method empty because the class is
@@ -27,37 +40,119 @@ class SettingsManager:
         """
         return CONFIG_FILE
 
+    @classmethod
+    def lock(cls) -> FileLock:
+        """Lock on the config file, held by read-modify-write cycles spanning more than one key."""
+        return FileLock(cls.get_config_path())
+
+    @staticmethod
+    def _get_signature(path) -> tuple:
+        stat = os.stat(path)
+        return str(path), stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def _load(cls) -> dict:
+        """
+        Returns the contents of the config file, parsed again only when the file changed
+        on disk since it was last read. The returned dict must not be changed.
+        """
+        path = cls.get_config_path()
+        with cls._cache_lock:
+            signature = cls._get_signature(path)
+            if cls._cache is not None and cls._cache[0] == signature:
+                return cls._cache[1]
+
+            with open(path, "r", encoding="utf-8") as f:
+                contents = json.load(f)
+
+            cls._cache = (signature, contents)
+            return contents
+
+    @classmethod
+    def _write_changes(cls, changes: dict):
+        """Writes the changed keys over the config file as it is on disk, under the config lock."""
+        path = cls.get_config_path()
+        with cls.lock(), cls._cache_lock:
+            contents = dict(cls._load())
+            contents.update(changes)
+
+            write_atomically(path, json.dumps(contents, sort_keys=True, indent=4))
+            cls._cache = (cls._get_signature(path), contents)
+
+    @classmethod
+    def get_settings(cls) -> dict:
+        """Returns a copy of the settings, including the changes of the current batch."""
+        with cls._cache_lock:
+            contents = dict(cls._load())
+            if cls._pending is not None:
+                contents.update(cls._pending)
+
+            return copy.deepcopy(contents)
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """
+        Keeps the settings changed inside it in memory until the outermost batch ends,
+        then writes the config file once. If the batch ends with an exception, the
+        changes are discarded.
+        """
+        with cls._cache_lock:
+            if cls._batch_depth == 0:
+                cls._pending = {}
+            cls._batch_depth += 1
+
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+
+        finally:
+            pending = None
+            with cls._cache_lock:
+                cls._batch_depth -= 1
+                if cls._batch_depth == 0:
+                    pending = cls._pending
+                    cls._pending = None
+
+            if succeeded and pending:
+                cls._write_changes(pending)
+
     @classmethod
     def _set_key(cls, key, value):
         """Restore only the registries to the default."""
-        with open(cls.get_config_path(), "r+", encoding="utf-8") as f:
-            contents = json.load(f)
-            contents[key] = value
+        with cls._cache_lock:
+            if cls._pending is not None:
+                cls._pending[key] = copy.deepcopy(value)
+                return
 
-            f.seek(0)
-            f.write(json.dumps(contents, sort_keys=True, indent=4))
-            f.truncate()
+        cls._write_changes({key: value})
 
     @classmethod
     def _get_key(cls, key, default=None):
-        with open(cls.get_config_path(), "r", encoding="utf-8") as f:
-            contents = json.load(f)
-
-        try:
-            return contents[key]
-        except KeyError:
-            if default is None:
-                raise KeyError(f"Could not find the given key (\"{key}\") in the current config file.")
-            else:
-                return default
+        with cls._cache_lock:
+            contents = cls._load()
+            if cls._pending is not None and key in cls._pending:
+                contents = cls._pending
+
+            try:
+                # callers change the lists and dicts they get before setting them back
+                return copy.deepcopy(contents[key])
+            except KeyError:
+                if default is None:
+                    raise KeyError(f"Could not find the given key (\"{key}\") in the current config file.")
+                else:
+                    return default
 
     @classmethod
     def restore_default_config_file(cls):
-        os.remove(cls.get_config_path())
-        shutil.copy(
-            src=DEFAULT_CONFIG_FILE,
-            dst=cls.get_config_path()
-        )
+        with cls.lock(), cls._cache_lock:
+            cls._cache = None
+            os.remove(cls.get_config_path())
+            shutil.copy(
+                src=DEFAULT_CONFIG_FILE,
+                dst=cls.get_config_path()
+            )
 
     @classmethod
     def change_environment_manager(cls, environment_manager):
@@ -71,6 +166,22 @@ class SettingsManager:
     def change_pre_commit_file_size_limit(cls, limit: float):
         cls._set_key("pre_commit_file_size_limit", limit)
 
+    @classmethod
+    def change_template_cache_size_limit(cls, limit: float):
+        cls._set_key("template_cache_size_limit", limit)
+
+    @classmethod
+    def change_handover_archive_format(cls, archive_format: str):
+        cls._set_key("handover_archive_format", archive_format)
+
+    @classmethod
+    def change_handover_compression_level(cls, level: int):
+        cls._set_key("handover_compression_level", level)
+
+    @classmethod
+    def change_handover_strip_notebook_outputs(cls, state: bool):
+        cls._set_key("handover_strip_notebook_outputs", state)
+
     @classmethod
     def change_handover_include_gryphon_generated_files(cls, state: bool):
         cls._set_key("handover_include_gryphon_generated_files", state)
@@ -86,32 +197,35 @@ class SettingsManager:
 
     @classmethod
     def add_git_template_registry(cls, registry_repo, registry_name):
-        git_registry = cls._get_key("git_registry")
-        git_registry[registry_name] = registry_repo
-        cls._set_key("git_registry", git_registry)
+        with cls.lock():
+            git_registry = cls._get_key("git_registry")
+            git_registry[registry_name] = registry_repo
+            cls._set_key("git_registry", git_registry)
 
     @classmethod
     def add_local_template_registry(cls, registry_path, registry_name):
-        local_registry = cls._get_key("local_registry")
-        local_registry[registry_name] = registry_path
-        cls._set_key("local_registry", local_registry)
+        with cls.lock():
+            local_registry = cls._get_key("local_registry")
+            local_registry[registry_name] = registry_path
+            cls._set_key("local_registry", local_registry)
 
     @classmethod
     def remove_template_registry(cls, registry_name):
         """Removes a given registry from the config file"""
-        git_registry = cls._get_key("git_registry")
-        local_registry = cls._get_key("local_registry")
+        with cls.lock():
+            git_registry = cls._get_key("git_registry")
+            local_registry = cls._get_key("local_registry")
 
-        if registry_name in git_registry:
-            git_registry.pop(registry_name)
-            cls._set_key("git_registry", git_registry)
+            if registry_name in git_registry:
+                git_registry.pop(registry_name)
+                cls._set_key("git_registry", git_registry)
 
-        elif registry_name in local_registry:
-            local_registry.pop(registry_name)
-            cls._set_key("local_registry", local_registry)
+            elif registry_name in local_registry:
+                local_registry.pop(registry_name)
+                cls._set_key("local_registry", local_registry)
 
-        else:
-            raise RuntimeError("Registry name was not found on config file.")
+            else:
+                raise RuntimeError("Registry name was not found on config file.")
 
     @classmethod
     def restore_registries(cls):
@@ -119,15 +233,17 @@ class SettingsManager:
         with open(DEFAULT_CONFIG_FILE, "r", encoding="utf-8") as f:
             default_settings = json.load(f)
 
-        cls._set_key("git_registry", default_settings.get("git_registry", {}))
-        cls._set_key("local_registry", default_settings.get("local_registry", {}))
+        with cls.batch():
+            cls._set_key("git_registry", default_settings.get("git_registry", {}))
+            cls._set_key("local_registry", default_settings.get("local_registry", {}))
 
     @classmethod
     def add_local_template(cls, template_path):
         """Restore only the registries to the default."""
-        local_templates = cls._get_key("local_templates")
-        local_templates.append(template_path)
-        cls._set_key("local_templates", local_templates)
+        with cls.lock():
+            local_templates = cls._get_key("local_templates")
+            local_templates.append(template_path)
+            cls._set_key("local_templates", local_templates)
 
     @classmethod
     def list_template_registries(cls):
@@ -152,6 +268,14 @@ class SettingsManager:
     def get_environment_manager(cls):
         return cls._get_key("environment_management")
 
+    @classmethod
+    def get_ssh_domains(cls) -> dict:
+        return cls._get_key("ssh_domains", {})
+
+    @classmethod
+    def get_pipenv_in_project(cls) -> bool:
+        return cls._get_key("pipenv_in_project", False)
+
     @classmethod
     def get_handover_file_size_limit(cls):
         return cls._get_key("handover_file_size_limit")
@@ -160,6 +284,22 @@ class SettingsManager:
     def get_pre_commit_file_size_limit(cls):
         return cls._get_key("pre_commit_file_size_limit")
 
+    @classmethod
+    def get_template_cache_size_limit(cls):
+        return cls._get_key("template_cache_size_limit", TEMPLATE_CACHE_SIZE_LIMIT)
+
+    @classmethod
+    def get_handover_archive_format(cls) -> str:
+        return cls._get_key("handover_archive_format", HANDOVER_ARCHIVE_FORMAT)
+
+    @classmethod
+    def get_handover_compression_level(cls) -> int:
+        return cls._get_key("handover_compression_level", HANDOVER_COMPRESSION_LEVEL)
+
+    @classmethod
+    def get_handover_strip_notebook_outputs(cls) -> bool:
+        return cls._get_key("handover_strip_notebook_outputs", HANDOVER_STRIP_NOTEBOOK_OUTPUTS)
+
     @classmethod
     def get_handover_include_large_files(cls) -> bool:
         return cls._get_key("handover_include_large_files")
@@ -170,20 +310,21 @@ class SettingsManager:
 
     @classmethod
     def test_template_cleanup(cls):
-        local_templates = cls._get_key("local_templates", [])
+        with cls.lock():
+            local_templates = cls._get_key("local_templates", [])
 
-        pattern = "/sandbox/test_template"
+            pattern = "/sandbox/test_template"
 
-        exclusion_list = []
-        if local_templates:
-            for index, template_path in enumerate(local_templates):
-                if pattern in template_path:
-                    exclusion_list.append(index)
+            exclusion_list = []
+            if local_templates:
+                for index, template_path in enumerate(local_templates):
+                    if pattern in template_path:
+                        exclusion_list.append(index)
 
-        for n in exclusion_list[::-1]:
-            local_templates.pop(n)
+            for n in exclusion_list[::-1]:
+                local_templates.pop(n)
 
-        cls._set_key("local_templates", local_templates)
+            cls._set_key("local_templates", local_templates)
 
     # CONFIG FILE
     @classmethod
@@ -220,12 +361,13 @@ class SettingsManager:
         """
         Recovers the registered local templates from the config file.
         """
-        templates = cls._get_key("local_templates", [])
+        with cls.lock():
+            templates = cls._get_key("local_templates", [])
 
-        if template_path not in templates:
-            raise RuntimeError(f"Local template \"{template_path}\" was not found in the config file."
-                               f"It might be deleted already.")
+            if template_path not in templates:
+                raise RuntimeError(f"Local template \"{template_path}\" was not found in the config file."
+                                   f"It might be deleted already.")
 
-        templates.remove(template_path)
+            templates.remove(template_path)
 
-        cls._set_key("local_templates", templates)
+            cls._set_key("local_templates", templates)
@@ -0,0 +1,250 @@
+"""
+File containing the TemplateCache class, used to keep a local copy of the downloaded
+templates so the same template version is not downloaded more than once.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .file_lock import FileLock
+from .settings import SettingsManager
+from ...constants import TEMPLATE_CACHE_FOLDER, TEMPLATE_CACHE_SIZE_LIMIT
+
+logger = logging.getLogger('gryphon')
+
+ENTRY_FILE = "entry.json"
+FILES_FOLDER = "files"
+
+
+class TemplateCache:
+    """
+    Cache of downloaded template artifacts, stored under the gryphon home folder.
+    Each entry is keyed by (index, template name, version) and holds the files exactly as
+    they were downloaded, along with a hash of their contents and the size and modification
+    time of each file. Hits are checked against the sizes and times, which detects damaged
+    entries without reading the files again.
+    The least recently used entries are evicted once the cache exceeds the size limit.
+    Entries are restored, replaced and evicted holding a FileLock on them, as worker threads
+    and other gryphon processes share the same cache.
+    """
+
+    def __init__(self):
+        """
+        init method empty because the class is
+        only meant to create a namespace for its methods
+        """
+
+    @staticmethod
+    def get_cache_path() -> Path:
+        """
+        Method that returns the cache folder path
+        It makes it easier too change later and also easier to mock in tests
+        """
+        return TEMPLATE_CACHE_FOLDER
+
+    @staticmethod
+    def get_key(index: str, name: str, version: str) -> str:
+        return hashlib.sha256(json.dumps([index, name, version]).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_template_key(cls, template, index: str) -> Optional[str]:
+        """
+        Returns the cache key of the template, None if it can not be cached. Templates
+        without a version point to the tip of a branch, which may change at any time.
+        """
+        version = getattr(template, "version", "")
+        if not version or not index:
+            return None
+
+        return cls.get_key(str(index), template.name, version)
+
+    @staticmethod
+    def get_file_stats(folder: Path) -> dict:
+        """Maps the relative path of every file inside the folder to its size and modification time."""
+        stats = {}
+        for root, _, files in os.walk(folder):
+            for file in files:
+                file_path = Path(root) / file
+                file_stat = file_path.stat()
+                stats[file_path.relative_to(folder).as_posix()] = [file_stat.st_size, file_stat.st_mtime_ns]
+
+        return stats
+
+    @staticmethod
+    def get_folder_size(folder: Path) -> int:
+        return sum(
+            os.path.getsize(os.path.join(root, file))
+            for root, _, files in os.walk(folder)
+            for file in files
+        )
+
+    @staticmethod
+    def get_size_limit() -> int:
+        """Returns the cache size limit in bytes, set in MB on the config file."""
+        try:
+            limit = SettingsManager.get_template_cache_size_limit()
+        except (OSError, ValueError):
+            limit = TEMPLATE_CACHE_SIZE_LIMIT
+
+        return int(limit * 1024 ** 2)
+
+    @classmethod
+    def _read_entry(cls, entry_path: Path) -> Optional[dict]:
+        try:
+            with open(entry_path / ENTRY_FILE, "r", encoding="UTF-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def restore(cls, template, index: str, destination: Path) -> bool:
+        """
+        Copies the cached files of the template, downloaded from the given index (or
+        repository), into the destination folder.
+        Returns False when the template is not on the cache, the entry is corrupted or it
+        can not be copied (the files copied so far are removed).
+        """
+        key = cls.get_template_key(template, index)
+        if key is None or cls.get_size_limit() <= 0:
+            return False
+
+        entry_path = cls.get_cache_path() / key
+        with FileLock(entry_path):
+            entry = cls._read_entry(entry_path)
+            if entry is None:
+                return False
+
+            file_stats = cls.get_file_stats(entry_path / FILES_FOLDER)
+
+            if file_stats != entry.get("files"):
+                logger.debug(f"Cached copy of {template.name} {template.version} is corrupted, discarding it.")
+                shutil.rmtree(entry_path, ignore_errors=True)
+                return False
+
+            copied = []
+            try:
+                for relative_path in file_stats:
+                    target = destination / relative_path
+                    os.makedirs(target.parent, exist_ok=True)
+                    shutil.copy2(entry_path / FILES_FOLDER / relative_path, target)
+                    copied.append(target)
+
+            except OSError as e:
+                # the template is downloaded instead, without the files copied so far
+                logger.debug(f"Failed to restore {template.name} {template.version} from the template cache: {e}")
+                for target in copied:
+                    try:
+                        os.remove(target)
+                    except OSError:
+                        pass
+                return False
+
+            # the modification time of the entry file tracks when it was last used
+            os.utime(entry_path / ENTRY_FILE)
+
+        logger.debug(f"Using the cached copy of {template.name} {template.version}.")
+        return True
+
+    @classmethod
+    def store(cls, template, index: str, source: Path):
+        """
+        Copies the files of the template, downloaded from the given index (or repository),
+        to the cache and evicts the least recently used entries if needed.
+        Failing to write to the cache is not an error.
+        """
+        key = cls.get_template_key(template, index)
+        size_limit = cls.get_size_limit()
+        if key is None or size_limit <= 0:
+            return
+
+        cache_path = cls.get_cache_path()
+        entry_path = cache_path / key
+        temp_path = cache_path / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            shutil.copytree(src=source, dst=temp_path / FILES_FOLDER)
+
+            entry = dict(
+                index=str(index),
+                name=template.name,
+                version=template.version,
+                size=cls.get_folder_size(temp_path / FILES_FOLDER),
+                files=cls.get_file_stats(temp_path / FILES_FOLDER)
+            )
+            with open(temp_path / ENTRY_FILE, "w", encoding="UTF-8") as f:
+                json.dump(entry, f, indent=4)
+
+            # another process may have stored the same entry meanwhile
+            with FileLock(entry_path):
+                shutil.rmtree(entry_path, ignore_errors=True)
+                os.replace(temp_path, entry_path)
+
+        except OSError as e:
+            logger.debug(f"Failed to store {template.name} {template.version} on the template cache: {e}")
+            shutil.rmtree(temp_path, ignore_errors=True)
+            return
+
+        cls.evict(size_limit)
+
+    @classmethod
+    def list_entries(cls) -> list:
+        """Returns the cache entries, least recently used first."""
+        cache_path = cls.get_cache_path()
+        if not cache_path.is_dir():
+            return []
+
+        entries = []
+        for entry_path in cache_path.iterdir():
+            if entry_path.suffix == ".tmp":
+                continue
+
+            entry = cls._read_entry(entry_path)
+            if entry is None:
+                continue
+
+            entry["path"] = entry_path
+            entry["last_used"] = os.path.getmtime(entry_path / ENTRY_FILE)
+            entries.append(entry)
+
+        entries.sort(key=lambda e: e["last_used"])
+        return entries
+
+    @classmethod
+    def get_size(cls) -> int:
+        """Returns the size in bytes taken by the cached templates."""
+        return sum(entry["size"] for entry in cls.list_entries())
+
+    @classmethod
+    def evict(cls, size_limit: int = None):
+        """Removes the least recently used entries until the cache fits into the size limit."""
+        if size_limit is None:
+            size_limit = cls.get_size_limit()
+
+        entries = cls.list_entries()
+        total_size = sum(entry["size"] for entry in entries)
+
+        for entry in entries:
+            if total_size <= size_limit:
+                break
+
+            logger.debug(f"Evicting {entry['name']} {entry['version']} from the template cache.")
+            with FileLock(entry["path"]):
+                shutil.rmtree(entry["path"], ignore_errors=True)
+            total_size -= entry["size"]
+
+    @classmethod
+    def purge(cls) -> int:
+        """Removes every cached template. Returns the amount of bytes freed."""
+        cache_path = cls.get_cache_path()
+        if not cache_path.is_dir():
+            return 0
+
+        freed = cls.get_folder_size(cache_path)
+        shutil.rmtree(cache_path, ignore_errors=True)
+        return freed
@@ -3,3 +3,5 @@ from .git_registry import *
 from .local_registry import *
 from .registry_collection import *
 from .remote_index import RemoteIndex, RemoteIndexCollection
+from .facet_index import FacetIndex
+from .search_index import SearchIndex
@@ -0,0 +1,35 @@
+"""
+File containing the FacetIndex class, used to browse the templates by
+methodology, topic and sector without scanning every template.
+"""
+from typing import Dict, List
+
+from .template import Template
+
+METHODOLOGY_FACET = "methodology"
+TOPIC_FACET = "topic"
+SECTOR_FACET = "sector"
+FACETS = (METHODOLOGY_FACET, TOPIC_FACET, SECTOR_FACET)
+
+
+class FacetIndex:
+    """Maps each methodology, topic and sector value to the names of the templates tagged with it."""
+
+    def __init__(self, templates: Dict[str, Template]):
+        self.index = {facet: {} for facet in FACETS}
+
+        # names are kept in the same order as the templates were given
+        for name, template in templates.items():
+            for facet in FACETS:
+                for value in getattr(template, facet):
+                    names = self.index[facet].setdefault(value, [])
+                    if not len(names) or names[-1] != name:
+                        names.append(name)
+
+    def get_template_names(self, facet: str, value: str) -> List[str]:
+        """Returns the names of the templates tagged with the value on the given facet."""
+        return self.index[facet].get(value, [])
+
+    def count(self, facet: str, value: str) -> int:
+        """Returns how many templates are tagged with the value on the given facet."""
+        return len(self.get_template_names(facet, value))
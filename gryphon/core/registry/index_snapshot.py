@@ -0,0 +1,59 @@
+"""
+File containing the IndexSnapshot class, used to persist the parsed metadata
+of a remote index so it doesn't need to be read file by file on every launch.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .template import Template
+from ...logger import logger
+
+# Bump when the layout of the snapshot file itself changes.
+SNAPSHOT_VERSION = 1
+
+
+class IndexSnapshot:
+    """Single file holding the metadata of every template of an index, keyed by the index commit."""
+
+    def __init__(self, snapshot_path: Path):
+        self.snapshot_path = snapshot_path
+
+    @staticmethod
+    def get_schema():
+        return f"{SNAPSHOT_VERSION}.{Template.schema_version}"
+
+    def load(self, commit: str) -> Optional[Dict[str, Dict[str, List[dict]]]]:
+        """
+        Returns the stored metadata, grouped by command and already in display order.
+        None is returned when the snapshot is missing, unreadable, was generated from
+        another commit or with an older Template schema.
+        """
+        try:
+            # a single read, json parses the bytes without any further copy
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = json.loads(f.read())
+
+        except (OSError, ValueError):
+            return None
+
+        if snapshot.get("schema") != self.get_schema() or snapshot.get("commit") != commit:
+            return None
+
+        return snapshot.get("templates")
+
+    def save(self, commit: str, templates: Dict[str, Dict[str, List[dict]]]):
+        """Writes the snapshot to a temporary file and then moves it into place."""
+        temp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.tmp")
+
+        try:
+            with open(temp_path, "w", encoding="UTF-8") as f:
+                json.dump(
+                    dict(schema=self.get_schema(), commit=commit, templates=templates),
+                    f, separators=(",", ":")
+                )
+            os.replace(temp_path, self.snapshot_path)
+
+        except OSError as e:
+            logger.debug(f"Failed to write index snapshot at {self.snapshot_path}: {e}")
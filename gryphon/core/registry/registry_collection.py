@@ -1,6 +1,8 @@
 import logging
 from pathlib import Path
 from typing import List
+from .facet_index import FacetIndex
+from .search_index import SearchIndex
 from .template_registry import TemplateRegistry
 from .local_registry import LocalRegistry
 from .remote_index import RemoteIndexCollection
@@ -31,6 +33,7 @@ class RegistryCollection:
                     full_metadata[command][template] = metadata[command][template]
 
         self.template_data = full_metadata
+        self.indexes = {}
 
     def get_templates(self, command=None):
         """Returns the template metadata."""
@@ -39,6 +42,26 @@ class RegistryCollection:
 
         return self.template_data.get(command, [])
 
+    def _get_index(self, index_class, commands):
+        """Builds an index over the templates of the given commands once per registry load."""
+        key = (index_class, commands)
+        if key not in self.indexes:
+            templates = {}
+            for command in commands:
+                templates.update(self.get_templates(command))
+
+            self.indexes[key] = index_class(templates)
+
+        return self.indexes[key]
+
+    def get_facet_index(self, *commands) -> FacetIndex:
+        """Returns the facet index over the templates of the given commands."""
+        return self._get_index(FacetIndex, commands)
+
+    def get_search_index(self, *commands) -> SearchIndex:
+        """Returns the keyword search index over the templates of the given commands."""
+        return self._get_index(SearchIndex, commands)
+
     @classmethod
     def from_config_file(cls, settings, data_path: Path):
 
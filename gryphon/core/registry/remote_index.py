@@ -1,66 +1,191 @@
 import glob
 import json
 import os
+import threading
+import time
+from concurrent.futures import Future, wait
 from pathlib import Path
 from typing import List, Dict
 
 import git
 from git import Repo
 
+from .index_snapshot import IndexSnapshot
 from .template import Template
 from .versioned_template import VersionedTemplate
 from ..operations.bash_utils import BashUtils
-from ...constants import GRYPHON_HOME, GENERATE, INIT, DOWNLOAD, REMOTE_INDEX
+from ..operations.file_lock import FileLock
+from ...constants import (
+    GRYPHON_HOME, GENERATE, INIT, DOWNLOAD, REMOTE_INDEX, INDEX_FETCH_WORKERS, INDEX_FETCH_TIMEOUT,
+    REGISTRY_THREAD_NAME
+)
 
 from ...logger import logger
 
 
 class RemoteIndex:
-    def __init__(self, index_url: str, index_repo: str, index_name: str):
+    def __init__(self, index_url: str, index_repo: str, index_name: str, deadline: float = None):
+        """
+        Gets the index and loads its templates. Other gryphon processes may be refreshing the
+        same local copy: its lock is waited for until the deadline (a time.monotonic() value,
+        INDEX_FETCH_TIMEOUT seconds from now by default), then TimeoutError is raised.
+        """
         self.index_url = index_url
         self.index_repo = index_repo
         self.index_local_path = GRYPHON_HOME / "index" / index_name
 
-        if not self.index_local_path.is_dir():
-            os.makedirs(self.index_local_path)
-        else:
-            BashUtils.remove_folder(self.index_local_path)
+        if deadline is None:
+            deadline = time.monotonic() + INDEX_FETCH_TIMEOUT
+
+        with FileLock(self.index_local_path, timeout=max(deadline - time.monotonic(), 0)):
+            try:
+                self.repo = self.sync_index()
+            except git.exc.GitCommandError:
+                logger.warning(f"Failed to get index: {self.index_url}\nNo template from this index will be available.")
+                logger.debug(f"Failed to get index: {self.index_url}")
+                self.templates = {}
+
+                return
+
+            self.templates = self.load_templates()
+
+    def sync_index(self) -> Repo:
+        """
+        Brings the local copy of the index up to date with the remote one.
+
+        The existing clone is reused and only fast-forwarded to the remote head,
+        a fresh clone is only made when there is no usable local copy or when the
+        copy was cloned from another url.
+        """
+        self.recover_previous_copy()
+
+        try:
+            repo = Repo(self.index_local_path)
+            if repo.bare or not repo.head.is_valid():
+                raise git.exc.InvalidGitRepositoryError(self.index_local_path)
+
+            remote_url = repo.remote().url
+
+        except (git.exc.InvalidGitRepositoryError, git.exc.NoSuchPathError, ValueError):
+            return self.clone_index()
+
+        if remote_url != self.index_repo:
+            logger.debug(f"Local copy of index \"{self.index_url}\" was cloned from {remote_url}. Cloning it again.")
+            return self.clone_index()
+
+        try:
+            repo.remote().fetch()
+        except (git.exc.GitCommandError, ValueError):
+            logger.warning(f"Failed to update index: {self.index_url}\nUsing the local copy of the index.")
+            return repo
 
         try:
-            self.repo = Repo.clone_from(self.index_repo, self.index_local_path)
-        except git.exc.GitCommandError:
-            logger.warning(f"Failed to get index: {self.index_url}\nNo template from this index will be available.")
-            logger.debug(f"Failed to get index: {self.index_url}")
-            self.templates = {}
+            self.fast_forward(repo)
+        except (git.exc.GitCommandError, IndexError, ValueError, TypeError):
+            logger.debug(f"Local copy of index \"{self.index_url}\" is corrupted. Cloning it again.")
+            return self.clone_index()
+
+        return repo
+
+    @staticmethod
+    def fast_forward(repo: Repo):
+        """Fast-forwards the checked out branch to its remote counterpart, if anything changed."""
+        branch = repo.active_branch
+        remote_commit = repo.remote().refs[branch.name].commit
+
+        if repo.head.commit == remote_commit:
+            return
+
+        repo.git.merge("--ff-only", remote_commit.hexsha)
 
+    def recover_previous_copy(self):
+        """
+        Puts back the previous local copy moved aside by a clone_index that stopped (i.e. the
+        process was killed) between moving it and moving the new clone in its place.
+        Called holding the index lock, so no other clone of the index is in progress.
+        """
+        if self.index_local_path.exists():
             return
 
-        self.templates = self.generate_templates()
-
-    # def read_index_metadata(self) -> Dict[str, List]:
-    #     metadata_files = glob.glob(str(self.index_local_path / "**" / "metadata.json"), recursive=True)
-    #     metadata_contents = {
-    #         GENERATE: [],
-    #         INIT: []
-    #     }
-    #     for file in metadata_files:
-    #         with open(file, "r", encoding="UTF-8") as f:
-    #             contents = json.load(f)
-    #             if type(contents) != list:
-    #                 continue
-    #
-    #             versions = list(map(lambda x: x["version"], contents))
-    #
-    #             latest_version = sort_versions(versions)[-1]
-    #             latest = list(filter(lambda x: x["version"] == latest_version, contents))[0]
-    #
-    #             latest["path"] = Path(file).parent
-    #
-    #             command = latest["command"]
-    #             assert command in [GENERATE, INIT]
-    #             metadata_contents[command].append(contents)
-    #
-    #     return metadata_contents
+        previous_copies = sorted(
+            self.index_local_path.parent.glob(f"{glob.escape(self.index_local_path.name)}.*.old"),
+            key=os.path.getmtime
+        )
+        if not len(previous_copies):
+            return
+
+        logger.debug(f"Recovering the previous local copy of index \"{self.index_url}\".")
+        os.replace(previous_copies[-1], self.index_local_path)
+        for previous_copy in previous_copies[:-1]:
+            BashUtils.remove_folder(previous_copy)
+
+    def clone_index(self) -> Repo:
+        """
+        Clones the index from scratch into a temporary folder, which then replaces any
+        previous local copy. If the clone fails, the previous copy is left as it was.
+        The previous copy is moved aside before the new one takes its place: if gryphon
+        stops in between, recover_previous_copy puts it back on the next launch.
+        """
+        suffix = f"{os.getpid()}.{threading.get_ident()}"
+        temp_path = self.index_local_path.with_name(f"{self.index_local_path.name}.{suffix}.tmp")
+        old_path = self.index_local_path.with_name(f"{self.index_local_path.name}.{suffix}.old")
+
+        os.makedirs(self.index_local_path.parent, exist_ok=True)
+        if temp_path.is_dir():
+            BashUtils.remove_folder(temp_path)
+
+        try:
+            Repo.clone_from(self.index_repo, temp_path).close()
+        except BaseException:
+            if temp_path.is_dir():
+                BashUtils.remove_folder(temp_path)
+            raise
+
+        if self.index_local_path.exists():
+            os.replace(self.index_local_path, old_path)
+        os.replace(temp_path, self.index_local_path)
+
+        if old_path.is_dir():
+            BashUtils.remove_folder(old_path)
+
+        return Repo(self.index_local_path)
+
+    def load_templates(self) -> Dict[str, Dict[str, Template]]:
+        """
+        Loads the templates from the index snapshot when it matches the current index commit,
+        otherwise the metadata files are read and a new snapshot is stored.
+        """
+        snapshot = IndexSnapshot(self.index_local_path.with_name(f"{self.index_local_path.name}.snapshot.json"))
+        commit = self.repo.head.commit.hexsha
+
+        metadata = snapshot.load(commit)
+        if metadata is not None:
+            return self.templates_from_metadata(metadata)
+
+        templates = self.generate_templates()
+        snapshot.save(commit, {
+            command: {
+                name: template.metadata
+                for name, template in command_templates.items()
+            }
+            for command, command_templates in templates.items()
+        })
+        return templates
+
+    def templates_from_metadata(self, metadata: Dict[str, Dict[str, List[dict]]]) -> Dict[str, Dict[str, Template]]:
+        """Builds the templates from the metadata stored on the snapshot, which is already sorted."""
+        return {
+            command: {
+                name: VersionedTemplate(
+                    versions,
+                    template_name=name,
+                    template_path=self.index_url,
+                    registry_type=REMOTE_INDEX
+                )
+                for name, versions in command_metadata.items()
+            }
+            for command, command_metadata in metadata.items()
+        }
 
     def generate_templates(self) -> Dict[str, Dict[str, Template]]:
         metadata_files = glob.glob(
@@ -134,12 +259,70 @@ class RemoteIndexCollection:
         self.templates = self.unify_templates()
 
     def create_indexes(self) -> List[RemoteIndex]:
-        return [
-            RemoteIndex(index_url=links["url"], index_repo=links["repo"], index_name=links["name"])
-            for links in self.index_list
-        ]
+        """
+        Fetches and parses the indexes concurrently. The indexes not ready INDEX_FETCH_TIMEOUT
+        seconds after the fetch started are left out, the others keep the configured order.
+        """
+        if not len(self.index_list):
+            return []
+
+        # a single deadline for every index, however many of them are slow
+        deadline = time.monotonic() + INDEX_FETCH_TIMEOUT
+        futures = self.fetch_in_background(deadline)
+        _, pending = wait(futures, timeout=INDEX_FETCH_TIMEOUT)
+
+        indexes = []
+        for links, future in zip(self.index_list, futures):
+            # still running, or gave up waiting for another process on the same deadline
+            if future in pending or isinstance(future.exception(), TimeoutError):
+                future.cancel()
+                logger.warning(f"Timed out getting index: {links['url']}\n"
+                               f"No template from this index will be available.")
+            else:
+                indexes.append(future.result())
+
+        return indexes
+
+    def fetch_in_background(self, deadline: float) -> List[Future]:
+        """
+        Starts fetching the indexes on up to INDEX_FETCH_WORKERS daemon threads, one future per index.
+        Daemon threads are not joined at exit, so a hung git command never keeps gryphon from quitting.
+        The indexes wait for their locks up to the deadline of the whole collection.
+        """
+        futures = [Future() for _ in self.index_list]
+        jobs = iter(list(zip(self.index_list, futures)))
+        jobs_lock = threading.Lock()
+
+        def _fetch():
+            while True:
+                with jobs_lock:
+                    job = next(jobs, None)
+
+                if job is None:
+                    return
+
+                links, future = job
+                # indexes cancelled on the deadline are never started
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    future.set_result(
+                        RemoteIndex(
+                            index_url=links["url"], index_repo=links["repo"], index_name=links["name"],
+                            deadline=deadline
+                        )
+                    )
+                except BaseException as e:
+                    future.set_exception(e)
+
+        for i in range(min(INDEX_FETCH_WORKERS, len(self.index_list))):
+            threading.Thread(target=_fetch, name=f"{REGISTRY_THREAD_NAME}-index-{i}", daemon=True).start()
+
+        return futures
 
     def unify_templates(self) -> Dict[str, Dict[str, Template]]:
+        """Merges the templates of every index, later indexes on the configuration take precedence."""
         templates = {
             GENERATE: {},
             INIT: {},
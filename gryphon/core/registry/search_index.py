@@ -0,0 +1,178 @@
+"""
+File containing the SearchIndex class, used to rank templates against the
+keywords typed by the user on the generate menu.
+"""
+import re
+from bisect import bisect_left
+from typing import Dict, List
+
+from .template import Template
+
+# relative importance of each template field on the ranking
+FIELD_WEIGHTS = {
+    "keywords": 3.0,
+    "display_name": 2.5,
+    "methodology": 1.5,
+    "topic": 1.5,
+    "sector": 1.5,
+    "description": 1.0,
+}
+
+# how much a term is worth depending on how it matched the typed word
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+SUBSTRING_MATCH = 0.6
+FUZZY_MATCH = 0.5
+
+MIN_PREFIX_LENGTH = 2
+MIN_SUBSTRING_LENGTH = 3
+MIN_FUZZY_LENGTH = 4
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_trigrams(term: str, padded=True) -> set:
+    if padded:
+        term = f" {term} "
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Levenshtein distance between two terms, giving up as soon as it exceeds the limit."""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, start=1):
+        current = [i]
+        for j, second_char in enumerate(second, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (first_char != second_char)
+            ))
+
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return previous[-1]
+
+
+class SearchIndex:
+    """
+    Inverted index over the keywords, display names, descriptions and facets of the templates.
+    Words typed by the user match indexed terms exactly, by prefix, anywhere inside them or with small typos.
+    """
+
+    def __init__(self, templates: Dict[str, Template]):
+        self.postings = {}
+
+        for name, template in templates.items():
+            for field, weight in FIELD_WEIGHTS.items():
+                # metadata fields may be null
+                values = getattr(template, field) or []
+                if isinstance(values, str):
+                    values = [values]
+
+                for term in set(tokenize(" ".join(value for value in values if isinstance(value, str)))):
+                    term_postings = self.postings.setdefault(term, {})
+                    term_postings[name] = max(term_postings.get(name, 0), weight)
+
+        # sorted terms answer prefix queries, trigrams find the candidates for typos
+        self.terms = sorted(self.postings)
+        self.trigrams = {}
+        for term in self.terms:
+            for trigram in get_trigrams(term):
+                self.trigrams.setdefault(trigram, set()).add(term)
+
+    def get_prefix_terms(self, prefix: str) -> List[str]:
+        """Returns the indexed terms starting with the given prefix, in alphabetical order."""
+        terms = []
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and self.terms[position].startswith(prefix):
+            terms.append(self.terms[position])
+            position += 1
+
+        return terms
+
+    def get_substring_terms(self, word: str) -> List[str]:
+        """Returns the indexed terms containing the given word anywhere, i.e. "cluster" in "subclustering"."""
+        candidates = None
+        for trigram in get_trigrams(word, padded=False):
+            # a padded trigram set holds every inner trigram of the term as well
+            terms = self.trigrams.get(trigram, set())
+            candidates = terms if candidates is None else candidates & terms
+
+        return [
+            term
+            for term in candidates or ()
+            if word in term
+        ]
+
+    def get_fuzzy_terms(self, word: str) -> List[str]:
+        """Returns the indexed terms within a small edit distance from the given word."""
+        limit = 1 if len(word) < 8 else 2
+
+        trigrams = get_trigrams(word)
+        candidates = set()
+        for trigram in trigrams:
+            candidates.update(self.trigrams.get(trigram, ()))
+
+        return [
+            term
+            for term in candidates
+            if edit_distance(word, term, limit) <= limit
+        ]
+
+    def match_word(self, word: str) -> Dict[str, float]:
+        """Scores each template on how well a single typed word matches its terms."""
+        matches = {}
+
+        def _add(terms, match_weight):
+            for term in terms:
+                for name, field_weight in self.postings[term].items():
+                    matches[name] = max(matches.get(name, 0), field_weight * match_weight)
+
+        if len(word) >= MIN_FUZZY_LENGTH:
+            _add(self.get_fuzzy_terms(word), FUZZY_MATCH)
+
+        if len(word) >= MIN_SUBSTRING_LENGTH:
+            _add(self.get_substring_terms(word), SUBSTRING_MATCH)
+
+        if len(word) >= MIN_PREFIX_LENGTH:
+            _add(self.get_prefix_terms(word), PREFIX_MATCH)
+
+        if word in self.postings:
+            _add([word], EXACT_MATCH)
+
+        return matches
+
+    def search(self, query: str, limit: int = None) -> List[str]:
+        """
+        Returns the names of the templates matching the query, best matches first.
+        Templates matching more of the typed words always rank above the ones matching fewer.
+        """
+        matched_words = {}
+        scores = {}
+        for word in tokenize(query):
+            for name, score in self.match_word(word).items():
+                matched_words[name] = matched_words.get(name, 0) + 1
+                scores[name] = scores.get(name, 0) + score
+
+        ranking = sorted(scores, key=lambda name: (-matched_words[name], -scores[name], name))
+        return ranking[:limit]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Returns the indexed terms starting with the prefix, the ones found on more templates first."""
+        terms = self.get_prefix_terms(prefix.lower())
+        terms.sort(key=lambda term: -self.count(term))
+        return terms[:limit]
+
+    def count(self, term: str) -> int:
+        """Returns on how many templates the term was found."""
+        return len(self.postings.get(term, {}))
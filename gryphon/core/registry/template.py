@@ -1,9 +1,34 @@
 import os
+import sys
 import json
 from pathlib import Path
 
 
+def _as_list(value):
+    if isinstance(value, str):
+        return [value]
+    return value
+
+
+def _as_facet(value) -> tuple:
+    """Facet values repeat across most templates, so a single interned copy of each string is kept."""
+    if value is None:
+        return ()
+    return tuple(sys.intern(str(v)) for v in _as_list(value) if v is not None)
+
+
 class Template:
+    # Bump whenever the attributes read from metadata.json change,
+    # so the stored index snapshots get rebuilt.
+    schema_version = 1
+
+    __slots__ = (
+        "name", "path", "template_index", "registry_type", "command", "display_name", "keywords",
+        "methodology", "sector", "topic", "arguments", "read_more_link", "force_env", "dependencies",
+        "description", "version", "ssh_domain", "repo_url", "shell_exec", "shell_exec_description",
+        "approver", "addons"
+    )
+
     def __init__(self, template_name, template_path, template_metadata, registry_type):
 
         self.name = template_name
@@ -14,33 +39,19 @@ class Template:
 
         self.command = template_metadata.get("command", "")
         self.display_name = template_metadata.get("display_name", self.name)
-        self.keywords = template_metadata.get("keywords", [])
-        if isinstance(self.keywords, str):
-            self.keywords = [self.keywords]
-        
-        self.methodology = template_metadata.get("methodology", [])
-        if isinstance(self.methodology, str):
-            self.methodology = [self.methodology]
-        
-        self.sector = template_metadata.get("sector", [])
-        if isinstance(self.sector, str):
-            self.sector = [self.sector]
-        
-        self.topic = template_metadata.get("topic", [])
-        if isinstance(self.topic, str):
-            self.topic = [self.topic]
-            
-        self.arguments = template_metadata.get("arguments", [])
-        if isinstance(self.arguments, str):
-            self.arguments = [self.arguments]        
-        
+        self.keywords = _as_list(template_metadata.get("keywords", []))
+
+        self.methodology = _as_facet(template_metadata.get("methodology", []))
+        self.sector = _as_facet(template_metadata.get("sector", []))
+        self.topic = _as_facet(template_metadata.get("topic", []))
+
+        self.arguments = _as_list(template_metadata.get("arguments", []))
+
         self.read_more_link = template_metadata.get("read_more_link", "")
         self.force_env = template_metadata.get("force_env", False)
 
-        self.dependencies = template_metadata.get("dependencies", [])
-        if isinstance(self.dependencies, str):
-            self.dependencies = [self.dependencies]      
-        
+        self.dependencies = _as_list(template_metadata.get("dependencies", []))
+
         self.description = template_metadata.get("description", "")
         self.version = template_metadata.get("version", "")
         
@@ -54,7 +65,6 @@ class Template:
 
         # For init templates only
         self.addons = template_metadata.get("addons", None)
-        
 
     @classmethod
     def template_from_path(cls, template_path: Path, type=""):
@@ -1,24 +1,53 @@
 from .template import Template
-from ..common_operations import sort_versions
+from ..versioning import VersionIndex
 from ...constants import LATEST
 
 
+def _delegate_to_latest(attribute):
+    return property(lambda self: getattr(self.latest, attribute))
+
+
 class VersionedTemplate:
+    """
+    Holds every version of a template as raw metadata. Only the latest version is built
+    upfront, the others become Template objects the first time they are asked for.
+    """
+
+    __slots__ = (
+        "metadata", "template_name", "template_path", "registry_type",
+        "versions", "available_versions", "version_index", "duplicated_versions", "templates", "latest"
+    )
 
     def __init__(self, template_metadata, template_name, template_path, registry_type):
-        self.templates = [
-            Template(
-                template_metadata=metadata,
-                template_name=template_name,
-                template_path=template_path,
-                registry_type=registry_type
-            )
-            for metadata in template_metadata
-        ]
+        self.metadata = template_metadata
+        self.template_name = template_name
+        self.template_path = template_path
+        self.registry_type = registry_type
+
+        self.version_index = {}
+        self.duplicated_versions = set()
+        for index, metadata in enumerate(template_metadata):
+            version = metadata["version"]
+            if version in self.version_index:
+                self.duplicated_versions.add(version)
+            self.version_index[version] = index
+
+        self.templates = [None] * len(template_metadata)
+
+        # parsed and sorted once, oldest first
+        self.versions = VersionIndex(map(lambda x: x["version"], template_metadata))
+        self.available_versions = self.versions.versions
+        self.latest = self[self.versions.latest()]
 
-        self.available_versions = list(map(lambda x: x["version"], template_metadata))
-        latest_version = sort_versions(self.available_versions)[-1]
-        self.latest = self[latest_version]
+    # attributes read often while browsing the templates are resolved without going through __getattr__
+    name = _delegate_to_latest("name")
+    command = _delegate_to_latest("command")
+    display_name = _delegate_to_latest("display_name")
+    keywords = _delegate_to_latest("keywords")
+    methodology = _delegate_to_latest("methodology")
+    topic = _delegate_to_latest("topic")
+    sector = _delegate_to_latest("sector")
+    description = _delegate_to_latest("description")
 
     def __getattr__(self, item):
         """
@@ -30,6 +59,10 @@ class VersionedTemplate:
         The name gathered will be retrivied from inside the latest version by default
 
         """
+        if item == "latest":
+            # not initialized yet, avoids recursing into itself
+            raise AttributeError(item)
+
         return getattr(self.latest, item)
 
     def __getitem__(self, item) -> Template:
@@ -44,13 +77,22 @@ class VersionedTemplate:
         if item == LATEST:
             return self.latest
 
-        filtered = list(filter(lambda x: x.version == item, self.templates))
-        if len(filtered) == 1:
-            return filtered[0]
-
-        elif len(filtered) > 1:
+        if item in self.duplicated_versions:
             raise RuntimeError(f"More than one template corresponded to the version asked ({item})."
                                f"It is likely to be a problem in the metadata indexing system."
                                f"Please call the support.")
-        else:
+
+        try:
+            index = self.version_index[item]
+        except KeyError:
             raise KeyError(f"Could not find version \"{item}\"")
+
+        if self.templates[index] is None:
+            self.templates[index] = Template(
+                template_metadata=self.metadata[index],
+                template_name=self.template_name,
+                template_path=self.template_path,
+                registry_type=self.registry_type
+            )
+
+        return self.templates[index]
@@ -0,0 +1,141 @@
+"""
+Module containing the version parsing and resolution used for templates and Gryphon releases.
+"""
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+VERSION_PATTERN = re.compile(
+    r"^\s*[vV]?"
+    r"(?P<release>\d+(?:\.\d+)*)"
+    r"(?:[-_.]?(?P<pre_label>a|alpha|b|beta|c|rc|pre|preview)[-_.]?(?P<pre_number>\d*))?"
+    r"(?:[-_.]?(?P<post_label>post|rev|r)[-_.]?(?P<post_number>\d*))?"
+    r"(?:[-_.]?(?P<dev_label>dev)[-_.]?(?P<dev_number>\d*))?"
+    r"(?:\+(?P<local>[a-zA-Z0-9.]+))?\s*$"
+)
+
+PRE_RELEASE_ORDER = {
+    "a": 0, "alpha": 0,
+    "b": 1, "beta": 1,
+    "c": 2, "rc": 2, "pre": 2, "preview": 2,
+}
+FINAL_RELEASE = 3
+
+
+@lru_cache(maxsize=None)
+def parse_version(version: str) -> tuple:
+    """
+    Returns a sort key for the version string, following PEP 440 and semantic versioning
+    ("v1.2.0", "1.2", "1.2.0rc1", "1.2.0-beta.2", "1.2.0.post1", "1.3.0.dev0").
+
+    Versions that can not be parsed are kept, sorting before every valid version.
+    """
+    match = VERSION_PATTERN.match(version)
+    if match is None:
+        return False, (), (), 0, (), version
+
+    release = tuple(int(part) for part in match.group("release").split("."))
+    # "1.2" and "1.2.0" are the same release
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+
+    if match.group("pre_label"):
+        pre = (PRE_RELEASE_ORDER[match.group("pre_label")], int(match.group("pre_number") or 0))
+    elif match.group("dev_label") and not match.group("post_label"):
+        # 1.0.dev0 comes before 1.0a0
+        pre = (-1, 0)
+    else:
+        pre = (FINAL_RELEASE, 0)
+
+    post = int(match.group("post_number") or 0) if match.group("post_label") else -1
+    dev = (0, int(match.group("dev_number") or 0)) if match.group("dev_label") else (1, 0)
+
+    return True, release, pre, post, dev, version
+
+
+def get_release(version: str) -> tuple:
+    """Returns the numeric release parts of the version, i.e. (1, 2) for "v1.2.0"."""
+    return parse_version(version)[1]
+
+
+def is_pre_release(version: str) -> bool:
+    valid, _, pre, _, dev, _ = parse_version(version)
+    return valid and (pre[0] != FINAL_RELEASE or dev[0] == 0)
+
+
+def sort_by_version(versions: list) -> list:
+    """Sorts the list of versions in place, oldest first."""
+    versions.sort(key=parse_version)
+    return versions
+
+
+def matches_range(version: str, version_range: str) -> bool:
+    """
+    Checks if the version belongs to a range given as a release prefix,
+    such as "1", "1.x", "1.2.*" or "v1.2".
+    """
+    if not parse_version(version)[0]:
+        return False
+
+    prefix = version_range.strip().lstrip("vV").rstrip(".*xX")
+    if prefix == "":
+        return True
+
+    release_prefix = tuple(int(part) for part in prefix.split("."))
+    release = parse_version(version)[1]
+    release = release + (0,) * (len(release_prefix) - len(release))
+    return release[:len(release_prefix)] == release_prefix
+
+
+class VersionIndex:
+    """List of versions sorted once, answering "latest" and range queries without sorting again."""
+
+    def __init__(self, versions: List[str]):
+        self.versions = sort_by_version(list(versions))
+
+    def __len__(self):
+        return len(self.versions)
+
+    def __contains__(self, version):
+        return version in self.versions
+
+    def newest_first(self) -> List[str]:
+        return self.versions[::-1]
+
+    @staticmethod
+    def _pick_latest(versions: List[str], include_pre_releases: bool) -> Optional[str]:
+        """
+        Returns the first stable version of a newest first list. Pre-releases are only picked
+        when asked for, or when there is no stable version at all.
+        """
+        for version in versions:
+            if include_pre_releases or not is_pre_release(version):
+                return version
+
+        return versions[0] if len(versions) else None
+
+    def latest(self, include_pre_releases=False) -> Optional[str]:
+        """Returns the most recent stable version, None if there is no version at all."""
+        return self._pick_latest(self.newest_first(), include_pre_releases)
+
+    def compatible(self, version_range: str) -> List[str]:
+        """Returns the versions inside the range (i.e. "1.x"), newest first."""
+        return [v for v in reversed(self.versions) if matches_range(v, version_range)]
+
+    def latest_compatible(self, version_range: str, include_pre_releases=False) -> Optional[str]:
+        """Returns the most recent stable version inside the range (i.e. "1.x"), None if there is none."""
+        return self._pick_latest(self.compatible(version_range), include_pre_releases)
+
+    def major_lines(self) -> List[str]:
+        """Returns the release lines present on the index ("2.x", "1.x", ...), newest first."""
+        lines = []
+        for version in reversed(self.versions):
+            release = get_release(version)
+            if not len(release):
+                continue
+
+            line = f"{release[0]}.x"
+            if line not in lines:
+                lines.append(line)
+
+        return lines
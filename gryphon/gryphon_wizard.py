@@ -9,6 +9,8 @@ import platform
 import shutil
 import sys
 import glob
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 
 import git
@@ -18,13 +20,15 @@ from .constants import (
     INIT, DOWNLOAD, GENERATE, ADD, ABOUT, QUIT, BACK, SETTINGS, INIT_FROM_EXISTING,
     GRYPHON_HOME, DEFAULT_CONFIG_FILE, CONFIG_FILE, DATA_PATH, HANDOVER,
     CONFIGURE_PROJECT, GRYPHON_RC, YES, EMAIL_RECIPIENT, EMAIL_RECIPIENT_CC,
-    CONTACT_US, GENERATE_ALL_METHODOLOGY_TEMPLATES
+    CONTACT_US, GENERATE_ALL_METHODOLOGY_TEMPLATES, SUCCESS, REGISTRY_THREAD_NAME
 )
 from .core.common_operations import sort_versions
 from .core.core_text import Text as CoreText
-from .core.operations import BashUtils
+from .core.handover_manifest import verify_handover
+from .core.versioning import VersionIndex, parse_version
+from .core.operations import BashUtils, SettingsManager, write_atomically
 from .core.registry import RegistryCollection
-from .logger import logger
+from .logger import logger, console_handler
 from .wizard import (
     init, download, generate, add, about, exit_program,
     settings, init_from_existing, handover, configure_project,
@@ -33,6 +37,9 @@ from .wizard import (
 from .wizard.questions import CommonQuestions
 from .wizard.wizard_text import Text
 
+# commands that can only start once the template registries are loaded
+REGISTRY_COMMANDS = [INIT, INIT_FROM_EXISTING, DOWNLOAD, GENERATE, GENERATE_ALL_METHODOLOGY_TEMPLATES]
+
 
 def output_error(er: Exception):
     import traceback
@@ -53,76 +60,76 @@ def initial_setup():
         init_colorama()
 
     logger.debug("Loading settings")
-    try:
-        with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-            settings_file = json.load(f)
+    with SettingsManager.lock():
+        try:
+            with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
+                settings_file = json.load(f)
 
-        with open(DEFAULT_CONFIG_FILE, "r", encoding="UTF-8") as f:
-            default_settings_file = json.load(f)
+            with open(DEFAULT_CONFIG_FILE, "r", encoding="UTF-8") as f:
+                default_settings_file = json.load(f)
 
-        try:
-            if settings_file["config_version"] < default_settings_file["config_version"]:
+            try:
+                if settings_file["config_version"] < default_settings_file["config_version"]:
                 
-                logger.debug("Found new Gryphon config version")
+                    logger.debug("Found new Gryphon config version")
                 
-                settings_file["config_version"] = default_settings_file["config_version"]
+                    settings_file["config_version"] = default_settings_file["config_version"]
                 
-                # Check key value pairs
-                old_config_keys = settings_file.keys()
-                new_config_keys = default_settings_file.keys()
+                    # Check key value pairs
+                    old_config_keys = settings_file.keys()
+                    new_config_keys = default_settings_file.keys()
                 
-                for new_key in list(set(new_config_keys) - set(old_config_keys)):
-                    settings_file[new_key] = default_settings_file[new_key]
+                    for new_key in list(set(new_config_keys) - set(old_config_keys)):
+                        settings_file[new_key] = default_settings_file[new_key]
                     
-                # For other keys
-                for old_key in old_config_keys:
-                    if old_key not in new_config_keys:
-                        continue
+                    # For other keys
+                    for old_key in old_config_keys:
+                        if old_key not in new_config_keys:
+                            continue
                         
-                    # If types are not the same, then use the new one
-                    if type(settings_file[old_key]) != type(default_settings_file[old_key]):
-                        settings_file[old_key] = default_settings_file[old_key]
-                    else:
-                        if isinstance(settings_file[old_key], list):
+                        # If types are not the same, then use the new one
+                        if type(settings_file[old_key]) != type(default_settings_file[old_key]):
+                            settings_file[old_key] = default_settings_file[old_key]
+                        else:
+                            if isinstance(settings_file[old_key], list):
                             
-                            for new_item in default_settings_file[old_key]:
-                                not_found = True
+                                for new_item in default_settings_file[old_key]:
+                                    not_found = True
                                 
-                                for old_item in settings_file[old_key]:
-                                    if old_item == new_item:
-                                        not_found = False
+                                    for old_item in settings_file[old_key]:
+                                        if old_item == new_item:
+                                            not_found = False
                                 
-                                if not_found:
-                                    settings_file[old_key].append(default_settings_file[old_key][new_item])
+                                    if not_found:
+                                        settings_file[old_key].append(default_settings_file[old_key][new_item])
 
-                        elif isinstance(settings_file[old_key], dict):
-                            for new_nested_key in list(set(default_settings_file[old_key].keys()) - set(settings_file[old_key].keys())):
-                                settings_file[old_key][new_nested_key] = default_settings_file[old_key][new_nested_key]
+                            elif isinstance(settings_file[old_key], dict):
+                                for new_nested_key in list(set(default_settings_file[old_key].keys()) - set(settings_file[old_key].keys())):
+                                    settings_file[old_key][new_nested_key] = default_settings_file[old_key][new_nested_key]
                         
-                        else:
-                            # Don't modify the old key
-                            pass
+                            else:
+                                # Don't modify the old key
+                                pass
                 
                 # Write the file
-            with open(CONFIG_FILE, "w", encoding="UTF-8") as f:
-                json.dump(settings_file, f, indent=2)
-                
+                write_atomically(CONFIG_FILE, json.dumps(settings_file, indent=2))
+
                 # os.remove(CONFIG_FILE)
                 # raise FileNotFoundError()
-        except KeyError:
-            raise FileNotFoundError()
+            except KeyError:
+                raise FileNotFoundError()
 
-    except FileNotFoundError:
+        except FileNotFoundError:
 
-        if not GRYPHON_HOME.is_dir():
-            os.makedirs(GRYPHON_HOME)
+            if not GRYPHON_HOME.is_dir():
+                os.makedirs(GRYPHON_HOME)
 
-        shutil.copy(
-            src=DEFAULT_CONFIG_FILE,
-            dst=CONFIG_FILE
-        )
-        with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-            settings_file = json.load(f)
+            shutil.copy(
+                src=DEFAULT_CONFIG_FILE,
+                dst=CONFIG_FILE
+            )
+            with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
+                settings_file = json.load(f)
 
     return settings_file
 
@@ -164,7 +171,8 @@ def update_gryphon():
         tags = []
         for line in lines:
             ref = line.split(' ')[-1]
-            tag = ref.split('/')[-1]
+            # annotated tags are also listed peeled, as "v1.0.0^{}"
+            tag = ref.split('/')[-1].replace("^{}", "")
             tags.append(tag)
 
         os.remove(temp_file)
@@ -179,7 +187,12 @@ def update_gryphon():
         logger.debug("Failed to update")
         return
 
-    latest_remote_version = sort_versions(remote_tags)[-1]
+    # pre-release tags are only offered when there is no stable release
+    latest_remote_version = VersionIndex(tag for tag in remote_tags if parse_version(tag)[0]).latest()
+    if latest_remote_version is None:
+        logger.debug("No remote versions of Gryphon were found.")
+        return
+
     latest = sort_versions([__version__, latest_remote_version])[-1]
 
     if __version__ != latest:
@@ -313,20 +326,83 @@ def ignore_previous_keystrokes():
         tcflush(sys.stdin, TCIOFLUSH)
 
 
-def start_ui(settings_file):
-    logger.debug("Loading registries")
-    registry = None
-    try:
+class _BackgroundLogBuffer(logging.Filter):
+    """
+    Holds back the console records of the threads loading the registries (the loader and the
+    index fetches it starts), so they don't break into the prompts.
+    """
 
-        registry = RegistryCollection.from_config_file(
-            settings=settings_file,
-            data_path=GRYPHON_HOME / "registry"
-        )
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def filter(self, record) -> bool:
+        if record.threadName != REGISTRY_THREAD_NAME and not record.threadName.startswith(f"{REGISTRY_THREAD_NAME}-"):
+            return True
+
+        self.records.append(record)
+        return False
+
+    def flush(self, handler: logging.Handler):
+        """Emits the records held so far on the handler."""
+        records, self.records = self.records, []
+        for record in records:
+            handler.handle(record)
+
+
+def load_registry_in_background(settings_file) -> Future:
+    """
+    Starts loading the template registries on a background thread, so the main menu
+    can be shown right away. The returned future resolves to the RegistryCollection.
+    Console messages logged while loading are shown once the menu is back in control.
+    """
+    registry_future = Future()
+    log_buffer = registry_future.log_buffer = _BackgroundLogBuffer()
+    console_handler.addFilter(log_buffer)
+    registry_future.add_done_callback(lambda _: console_handler.removeFilter(log_buffer))
+
+    def _load_registry():
+        logger.debug("Loading registries")
+        try:
+            registry_future.set_result(
+                RegistryCollection.from_config_file(
+                    settings=settings_file,
+                    data_path=GRYPHON_HOME / "registry"
+                )
+            )
+        except Exception as e:
+            registry_future.set_exception(e)
+
+    threading.Thread(target=_load_registry, name=REGISTRY_THREAD_NAME, daemon=True).start()
+    return registry_future
+
+
+def flush_registry_logs(registry_future: Future):
+    """Shows the messages held back from the registry loader, once it has finished."""
+    if registry_future.done():
+        registry_future.log_buffer.flush(console_handler)
+
+
+def wait_for_registry(registry_future: Future):
+    """Blocks until the registries finished loading."""
+    if not registry_future.done():
+        logger.info("Loading templates ...")
+
+    try:
+        registry = registry_future.result()
     except Exception as e:
+        flush_registry_logs(registry_future)
         logger.error(f'Registry loading error.')
         output_error(e)
         exit(1)
 
+    flush_registry_logs(registry_future)
+    return registry
+
+
+def start_ui(settings_file):
+    registry_future = load_registry_in_background(settings_file)
+
     logger.debug("Setup finished")
     logger.warning(Text.welcome)
 
@@ -336,6 +412,8 @@ def start_ui(settings_file):
     while True:
         gryphon_rc = Path.cwd() / GRYPHON_RC
 
+        flush_registry_logs(registry_future)
+
         # ignore partial keystrokes
         ignore_previous_keystrokes()
         chosen_command = CommonQuestions.main_question(
@@ -357,6 +435,10 @@ def start_ui(settings_file):
             GENERATE_ALL_METHODOLOGY_TEMPLATES: generate_all_templates
         }[chosen_command]
 
+        registry = None
+        if chosen_command in REGISTRY_COMMANDS:
+            registry = wait_for_registry(registry_future)
+
         try:
             try:
                 response = function(DATA_PATH, registry)
@@ -390,6 +472,28 @@ def did_you_mean_gryphon():
     logger.info("Did you mean \"gryphon\"?")
 
 
+def verify_handover_package():
+    """Checks a handover package, or the folder extracted from it, against its manifest."""
+    parser = argparse.ArgumentParser(description=verify_handover_package.__doc__)
+    parser.add_argument('target', type=Path, help="handover package or extracted project folder")
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    result = verify_handover(args.target, workers=args.workers)
+
+    for file in result["missing"]:
+        logger.error(f"   - missing: {file}")
+    for file in result["mismatched"]:
+        logger.error(f"   - changed: {file}")
+
+    logger.info(f"{result['verified']} files verified.")
+    if len(result["missing"]) or len(result["mismatched"]):
+        logger.error(CoreText.handover_verify_failure)
+        exit(1)
+
+    logger.log(SUCCESS, CoreText.handover_verify_success)
+
+
 def main():
     logger.info("Starting gryphon...")
     set_log_mode()
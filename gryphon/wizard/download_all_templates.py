@@ -2,7 +2,6 @@ from .download_all_templates_states import Confirmation, Download
 from .functions import BackSignal
 from ..constants import BACK
 from ..fsm import Machine, HaltSignal
-from ..logger import logger
 
 def download_all_templates(data_path, registry):
     """Download all methodology templates into the current gryphon project"""
@@ -15,8 +14,6 @@ def download_all_templates(data_path, registry):
     download = Download()
 #    ask_keyword = AskKeyword()
 
-    logger.warning("Test.")
-
     possible_states = [
         confirmation, download
     ]
@@ -5,7 +5,8 @@ from pathlib import Path
 
 from ..functions import erase_lines
 from ..questions import DownloadQuestions
-from ...constants import YES, NO, READ_MORE, CHANGE_LOCATION, GENERATE
+from ..wizard_text import Text
+from ...constants import YES, NO, READ_MORE, CHANGE_LOCATION, DOWNLOAD
 from ...fsm import State, Transition
 
 import questionary
@@ -41,7 +42,7 @@ def _change_from_confirmation_to_ask_location_again(context: dict) -> bool:
 class Confirmation(State):
 
     def __init__(self, registry):
-        self.templates = registry.get_templates(GENERATE)
+        self.templates = registry.get_templates(DOWNLOAD)
         
         super().__init__()
 
@@ -59,7 +60,12 @@ class Confirmation(State):
     ]
 
     def on_start(self, context: dict) -> dict:
-        
+
+        if "templates" not in context:
+            context["templates"] = self.templates
+
+        message = Text.download_all_confirm
+
         options = [
             Choice(
                 title="Yes",
@@ -1,5 +1,9 @@
+from pathlib import Path
+
 from ...fsm import State
-from ...core.download import download as core_download
+from ...core.download_all import download_all as core_download_all
+from ...core.registry.versioned_template import VersionedTemplate
+from ...constants import LATEST
 
 
 class Download(State):
@@ -7,18 +11,20 @@ class Download(State):
     transitions = []
 
     def on_start(self, context: dict) -> dict:
-        template = context["template"]
-        
+        templates = [
+            template[LATEST] if isinstance(template, VersionedTemplate) else template
+            for template in context["templates"].values()
+        ]
+
         if 'location' not in context.keys():
-            location = context['template'].name
+            location = Path.cwd()
         else:
-            location = context["location"]
-        extra_parameters = context["extra_parameters"]
+            location = Path(context["location"])
 
-        core_download(
-            template=template,
-            location=location,
-            **extra_parameters
+        # templates are cloned concurrently, a failure doesn't stop the others
+        context["failed_templates"] = core_download_all(
+            templates=templates,
+            location=location
         )
 
         return context
@@ -5,8 +5,10 @@ from pathlib import Path
 from typing import Tuple
 from textwrap import fill
 from ..constants import (
-    CHILDREN, NAME, VENV_FOLDER, VALUE, DATA_PATH, ERASE_LINE
+    CHILDREN, NAME, VENV_FOLDER, VALUE, DATA_PATH, ERASE_LINE,
+    METHODOLOGY, USE_CASES, TOPIC, SECTOR
 )
+from ..core.registry.facet_index import METHODOLOGY_FACET, TOPIC_FACET, SECTOR_FACET
 
 
 logger = logging.getLogger('gryphon')
@@ -104,6 +106,24 @@ def filter_chosen_option_by_value(option, tree):
         raise ValueError("Error in the menu navigation (value search).")
 
 
+def get_category_facet(history):
+    """
+    Returns the template facet being browsed on the generate menu for the given
+    navigation history, or None if the current menu level is not a facet.
+    """
+    if len(history) >= 1 and history[0] == METHODOLOGY:
+        return METHODOLOGY_FACET
+
+    if len(history) >= 2 and history[0] == USE_CASES:
+        if history[1] == TOPIC:
+            return TOPIC_FACET
+
+        if history[1] == SECTOR:
+            return SECTOR_FACET
+
+    return None
+
+
 def get_option_names(tree):
     return list(map(lambda x: x[NAME], tree))
 
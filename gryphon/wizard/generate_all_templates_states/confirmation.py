@@ -1,4 +1,3 @@
-import json
 import logging
 # import os
 # import platform
@@ -6,8 +5,9 @@ import logging
 from ..functions import display_template_information, erase_lines
 from ..questions import GenerateQuestions, CommonQuestions
 from ..wizard_text import Text
-from ...constants import (YES, NO, LATEST, USE_LATEST, ALWAYS_ASK, GENERATE_ALL_METHODOLOGY_TEMPLATES, CONFIG_FILE,
+from ...constants import (YES, NO, LATEST, USE_LATEST, ALWAYS_ASK, GENERATE_ALL_METHODOLOGY_TEMPLATES,
                           READ_MORE, DOWNLOAD, GENERATE, EMAIL_APPROVER, MMC_GITHUB_SETUP, MMC_GITHUB_SETUP_LINK)
+from ...core.operations import SettingsManager
 from ...core.registry.versioned_template import VersionedTemplate
 # from ...core.email_approver import email_approver
 from ...fsm import Transition, State
@@ -38,8 +38,7 @@ class Confirmation(State):
         self.templates = registry.get_templates(GENERATE)
         #self.templates.update(registry.get_templates(DOWNLOAD))
         
-        with open(CONFIG_FILE, "r+", encoding="utf-8") as f:
-            self.settings = json.load(f)
+        self.settings = SettingsManager.get_settings()
         super().__init__()
 
     def on_start(self, context: dict) -> dict:
@@ -1,8 +1,8 @@
 from ...fsm import State
-from ...core import generate as core_generate
+from ...core import generate_all as core_generate_all
 # from ...core.download import download as core_download
 from ...core.registry.versioned_template import VersionedTemplate
-from ...constants import DOWNLOAD, GENERATE, LATEST
+from ...constants import LATEST
 import logging
 
 logger = logging.getLogger('gryphon')
@@ -14,25 +14,18 @@ class Install(State):
 
     def on_start(self, context: dict) -> dict:
 
-        for counter, template in enumerate(context["templates"].values()):
+        templates = [
+            template[LATEST] if isinstance(template, VersionedTemplate) else template
+            for template in context["templates"].values()
+        ]
 
-            if isinstance(template, VersionedTemplate):
+        context["extra_parameters"] = {}
 
-                context["template"] = template[LATEST]
-
-            else:
-                context["template"] = template
-
-            context["extra_parameters"] = {}
-
-            # if context["template"].command == GENERATE:
-
-            core_generate(
-                template=context["template"],
-                install_dependencies=False,
-                **context["extra_parameters"]
-            )
-
-            logger.info(f"Downloaded {counter+1} out of {len(context['templates'])} templates.")
+        # templates are downloaded concurrently, a failure doesn't stop the others
+        context["failed_templates"] = core_generate_all(
+            templates=templates,
+            install_dependencies=False,
+            **context["extra_parameters"]
+        )
 
         return context
@@ -56,7 +56,8 @@ class AskCategory(State):
         
         # Add DOWNLOAD templates (which will be filtered at later stage)
         self.templates.update(registry.get_templates(DOWNLOAD))
-        
+        self.facet_index = registry.get_facet_index(GENERATE, DOWNLOAD)
+        self.search_index = registry.get_search_index(GENERATE, DOWNLOAD)
         
         super().__init__()
 
@@ -67,6 +68,12 @@ class AskCategory(State):
         if "templates" not in context:
             context["templates"] = self.templates
 
+        if "facet_index" not in context:
+            context["facet_index"] = self.facet_index
+
+        if "search_index" not in context:
+            context["search_index"] = self.search_index
+
         if "filtered_templates" not in context:
             context["filtered_templates"] = {}
 
@@ -2,14 +2,13 @@ from ..questions import GenerateQuestions
 from ...fsm import Transition, State, negate_condition
 
 
-def filter_by_keyword(keyword_to_find, templates):
-    if keyword_to_find not in ['', ' ']:
-        return {
-            name: template
-            for name, template in templates.items()
-            if keyword_to_find.lower() in '\t'.join(template.keywords).lower()
-        }
-    return []
+def filter_by_keyword(keyword_to_find, templates, search_index):
+    """Returns the templates matching the keywords typed, best matches first."""
+    return {
+        name: templates[name]
+        for name in search_index.search(keyword_to_find)
+        if name in templates
+    }
 
 
 def _condition_nothing_found(context: dict) -> bool:
@@ -30,6 +29,6 @@ class AskKeyword(State):
     ]
 
     def on_start(self, context: dict) -> dict:
-        keyword = GenerateQuestions.generate_keyword_question()
-        context["filtered_templates"] = filter_by_keyword(keyword, context["templates"])
+        keyword = GenerateQuestions.generate_keyword_question(context["search_index"])
+        context["filtered_templates"] = filter_by_keyword(keyword, context["templates"], context["search_index"])
         return context
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import platform
@@ -6,8 +5,9 @@ import platform
 from ..functions import display_template_information, erase_lines
 from ..questions import GenerateQuestions, CommonQuestions
 from ..wizard_text import Text
-from ...constants import (YES, NO, LATEST, USE_LATEST, ALWAYS_ASK, GENERATE, CONFIG_FILE,
+from ...constants import (YES, NO, LATEST, USE_LATEST, ALWAYS_ASK, GENERATE,
                           READ_MORE, DOWNLOAD, EMAIL_APPROVER, MMC_GITHUB_SETUP, MMC_GITHUB_SETUP_LINK)
+from ...core.operations import SettingsManager
 from ...core.registry.versioned_template import VersionedTemplate
 from ...core.email_approver import email_approver
 from ...fsm import Transition, State
@@ -127,8 +127,7 @@ class Confirmation(State):
         self.templates = registry.get_templates(GENERATE)
         self.templates.update(registry.get_templates(DOWNLOAD))
         
-        with open(CONFIG_FILE, "r+", encoding="utf-8") as f:
-            self.settings = json.load(f)
+        self.settings = SettingsManager.get_settings()
         super().__init__()
 
     def on_start(self, context: dict) -> dict:
@@ -139,7 +138,7 @@ class Confirmation(State):
                 context["template"] = template[LATEST]
 
             elif self.settings.get("template_version_policy") == ALWAYS_ASK:
-                chosen_version = CommonQuestions.ask_template_version(template.available_versions)
+                chosen_version = CommonQuestions.ask_template_version(template.versions)
                 context["template"] = template[chosen_version]
 
         else:
@@ -1,32 +1,22 @@
-from ..functions import filter_chosen_option
+from ..functions import filter_chosen_option, get_category_facet
 from ...fsm import Transition, State
-from ...constants import (
-    USE_CASES, METHODOLOGY, TOPIC, SECTOR, CHILDREN
-)
+from ...constants import CHILDREN
+from ...core.registry.facet_index import METHODOLOGY_FACET
 
 
 def filter_templates_by_category(state: dict) -> dict:
-    
-    found_templates = {}
-    
-    for name, template in state["templates"].items():
-        if (
-                (
-                        state["history"][0] == METHODOLOGY and
-                        state["history"][1] in template.methodology
-                ) or (
-                        state["history"][0] == USE_CASES and
-                        state["history"][1] == SECTOR and
-                        state["history"][2] in template.sector
-                ) or (
-                        state["history"][0] == USE_CASES and
-                        state["history"][1] == TOPIC and
-                        state["history"][2] in template.topic
-                )
-        ):
-            found_templates[name] = template
-            
-    return found_templates
+    facet = get_category_facet(state["history"])
+    if facet is None:
+        return {}
+
+    value = state["history"][1] if facet == METHODOLOGY_FACET else state["history"][2]
+    template_names = state["facet_index"].get_template_names(facet, value)
+
+    return {
+        name: state["templates"][name]
+        for name in template_names
+        if name in state["templates"]
+    }
 
 
 # CONDITIONS AND CALLBACKS
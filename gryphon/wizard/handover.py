@@ -1,7 +1,7 @@
 from .functions import BackSignal
 from .handover_states import (
     AskFolder, ConfirmSettings, ChangeSettings, CreateHandoverPackage, ChangeSizeLimits,
-    ChangeGryphonFilesPolicy, ChangeLargeFilesPolicy
+    ChangeGryphonFilesPolicy, ChangeLargeFilesPolicy, ChangeNotebookOutputsPolicy, ChangeArchiveFormat
 )
 from ..constants import BACK
 from ..fsm import Machine, HaltSignal
@@ -14,7 +14,7 @@ def handover(_, __):
 
     possible_states = [
         ask_folder, ConfirmSettings(), ChangeSettings(), CreateHandoverPackage(), ChangeSizeLimits(),
-        ChangeGryphonFilesPolicy(), ChangeLargeFilesPolicy()
+        ChangeGryphonFilesPolicy(), ChangeLargeFilesPolicy(), ChangeNotebookOutputsPolicy(), ChangeArchiveFormat()
     ]
 
     machine = Machine(
@@ -5,3 +5,5 @@ from .create_handover_package import CreateHandoverPackage
 from .change_size_limits import ChangeSizeLimits
 from .change_gryphon_files_policy import ChangeGryphonFilesPolicy
 from .change_large_files_policy import ChangeLargeFilesPolicy
+from .change_notebook_outputs_policy import ChangeNotebookOutputsPolicy
+from .change_archive_format import ChangeArchiveFormat
@@ -0,0 +1,36 @@
+from ..questions.handover_questions import HandoverQuestions
+from ...core.operations import SettingsManager
+from ...fsm import State, Transition
+from ...wizard.functions import erase_lines
+
+
+def _condition_back_to_settings(_):
+    return True
+
+
+def _callback_back_to_settings(context):
+    erase_lines(n_lines=3)
+    return context
+
+
+class ChangeArchiveFormat(State):
+    name = "change_archive_format"
+    transitions = [
+        Transition(
+            next_state="change_settings",
+            condition=_condition_back_to_settings,
+            callback=_callback_back_to_settings
+        )
+    ]
+
+    def on_start(self, context: dict) -> dict:
+
+        context.pop("response", None)
+
+        archive_format = HandoverQuestions.choose_archive_format(SettingsManager.get_handover_archive_format())
+        SettingsManager.change_handover_archive_format(archive_format)
+
+        level = HandoverQuestions.choose_compression_level(SettingsManager.get_handover_compression_level())
+        SettingsManager.change_handover_compression_level(level)
+
+        return context
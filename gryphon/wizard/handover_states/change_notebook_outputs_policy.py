@@ -0,0 +1,34 @@
+from ..questions.handover_questions import HandoverQuestions
+from ...constants import YES
+from ...core.operations import SettingsManager
+from ...fsm import State, Transition
+from ...wizard.functions import erase_lines
+
+
+def _condition_back_to_settings(_):
+    return True
+
+
+def _callback_back_to_settings(context):
+    erase_lines(n_lines=2)
+    return context
+
+
+class ChangeNotebookOutputsPolicy(State):
+    name = "change_notebook_outputs_policy"
+    transitions = [
+        Transition(
+            next_state="change_settings",
+            condition=_condition_back_to_settings,
+            callback=_callback_back_to_settings
+        )
+    ]
+
+    def on_start(self, context: dict) -> dict:
+
+        context.pop("response", None)
+
+        context["response"] = HandoverQuestions.choose_notebook_outputs_policy()
+        SettingsManager.change_handover_strip_notebook_outputs(context["response"] == YES)
+
+        return context
@@ -26,6 +26,14 @@ def _condition_change_gryphon_files_policy(context):
     return context["response"] == "change_gryphon_files_policy"
 
 
+def _condition_change_notebook_outputs_policy(context):
+    return context["response"] == "change_notebook_outputs_policy"
+
+
+def _condition_change_archive_format(context):
+    return context["response"] == "change_archive_format"
+
+
 def _condition_change_large_files_policy(context):
     return context["response"] == "change_large_files_policy"
 
@@ -46,9 +54,17 @@ class ChangeSettings(State):
             next_state="change_gryphon_files_policy",
             condition=_condition_change_gryphon_files_policy
         ),
+        Transition(
+            next_state="change_notebook_outputs_policy",
+            condition=_condition_change_notebook_outputs_policy
+        ),
         Transition(
             next_state="change_large_files_policy",
             condition=_condition_change_large_files_policy
+        ),
+        Transition(
+            next_state="change_archive_format",
+            condition=_condition_change_archive_format
         )
     ]
 
@@ -2,14 +2,19 @@ from textwrap import wrap
 from pathlib import Path
 
 from ..questions.handover_questions import HandoverQuestions
-from ...constants import BACK, NO, YES
-from ...core.common_operations import list_files
+from ...constants import BACK, NO, YES, GRYPHON_HISTORY
 from ...core.handover import get_output_file_name
+from ...core.handover_files import HandoverFileTable
+from ...core.handover_manifest import find_previous_manifests
 from ...core.operations import SettingsManager, RCManager
 from ...fsm import State, Transition
 from ...logger import logger
 from ...wizard.functions import erase_lines
 
+# largest folders and files inside each of them shown along with the estimated package size
+LARGEST_FOLDERS_SHOWN = 3
+LARGEST_FILES_SHOWN = 3
+
 
 def _condition_check_files_to_ask_folder(context):
     return "response" in context and context["response"] == BACK
@@ -53,20 +58,17 @@ class ConfirmSettings(State):
     ]
 
     @staticmethod
-    def get_file_sizes(path):
-        file_list = list_files(path)
-
-        file_sizes = {
-            f: (path / f).stat().st_size / 1e6
-            for f in file_list
-        }
-        return file_sizes
-
-    @staticmethod
-    def filter_large_files(file_sizes, limit):
-        large_file_list = dict(filter(lambda x: x[1] > limit, file_sizes.items()))
-
-        return large_file_list
+    def get_file_table(context) -> HandoverFileTable:
+        """
+        Scans the project folder once per handover. Changing the settings and coming back
+        here reuses the same table, a different folder is scanned again.
+        """
+        table = context.get("file_table")
+        if table is None or table.path != context["location"]:
+            table = HandoverFileTable.scan(context["location"])
+            context["file_table"] = table
+
+        return table
 
     @staticmethod
     def print_large_file_list(large_file_list, limit):
@@ -85,11 +87,11 @@ class ConfirmSettings(State):
         logfile = RCManager.get_rc_file(context["location"])
         RCManager.set_handover_include_large_files(include_large_files, logfile=logfile)
 
-        file_sizes = cls.get_file_sizes(context["location"])
-        large_file_list = cls.filter_large_files(file_sizes, limit)
+        table = cls.get_file_table(context)
+        large_file_list = table.get_large_files(limit)
         has_large_files = len(large_file_list) > 0
 
-        context["file_list"] = list(file_sizes.keys())
+        context["file_list"] = table.files
         context["excluded_files_size"] = []
 
         if has_large_files:
@@ -119,37 +121,83 @@ class ConfirmSettings(State):
                 logger.warning(f"No large files that exceeded the size limit were found ({limit} MB).")
                 context["extra_lines"] = 1
 
-    @staticmethod
-    def handle_gryphon_files(context):
+    @classmethod
+    def handle_gryphon_files(cls, context):
         rc_file = RCManager.get_rc_file(context["location"])
         try:
             include_gryphon_files = RCManager.get_handover_include_gryphon_generated_files(rc_file)
         except KeyError:
             include_gryphon_files = SettingsManager.get_handover_include_gryphon_generated_files()
 
-        files = RCManager.get_gryphon_files(logfile=rc_file)
+        files = RCManager.get_gryphon_files(logfile=rc_file, folder="notebooks")
 
-        file_names = list(map(lambda x: Path(x["path"]), filter(lambda x: "notebooks" in x["path"], files)))
+        file_names = list(map(lambda x: Path(x["path"]), files))
+        # journals with the project history, kept by gryphon next to the rc file
+        history_files = [f for f in cls.get_file_table(context).files if f.parts[0] == GRYPHON_HISTORY]
         context["excluded_files_gryphon"] = []
 
         if not include_gryphon_files:
-            context["excluded_files_gryphon"] = file_names
+            context["excluded_files_gryphon"] = file_names + history_files
 
-            if len(file_names):
+            if len(file_names) or len(history_files):
                 # there are gryphon generated files
                 logger.warning("Some template files created by Gryphon WILL NOT be included on the zip:")
-                logger.warning(f" - {len(file_names)} files inside the \"{context['location'] / 'notebooks'}\" folder.")
-                context["extra_lines"] += 2
+                context["extra_lines"] += 1
 
             else:
                 logger.warning("There aren't any Gryphon generated files on the current project.")
                 context["extra_lines"] += 1
 
-        else:
-            if len(file_names):
-                logger.warning("Some template files created by Gryphon WILL be included on the zip:")
-                logger.warning(f" - {len(file_names)} files inside the \"{context['location'] / 'notebooks'}\" folder.")
-                context["extra_lines"] += 2
+        elif len(file_names) or len(history_files):
+            logger.warning("Some template files created by Gryphon WILL be included on the zip:")
+            context["extra_lines"] += 1
+
+        if len(file_names):
+            logger.warning(f" - {len(file_names)} files inside the \"{context['location'] / 'notebooks'}\" folder.")
+            context["extra_lines"] += 1
+
+        if len(history_files):
+            logger.warning(f" - {len(history_files)} history files inside the "
+                           f"\"{context['location'] / GRYPHON_HISTORY}\" folder.")
+            context["extra_lines"] += 1
+
+    @staticmethod
+    def handle_previous_manifests(context):
+        context["previous_manifest"] = None
+
+        manifests = find_previous_manifests(context["location"])
+        if len(manifests):
+            response = HandoverQuestions.choose_previous_manifest(manifests)
+            context["extra_lines"] += 1
+
+            if response != NO:
+                context["previous_manifest"] = response
+
+    @classmethod
+    def print_estimated_size(cls, context):
+        table = cls.get_file_table(context)
+        included = table.get_included_files(context["excluded_files_size"], context["excluded_files_gryphon"])
+        estimated_size = table.estimate_compressed_size(
+            context["excluded_files_size"], context["excluded_files_gryphon"]
+        )
+
+        logger.warning(f"{len(included)} files will be handed over, "
+                       f"the package is estimated to take around {estimated_size / 1e6:.2f} MB.")
+        context["extra_lines"] += 1
+
+        # where most of the package size comes from
+        largest = table.get_largest_files_by_folder(
+            context["excluded_files_size"], context["excluded_files_gryphon"], n=LARGEST_FILES_SHOWN
+        )
+        for folder, files in list(largest.items())[:LARGEST_FOLDERS_SHOWN]:
+            logger.warning(f" - {folder}:")
+            for file, size in files:
+                logger.warning(f"     {str(file)[:60].ljust(40)}\t{size / 1e6:.2f} MB")
+            context["extra_lines"] += len(files) + 1
+
+        if SettingsManager.get_handover_strip_notebook_outputs():
+            logger.warning("The outputs of the notebooks will be stripped (the files on disk are kept).")
+            context["extra_lines"] += 1
 
     def on_start(self, context: dict) -> dict:
 
@@ -157,8 +205,13 @@ class ConfirmSettings(State):
 
         self.handle_file_sizes(context)
         self.handle_gryphon_files(context)
+        self.print_estimated_size(context)
+        self.handle_previous_manifests(context)
 
-        context["output_file"] = get_output_file_name(context["location"])
+        context["output_file"] = get_output_file_name(
+            context["location"],
+            archive_format=SettingsManager.get_handover_archive_format()
+        )
         context["response"], n_lines = HandoverQuestions.confirm_to_proceed(context["output_file"])
         context["extra_lines"] += n_lines - 1
 
@@ -16,6 +16,11 @@ class CreateHandoverPackage(State):
         except KeyError:
             keep_gryphon_files = SettingsManager.get_handover_include_gryphon_generated_files()
 
+        archive_format = SettingsManager.get_handover_archive_format()
+        compression_level = SettingsManager.get_handover_compression_level()
+        previous_manifest = context.get("previous_manifest")
+        strip_notebooks = SettingsManager.get_handover_strip_notebook_outputs()
+
         handover(
             path=context["location"],
             output_path=context["output_file"],
@@ -24,7 +29,15 @@ class CreateHandoverPackage(State):
             file_list=context["file_list"],
             configs=dict(
                 keep_gryphon_files=keep_gryphon_files,
-                file_size_limit=SettingsManager.get_handover_file_size_limit()
-            )
+                file_size_limit=SettingsManager.get_handover_file_size_limit(),
+                archive_format=archive_format,
+                compression_level=compression_level,
+                previous_manifest=str(previous_manifest) if previous_manifest is not None else None,
+                strip_notebook_outputs=strip_notebooks
+            ),
+            archive_format=archive_format,
+            compression_level=compression_level,
+            previous_manifest=previous_manifest,
+            strip_notebooks=strip_notebooks
         )
         return context
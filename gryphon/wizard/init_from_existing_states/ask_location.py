@@ -4,13 +4,13 @@ from ...wizard.questions import InitFromExistingQuestions, CommonQuestions
 
 import logging
 import os
-import json
 logger = logging.getLogger('gryphon')
 
 from ...constants import (
-    BACK, INIT, ALWAYS_ASK, DEFAULT_PYTHON_VERSION, CONFIG_FILE,
+    BACK, INIT, ALWAYS_ASK, DEFAULT_PYTHON_VERSION,
     LATEST, USE_LATEST
 )
+from ...core.operations import SettingsManager
 from ...core.registry.versioned_template import VersionedTemplate
 
 
@@ -26,8 +26,7 @@ class AskLocation(State):
 
     def __init__(self, registry):
         self.templates = registry.get_templates(INIT)
-        with open(CONFIG_FILE, "r+", encoding="utf-8") as f:
-            self.settings = json.load(f)
+        self.settings = SettingsManager.get_settings()
         super().__init__()
         
     name = "ask_location"
@@ -51,7 +50,7 @@ class AskLocation(State):
                 template = template[LATEST]
 
             elif self.settings.get("template_version_policy") == ALWAYS_ASK:
-                chosen_version = CommonQuestions.ask_template_version(template.available_versions)
+                chosen_version = CommonQuestions.ask_template_version(template.versions)
                 template = template[chosen_version]
                 
         context["location"] = InitFromExistingQuestions.ask_existing_location(template)
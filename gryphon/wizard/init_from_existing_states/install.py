@@ -1,15 +1,18 @@
-import json
 
-from ..questions import CommonQuestions
+import logging
+
+from ..questions import CommonQuestions, InitFromExistingQuestions
 from ...constants import CONDA, VENV
 from ...constants import (
-    INIT, ALWAYS_ASK, LATEST, USE_LATEST, YES
+    INIT, ALWAYS_ASK, LATEST, USE_LATEST, YES, NO
 )
-from ...core.init_from_existing import init_from_existing
+from ...core.init_from_existing import init_from_existing, handle_template
 from ...core.operations import SettingsManager
 from ...core.registry.versioned_template import VersionedTemplate
 from ...fsm import State
 
+logger = logging.getLogger('gryphon')
+
 
 class Install(State):
     name = "install"
@@ -18,8 +21,7 @@ class Install(State):
     def __init__(self, registry):
         self.templates = registry.get_templates(INIT)
 
-        with open(SettingsManager.get_config_path(), "r+", encoding="utf-8") as f:
-            self.settings = json.load(f)
+        self.settings = SettingsManager.get_settings()
         super().__init__()
 
     def _get_template(self, template_name):
@@ -30,7 +32,7 @@ class Install(State):
                 template = selected_template[LATEST]
 
             elif self.settings.get("template_version_policy") == ALWAYS_ASK:
-                chosen_version = CommonQuestions.ask_template_version(selected_template.available_versions)
+                chosen_version = CommonQuestions.ask_template_version(selected_template.versions)
                 template = selected_template[chosen_version]
             else:
                 raise RuntimeError(f'Value from "template_version_policy" not in the possible values [{USE_LATEST},'
@@ -43,6 +45,16 @@ class Install(State):
 
     def on_start(self, context: dict) -> dict:
 
+        template = self._get_template(context["template_name"])
+
+        # dry run: shows what would be copied, skipped and kept from the template
+        if InitFromExistingQuestions.ask_preview_changes() == YES:
+            handle_template(template, context["location"], dry_run=True)
+
+            if InitFromExistingQuestions.confirm_changes() == NO:
+                logger.info("Nothing was changed.")
+                return context
+
         path = None
         external_path = None
         if context["use_existing"]:
@@ -84,7 +96,7 @@ class Install(State):
                     path = context["venv_path"]
 
         init_from_existing(
-            template=self._get_template(context["template_name"]),
+            template=template,
             location=context["location"],
             env_manager=env,
             existing_env_path=path,
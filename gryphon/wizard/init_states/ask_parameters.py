@@ -1,12 +1,12 @@
-import json
 from pathlib import Path
 
 from ..functions import list_conda_available_python_versions, erase_lines
 from ..questions import InitQuestions, CommonQuestions
 from ...constants import (
-    BACK, INIT, ALWAYS_ASK, DEFAULT_PYTHON_VERSION, CONFIG_FILE,
+    BACK, INIT, ALWAYS_ASK, DEFAULT_PYTHON_VERSION,
     LATEST, USE_LATEST
 )
+from ...core.operations import SettingsManager
 from ...core.registry.versioned_template import VersionedTemplate
 from ...fsm import State, Transition, negate_condition
 
@@ -44,8 +44,7 @@ class AskParameters(State):
 
     def __init__(self, registry):
         self.templates = registry.get_templates(INIT)
-        with open(CONFIG_FILE, "r+", encoding="utf-8") as f:
-            self.settings = json.load(f)
+        self.settings = SettingsManager.get_settings()
         super().__init__()
 
     name = "ask_parameters"
@@ -79,7 +78,7 @@ class AskParameters(State):
                 context["template"] = template[LATEST]
 
             elif self.settings.get("template_version_policy") == ALWAYS_ASK:
-                chosen_version = CommonQuestions.ask_template_version(template.available_versions)
+                chosen_version = CommonQuestions.ask_template_version(template.versions)
                 context["template"] = template[chosen_version]
 
         else:
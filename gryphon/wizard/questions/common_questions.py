@@ -137,6 +137,7 @@ class CommonQuestions:
     @staticmethod
     @base_question
     def ask_template_version(versions):
+        """Asks for a version out of a VersionIndex, newest versions first."""
 
         choices = [
             Choice(
@@ -144,12 +145,24 @@ class CommonQuestions:
                 value=LATEST
             )
         ]
+
+        # shortcut to the latest version of each release line when there are many
+        major_lines = versions.major_lines()
+        if len(major_lines) > 1:
+            choices.extend([
+                Choice(
+                    title=f"latest {line} ({versions.latest_compatible(line)})",
+                    value=versions.latest_compatible(line)
+                )
+                for line in major_lines
+            ])
+
         choices.extend([
             Choice(
                 title=v,
                 value=v
             )
-            for v in versions
+            for v in versions.newest_first()
         ])
 
         return questionary.select(
@@ -1,14 +1,36 @@
 import questionary
+from prompt_toolkit.completion import Completer, Completion
 from questionary import Choice, Separator
 from .common_functions import base_question, base_text_prompt, get_back_choice
+from ..functions import get_category_facet
 from ..wizard_text import Text
 from ...constants import (QUIT, YES, NO, TYPE_AGAIN, READ_MORE, LOCAL_TEMPLATE,
-                          USE_CASES, METHODOLOGY, TOPIC, SECTOR, DOWNLOAD, EMAIL_APPROVER, MMC_GITHUB_SETUP)
+                          DOWNLOAD, EMAIL_APPROVER, MMC_GITHUB_SETUP)
+from ...core.registry.facet_index import METHODOLOGY_FACET
 
 import logging
 logger = logging.getLogger('gryphon')
 
 
+class SearchCompleter(Completer):
+    """Suggests, as the user types, the indexed terms that complete the current word."""
+
+    def __init__(self, search_index):
+        self.search_index = search_index
+
+    def get_completions(self, document, complete_event):
+        word = document.get_word_before_cursor()
+        if not len(word.strip()):
+            return
+
+        for term in self.search_index.complete(word):
+            yield Completion(
+                term,
+                start_position=-len(word),
+                display_meta=f"{self.search_index.count(term)} templates"
+            )
+
+
 class GenerateQuestions:
 
     @staticmethod
@@ -18,46 +40,24 @@ class GenerateQuestions:
         
         if context is not None:
             # Context is available
-        
-            if (context.get("history") is None) or (len(context.get("history")) == 0):
-                pass
-                
-            elif context["history"][0] == METHODOLOGY:
-                
-                if len(context["history"]) == 1:
-                    for idx, category in enumerate(categories):
-                        
-                        counter = 0
-                        for name, template in context["templates"].items():
-                            if category in template.methodology:
-                                counter += 1
-                        
-                        if counter != 1:
-                            categories[idx] = category + " | " + str(counter) + " templates"
-                        else:
-                            categories[idx] = category + " | " + str(counter) + " template" 
-            
-            elif context["history"][0] == USE_CASES:
-                
-                if len(context["history"]) == 1:
-                    pass
-                
-                elif (len(context["history"]) == 2) and (context["history"][1] in [TOPIC, SECTOR]):
-                    
-                    for idx, category in enumerate(categories):
-                        
-                        counter = 0
-                        for name, template in context["templates"].items():
-                            if (context["history"][1] == TOPIC) and (category in template.topic):
-                                counter += 1
-                            elif (context["history"][1] == SECTOR) and (category in template.sector):
-                                counter += 1
-                        
-                        if counter != 1:
-                            categories[idx] = category + " | " + str(counter) + " templates"
-                        else:
-                            categories[idx] = category + " | " + str(counter) + " template"
-                
+            history = context.get("history") or []
+            facet = get_category_facet(history)
+
+            # only the level right below the facet choice lists facet values
+            is_facet_level = (
+                (facet is not None) and
+                len(history) == (1 if facet == METHODOLOGY_FACET else 2)
+            )
+
+            if is_facet_level:
+                for idx, category in enumerate(categories):
+                    counter = context["facet_index"].count(facet, category)
+
+                    if counter != 1:
+                        categories[idx] = category + " | " + str(counter) + " templates"
+                    else:
+                        categories[idx] = category + " | " + str(counter) + " template"
+
         categories.extend([
             Separator(Text.menu_separator),
             get_back_choice()
@@ -176,8 +176,13 @@ class GenerateQuestions:
 
     @staticmethod
     @base_text_prompt
-    def generate_keyword_question():
-        return questionary.text(message=Text.generate_keyword_argument).unsafe_ask()
+    def generate_keyword_question(search_index=None):
+        completer = SearchCompleter(search_index) if search_index is not None else None
+        return questionary.text(
+            message=Text.generate_keyword_argument,
+            completer=completer,
+            complete_while_typing=completer is not None
+        ).unsafe_ask()
 
     @staticmethod
     @base_question
@@ -1,5 +1,6 @@
 from pathlib import Path
 from textwrap import fill
+from typing import List
 
 import questionary
 from questionary import Choice, Separator
@@ -10,6 +11,7 @@ from .common_functions import (
 )
 from ..wizard_text import Text
 from ...constants import YES, NO, CHANGE_LIMIT
+from ...core.handover_archive import ARCHIVE_FORMATS
 
 
 class NumberValidator(questionary.Validator):
@@ -83,6 +85,26 @@ class HandoverQuestions:
             ]
         ).unsafe_ask(), n_lines
 
+    @staticmethod
+    @base_question
+    def choose_previous_manifest(manifests: List[Path]):
+        return questionary.select(
+            message=Text.handover_prompt_previous_manifest,
+            choices=[
+                Choice(
+                    title="Every file in the project",
+                    value=NO
+                ),
+                *[
+                    Choice(
+                        title=f"Only the changes since {manifest.name}",
+                        value=manifest
+                    )
+                    for manifest in manifests
+                ]
+            ]
+        ).unsafe_ask()
+
     @staticmethod
     @base_question
     def choose_setting_to_change():
@@ -97,6 +119,14 @@ class HandoverQuestions:
                     title="Change whether to include Gryphon generated files",
                     value="change_gryphon_files_policy"
                 ),
+                Choice(
+                    title="Change whether to strip the outputs of the notebooks",
+                    value="change_notebook_outputs_policy"
+                ),
+                Choice(
+                    title="Change the package format and compression level",
+                    value="change_archive_format"
+                ),
                 Separator(),
                 get_back_choice()
             ]
@@ -135,3 +165,48 @@ class HandoverQuestions:
                 )
             ]
         ).unsafe_ask()
+
+    @staticmethod
+    @base_question
+    def choose_notebook_outputs_policy():
+        return questionary.select(
+            message=Text.handover_prompt_notebook_outputs_policy,
+            choices=[
+                Choice(
+                    title="DO strip the outputs in the handover package (files on disk are kept)",
+                    value=YES
+                ),
+                Choice(
+                    title="DO NOT strip the outputs",
+                    value=NO
+                )
+            ]
+        ).unsafe_ask()
+
+    @staticmethod
+    @base_question
+    def choose_archive_format(current_format: str):
+        return questionary.select(
+            message=Text.handover_prompt_archive_format,
+            choices=[
+                Choice(
+                    title=f".{archive_format}{' (current)' if archive_format == current_format else ''}",
+                    value=archive_format
+                )
+                for archive_format in ARCHIVE_FORMATS
+            ]
+        ).unsafe_ask()
+
+    @staticmethod
+    @base_question
+    def choose_compression_level(current_level: int):
+        return questionary.select(
+            message=Text.handover_prompt_compression_level,
+            choices=[
+                Choice(
+                    title=f"{title} ({level}){' (current)' if level == current_level else ''}",
+                    value=level
+                )
+                for title, level in [("Fastest", 1), ("Balanced", 6), ("Smallest", 9)]
+            ]
+        ).unsafe_ask()
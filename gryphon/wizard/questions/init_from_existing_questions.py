@@ -111,3 +111,39 @@ class InitFromExistingQuestions:
             questionary.path(message=Text.init_from_existing_ask_external_env_path)
             .unsafe_ask()
         )
+
+    @staticmethod
+    @base_question
+    def ask_preview_changes():
+
+        return questionary.select(
+            message=Text.init_from_existing_ask_preview,
+            choices=[
+                Choice(
+                    title="No, go ahead",
+                    value=NO
+                ),
+                Choice(
+                    title="Yes, show me the changes first",
+                    value=YES
+                )
+            ]
+        ).unsafe_ask()
+
+    @staticmethod
+    @base_question
+    def confirm_changes():
+
+        return questionary.select(
+            message=Text.init_from_existing_confirm_changes,
+            choices=[
+                Choice(
+                    title="Yes",
+                    value=YES
+                ),
+                Choice(
+                    title="No",
+                    value=NO
+                )
+            ]
+        ).unsafe_ask()
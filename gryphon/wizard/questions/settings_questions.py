@@ -4,6 +4,7 @@ import questionary
 from questionary import Choice, Separator
 
 from .common_functions import base_question, get_back_choice, base_text_prompt
+from .handover_questions import NumberValidator
 from ..wizard_text import Text
 from ...constants import (
     YES, NO, NAME, VALUE, ALWAYS_ASK, SYSTEM_DEFAULT,
@@ -61,6 +62,14 @@ class SettingsQuestions:
             choices=cls.base_choices
         ).unsafe_ask()
 
+    @classmethod
+    @base_question
+    def confirm_purge_template_cache(cls, cache_size):
+        return questionary.select(
+            message=Text.settings_confirm_purge_template_cache.replace("{cache_size}", f"{cache_size:.1f}"),
+            choices=cls.base_choices
+        ).unsafe_ask()
+
     @classmethod
     @base_question
     def confirm_registry_addition(cls, registry_name):
@@ -104,6 +113,14 @@ class SettingsQuestions:
             choices=choices
         ).unsafe_ask()
 
+    @staticmethod
+    @base_question
+    def ask_template_cache_size_limit(limit):
+        return float(questionary.text(
+            message=Text.settings_ask_template_cache_size_limit.replace("{limit}", f"{limit}"),
+            validate=NumberValidator
+        ).unsafe_ask())
+
     @staticmethod
     @base_question
     def ask_registry_name():
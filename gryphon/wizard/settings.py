@@ -1,4 +1,3 @@
-import json
 import logging
 
 from .functions import erase_lines, BackSignal
@@ -8,11 +7,12 @@ from .settings_states import (
     RestoreDefaultRegistry, AddRemoteRegistry,
     AddLocalRegistry, RemoveRegistry, UpdateConda,
     ChangeTemplateVersionPolicy, NewTemplate2, NewTemplate3,
-    RemoveLocal
+    RemoveLocal, PurgeTemplateCache, ChangeTemplateCacheSizeLimit
 )
 from ..constants import (
-    CONFIG_FILE, DEFAULT_ENV, NAME, VALUE, BACK
+    DEFAULT_ENV, NAME, VALUE, BACK
 )
+from ..core.operations import SettingsManager
 from ..fsm import Machine, HaltSignal
 
 logger = logging.getLogger('gryphon')
@@ -24,8 +24,7 @@ def back_to_previous(history, **kwargs):
 
 
 def handle_current_env_manager(tree_level):
-    with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-        current_env = json.load(f).get("environment_management", DEFAULT_ENV)
+    current_env = SettingsManager.get_settings().get("environment_management", DEFAULT_ENV)
 
     response = []
     for p in tree_level:
@@ -50,7 +49,8 @@ def settings(data_path, _):
         ChangeEnvManager(), RestoreDefaults(),
         RestoreDefaultRegistry(), AddRemoteRegistry(),
         AddLocalRegistry(), RemoveRegistry(), UpdateConda(),
-        ChangeTemplateVersionPolicy(), RemoveLocal()
+        ChangeTemplateVersionPolicy(), RemoveLocal(), PurgeTemplateCache(),
+        ChangeTemplateCacheSizeLimit()
     ]
 
     machine = Machine(
@@ -6,15 +6,15 @@ from ..functions import (
 )
 from ..questions import SettingsQuestions
 from ...constants import (
-    BACK, CHILDREN, CONFIG_FILE, DEFAULT_ENV,
+    BACK, CHILDREN, DEFAULT_ENV,
     NAME, VALUE
 )
+from ...core.operations import SettingsManager
 from ...fsm import State, Transition
 
 
 def handle_current_env_manager(tree_level):
-    with open(CONFIG_FILE, "r", encoding="UTF-8") as f:
-        current_env = json.load(f).get("environment_management", DEFAULT_ENV)
+    current_env = SettingsManager.get_settings().get("environment_management", DEFAULT_ENV)
 
     response = []
     for p in tree_level:
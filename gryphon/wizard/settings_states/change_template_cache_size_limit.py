@@ -0,0 +1,40 @@
+import logging
+
+from ..questions import SettingsQuestions
+from ...constants import SUCCESS
+from ...core.operations import SettingsManager, TemplateCache
+from ...fsm import State, Transition
+
+logger = logging.getLogger('gryphon')
+
+
+def _condition_from_change_template_cache_size_limit_to_end(_) -> bool:
+    return True
+
+
+def _callback_from_change_template_cache_size_limit_to_end(context: dict) -> dict:
+    SettingsManager.change_template_cache_size_limit(max(context["size_limit"], 0.0))
+
+    # entries above the new limit are evicted right away
+    TemplateCache.evict()
+    logger.log(SUCCESS, f"Template cache size limit changed to {context['size_limit']} MB.")
+
+    context["history"] = []
+    print("\n")
+    return context
+
+
+class ChangeTemplateCacheSizeLimit(State):
+    name = "change_template_cache_size_limit"
+    transitions = [
+        Transition(
+            next_state="ask_option",
+            condition=_condition_from_change_template_cache_size_limit_to_end,
+            callback=_callback_from_change_template_cache_size_limit_to_end
+        )
+    ]
+
+    def on_start(self, context: dict) -> dict:
+        current_limit = SettingsManager.get_template_cache_size_limit()
+        context["size_limit"] = SettingsQuestions.ask_template_cache_size_limit(current_limit)
+        return context
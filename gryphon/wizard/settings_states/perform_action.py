@@ -72,6 +72,14 @@ def _condition_from_perform_action_to_change_template_version_policy(context: di
     return context["history"][0] == "change_template_version_policy"
 
 
+def _condition_from_perform_action_to_purge_template_cache(context: dict) -> bool:
+    return context["history"][0] == "purge_template_cache"
+
+
+def _condition_from_perform_action_to_change_template_cache_size_limit(context: dict) -> bool:
+    return context["history"][0] == "change_template_cache_size_limit"
+
+
 def _callback_from_perform_action_to_change_python_version(context: dict) -> dict:
     return context
 
@@ -127,6 +135,16 @@ class PerformAction(State):
         Transition(
             next_state="remove_local",
             condition=_condition_from_perform_action_to_remove_local
+        ),
+
+        Transition(
+            next_state="purge_template_cache",
+            condition=_condition_from_perform_action_to_purge_template_cache
+        ),
+
+        Transition(
+            next_state="change_template_cache_size_limit",
+            condition=_condition_from_perform_action_to_change_template_cache_size_limit
         )
     ]
 
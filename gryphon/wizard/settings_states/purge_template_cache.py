@@ -0,0 +1,62 @@
+import logging
+
+from ..functions import erase_lines
+from ..questions import SettingsQuestions
+from ...constants import NO
+from ...constants import YES, SUCCESS
+from ...core.operations import TemplateCache
+from ...fsm import State, Transition
+
+logger = logging.getLogger('gryphon')
+
+
+def back_to_previous(history, **kwargs):
+    history.pop()
+    erase_lines(**kwargs)
+
+
+#####
+def _condition_from_purge_template_cache_to_end(context: dict) -> bool:
+    return context["confirmation_option"] == YES
+
+
+def _callback_from_purge_template_cache_to_end(context: dict) -> dict:
+    freed = TemplateCache.purge()
+    logger.log(SUCCESS, f"Template cache cleared successfully ({freed / 1024 ** 2:.1f} MB freed)")
+
+    context["history"] = []
+    print("\n")
+    return context
+
+
+####
+def _condition_from_purge_template_cache_to_ask_option(context: dict) -> bool:
+    return context["confirmation_option"] == NO
+
+
+def _callback_from_purge_template_cache_to_ask_option(context: dict) -> dict:
+    # remove 2 entries from history
+    back_to_previous(context["history"], n_lines=1)
+    back_to_previous(context["history"], n_lines=1)
+    return context
+
+
+class PurgeTemplateCache(State):
+    name = "purge_template_cache"
+    transitions = [
+        Transition(
+            next_state="ask_option",
+            condition=_condition_from_purge_template_cache_to_ask_option,
+            callback=_callback_from_purge_template_cache_to_ask_option
+        ),
+        Transition(
+            next_state="ask_option",
+            condition=_condition_from_purge_template_cache_to_end,
+            callback=_callback_from_purge_template_cache_to_end
+        )
+    ]
+
+    def on_start(self, context: dict) -> dict:
+        cache_size = TemplateCache.get_size() / 1024 ** 2
+        context["confirmation_option"] = SettingsQuestions.confirm_purge_template_cache(cache_size)
+        return context
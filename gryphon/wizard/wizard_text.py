@@ -69,6 +69,8 @@ class Text:
                                                " do you want to use it as the project environment?"
     init_from_existing_point_to_external_env = "Do you want to point to an external environment?"
     init_from_existing_ask_external_env_path = "Type the external environment path:"
+    init_from_existing_ask_preview = "Do you want to see the changes to the project files before they are made?"
+    init_from_existing_confirm_changes = "Proceed with these changes?"
 
     add_prompt_categories_question = "Navigate the categories:"
     add_prompt_instruction = " "
@@ -83,8 +85,12 @@ class Text:
     handover_prompt_confirm_configurations = "Confirm that you want to proceed with the configurations from above. " \
                                              "The following file will be created: "
     handover_prompt_change_settings = "Select the setting you want to change:"
+    handover_prompt_previous_manifest = "Previous handovers of this project were found. Select what to package:"
     handover_prompt_gryphon_files_policy = "Select what to do with Gryphon generated files:"
     handover_prompt_large_files_policy = "Select what to do with large files:"
+    handover_prompt_notebook_outputs_policy = "Select what to do with the outputs (plots, tables) saved in notebooks:"
+    handover_prompt_archive_format = "Select the format of the handover package:"
+    handover_prompt_compression_level = "Select the compression level of the handover package:"
 
     about_prompt_links = "Useful links:"
 
@@ -96,6 +102,8 @@ class Text:
     generate_confirm_2 = "\nUsing the following arguments: {arguments}"
 
     generate_all_confirm = "Confirm that you want to download all Gryphon templates into the current project."
+    download_all_confirm = "Confirm that you want to download every standalone Gryphon template, each one into its " \
+                           "own folder inside the current directory."
 
     # {library_name} is going to be replaced with the library name
     add_confirm = "Confirm that you want to install the \"{library_name}\" library to the current project."
@@ -131,6 +139,10 @@ class Text:
     settings_ask_local_template = "Choose the template you want to remove"
     settings_confirm_restore_defaults = "Confirm that you want to restore EVERY gryphon settings to the default?"
     settings_confirm_restorer_registry_defaults = "Confirm that you want to restore gryphon registry to the default?"
+    settings_confirm_purge_template_cache = "Confirm that you want to remove every downloaded template from the " \
+                                            "cache ({cache_size} MB)?"
+    settings_ask_template_cache_size_limit = "Type the new size limit of the template download cache in MBs " \
+                                             "(0 turns the cache off), current limit: {limit} MB"
 
     settings_ask_registry_name = "Give a name to the new registry (ctrl+c to exit):"
     settings_confirm_remove_registry = "Confirm that you want to remove that registry from gryphon?"
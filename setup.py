@@ -71,6 +71,7 @@ setup(
     entry_points='''
         [console_scripts]
         gryphon=gryphon.gryphon_wizard:main
+        gryphon-verify-handover=gryphon.gryphon_wizard:verify_handover_package
         griffin=gryphon.gryphon_wizard:did_you_mean_gryphon
         grifon=gryphon.gryphon_wizard:did_you_mean_gryphon
         gryfon=gryphon.gryphon_wizard:did_you_mean_gryphon
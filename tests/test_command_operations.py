@@ -2,16 +2,28 @@
 Module containing tests about the functions in the file common_operations.py
 """
 import json
+import logging
 import os
 import shutil
 import subprocess
+import sys
+import threading
+import zipfile
+from unittest import mock
 from os import path
 from pathlib import Path
 
 import pytest
 
-from gryphon.core.common_operations import (init_new_git_repo, initial_git_commit)
-from gryphon.core.operations import EnvironmentManagerOperations, BashUtils, RCManager
+from gryphon.core.common_operations import (
+    init_new_git_repo, initial_git_commit, sort_versions, materialize_template, backup_files_to_be_overwritten,
+    _same_streams, log_changes, list_files
+)
+from gryphon.core.generate import replace_patterns
+from gryphon.core.versioning import VersionIndex
+from gryphon.core.operations import (
+    EnvironmentManagerOperations, BashUtils, FileLock, RCHistory, RCManager, TemplateCache
+)
 from gryphon.constants import VENV_FOLDER, CONDA_FOLDER, REQUIREMENTS
 from gryphon.core.operations import BashUtils
 from gryphon.core.registry import Template
@@ -254,12 +266,518 @@ def test_log_new_files(setup, teardown):
             logfile=log_file
         )
 
-        with open(log_file, "r") as f:
-            contents = json.load(f)
-            assert "files" in contents
-            assert len(contents["files"]) == 2
-            for files in contents["files"]:
-                assert "/home/" not in files["path"]
+        files = RCManager.get_gryphon_files(log_file)
+        assert len(files) == 2
+        for file in files:
+            assert "/home/" not in file["path"]
+
+    finally:
+        teardown()
+
+
+def test_rc_session(setup, teardown, mocker):
+    cwd = setup()
+    log_file = cwd / "sample_log"
+    with open(log_file, "w") as f:
+        f.write("{}")
+
+    try:
+        template = Template.template_from_path(TEST_FOLDER / "data" / "trivial")
+        write_rc = mocker.spy(RCManager, "_write_rc")
+
+        with RCManager.session(log_file):
+            RCManager.log_operation(template, performed_action="init", logfile=log_file)
+            RCManager.log_new_files(template, None, performed_action="init", logfile=log_file, files=["a.py"])
+            RCManager.set_addon_states(install_nb_strip_out=True, logfile=log_file)
+
+            # changes are only seen through RCManager until the session ends
+            assert json.loads(log_file.read_text()) == {}
+            assert RCManager._get_key_rc("nbstripout", log_file) is True
+
+        assert write_rc.call_count == 1
+        contents = json.loads(log_file.read_text())
+        assert len(RCManager.get_gryphon_operations(log_file)) == 1
+        assert RCManager.get_gryphon_files(log_file)[0]["path"] == "a.py"
+        assert contents["nbstripout"] is True
+        assert not list(cwd.glob("*.tmp"))
+
+        # changes are discarded when the session fails
+        with pytest.raises(RuntimeError):
+            with RCManager.session(log_file):
+                RCManager.log_add_library(["pandas"], logfile=log_file)
+                raise RuntimeError()
+
+        assert RCManager.get_gryphon_libraries(log_file) == []
+        assert write_rc.call_count == 1
+
+        # outside of a session every change is written right away
+        RCManager.log_add_library(["pandas"], logfile=log_file)
+        assert RCManager.get_gryphon_libraries(log_file)[0]["name"] == "pandas"
+
+    finally:
+        teardown()
+
+
+def test_sort_versions():
+    versions = ["v1.10.0", "v1.2.0", "1.2.0rc1", "v0.9", "v1.2.0.post1", "v1.2.0-beta.2", "v2.0.0.dev0", "nightly"]
+
+    assert sort_versions(versions) == [
+        "nightly", "v0.9", "v1.2.0-beta.2", "1.2.0rc1", "v1.2.0", "v1.2.0.post1", "v1.10.0", "v2.0.0.dev0"
+    ]
+
+
+def test_version_index():
+    index = VersionIndex(["v1.0.0", "v2.1.0", "v1.3.0", "v2.0.0", "v2.2.0rc1"])
+
+    assert index.latest() == "v2.1.0"
+    assert index.latest(include_pre_releases=True) == "v2.2.0rc1"
+    assert index.latest_compatible("1.x") == "v1.3.0"
+    assert index.compatible("2.0") == ["v2.0.0"]
+    assert index.latest_compatible("3.x") is None
+    assert index.newest_first() == ["v2.2.0rc1", "v2.1.0", "v2.0.0", "v1.3.0", "v1.0.0"]
+    assert index.major_lines() == ["2.x", "1.x"]
+
+    # pre-releases are only picked when there is no stable version
+    index = VersionIndex(["v1.0.0", "v2.0.0rc1", "v2.0.0rc2"])
+    assert index.latest() == "v1.0.0"
+    assert index.latest_compatible("1.x") == "v1.0.0"
+    assert index.latest_compatible("2.x") == "v2.0.0rc2"
+    assert VersionIndex(["v2.0.0rc1", "v2.0.0rc2"]).latest() == "v2.0.0rc2"
+
+
+@pytest.mark.parametrize('refs', ["", "abc123\trefs/tags/nightly"])
+def test_update_gryphon_without_versions(mocker, refs):
+    from gryphon import gryphon_wizard
+
+    def _ls_remote(command, **kwargs):
+        # the tags are written to the file at the end of the command
+        with open(command.split(">>")[-1].strip().strip('"'), "w") as f:
+            f.write(refs)
+        return None, None
+
+    mocker.patch.object(gryphon_wizard.BashUtils, "execute_and_log", side_effect=_ls_remote)
+    warning = mocker.spy(gryphon_wizard.logger, "warning")
+    debug = mocker.spy(gryphon_wizard.logger, "debug")
+
+    gryphon_wizard.update_gryphon()
+    assert warning.call_count == 0
+    debug.assert_called_with("No remote versions of Gryphon were found.")
+
+
+def test_registry_logs_held_until_waited(mocker):
+    from gryphon import gryphon_wizard
+
+    def _load_registry(**kwargs):
+        gryphon_wizard.logger.warning("Failed to get index: url")
+        # the indexes are fetched on threads of their own
+        fetch = threading.Thread(
+            target=gryphon_wizard.logger.warning, args=("Timed out getting index: other_url",),
+            name=f"{gryphon_wizard.REGISTRY_THREAD_NAME}-index-0"
+        )
+        fetch.start()
+        fetch.join()
+        return "registry"
+
+    mocker.patch.object(gryphon_wizard.RegistryCollection, "from_config_file", side_effect=_load_registry)
+    mocker.patch.object(gryphon_wizard.console_handler, "level", logging.INFO)
+    emit = mocker.patch.object(gryphon_wizard.console_handler, "emit")
+
+    registry_future = gryphon_wizard.load_registry_in_background("settings.json")
+    registry_future.result(timeout=5)
+    assert emit.call_count == 0
+    # the buffer stops once the loader is done, even if the registry is never waited for
+    assert registry_future.log_buffer not in gryphon_wizard.console_handler.filters
+
+    assert gryphon_wizard.wait_for_registry(registry_future) == "registry"
+    assert [call.args[0].getMessage() for call in emit.call_args_list] == [
+        "Failed to get index: url", "Timed out getting index: other_url"
+    ]
+
+
+def test_registry_logs_only_hold_registry_threads(mocker):
+    from gryphon import gryphon_wizard
+
+    loading = threading.Event()
+
+    def _load_registry(**kwargs):
+        loading.wait(timeout=5)
+        return "registry"
+
+    mocker.patch.object(gryphon_wizard.RegistryCollection, "from_config_file", side_effect=_load_registry)
+    mocker.patch.object(gryphon_wizard.console_handler, "level", logging.INFO)
+    emit = mocker.patch.object(gryphon_wizard.console_handler, "emit")
+
+    registry_future = gryphon_wizard.load_registry_in_background("settings.json")
+    other_thread = threading.Thread(target=gryphon_wizard.logger.warning, args=("From a worker",))
+    other_thread.start()
+    other_thread.join()
+    assert [call.args[0].getMessage() for call in emit.call_args_list] == ["From a worker"]
+
+    loading.set()
+    registry_future.result(timeout=5)
+    assert registry_future.log_buffer.records == []
+
+
+def test_template_cache(setup, teardown, mocker):
+    try:
+        cwd = setup()
+        cache_folder = cwd / "cache"
+        mocker.patch.object(TemplateCache, "get_cache_path", return_value=cache_folder)
+        mocker.patch.object(TemplateCache, "get_size_limit", return_value=250)
+
+        def _make_template(name, version):
+            template = mocker.MagicMock()
+            template.name = name
+            template.version = version
+            return template
+
+        def _make_download(name, size):
+            folder = cwd / f"download_{name}"
+            os.makedirs(folder)
+            (folder / f"{name}.zip").write_bytes(b"x" * size)
+            return folder
+
+        first = _make_template("first", "v1.0.0")
+        second = _make_template("second", "v1.0.0")
+        index = "https://example.com/index/"
+
+        assert not TemplateCache.restore(first, index, cwd / "target")
+
+        TemplateCache.store(first, index, _make_download("first", 100))
+        TemplateCache.store(second, index, _make_download("second", 100))
+        assert TemplateCache.get_size() == 200
+
+        # hit on the same index, name and version only
+        assert TemplateCache.restore(first, index, cwd / "target")
+        assert (cwd / "target" / "first.zip").read_bytes() == b"x" * 100
+        assert not TemplateCache.restore(first, "https://example.com/other/", cwd / "other_target")
+        assert not TemplateCache.restore(_make_template("first", "v2.0.0"), index, cwd / "other_target")
+
+        # versionless templates point to a branch that may change
+        TemplateCache.store(_make_template("third", ""), index, _make_download("third", 10))
+        assert TemplateCache.get_size() == 200
+
+        # "second" is the least recently used one
+        entries = TemplateCache.list_entries()
+        os.utime(entries[0]["path"] / "entry.json", (0, 0))
+        os.utime(entries[1]["path"] / "entry.json", (1, 1))
+        first_path = TemplateCache.get_cache_path() / TemplateCache.get_template_key(first, index)
+        os.utime(first_path / "entry.json", (2, 2))
+
+        TemplateCache.store(_make_template("fourth", "v1.0.0"), index, _make_download("fourth", 100))
+        assert [e["name"] for e in TemplateCache.list_entries()] == ["first", "fourth"]
+
+        # failing to copy an entry falls back to the download, leaving no partial copy behind
+        fifth = _make_template("fifth", "v1.0.0")
+        download = _make_download("fifth", 10)
+        (download / "other.zip").write_bytes(b"z")
+        TemplateCache.store(fifth, index, download)
+
+        copied = []
+
+        def _failing_copy(src, dst):
+            if len(copied):
+                raise OSError("The entry was evicted meanwhile.")
+            copied.append(dst)
+            return copy2(src, dst)
+
+        copy2 = shutil.copy2
+        with mock.patch("gryphon.core.operations.template_cache.shutil.copy2", side_effect=_failing_copy):
+            assert not TemplateCache.restore(fifth, index, cwd / "partial_target")
+
+        assert len(copied) == 1 and not copied[0].exists()
+
+        # corrupted entries are discarded
+        (first_path / "files" / "first.zip").write_bytes(b"y")
+        assert not TemplateCache.restore(first, index, cwd / "corrupted_target")
+        assert not first_path.exists()
+
+        # so are entries without the stats of their files
+        TemplateCache.store(first, index, cwd / "download_first")
+        entry = json.loads((first_path / "entry.json").read_text())
+        del entry["files"]
+        (first_path / "entry.json").write_text(json.dumps(entry))
+        assert not TemplateCache.restore(first, index, cwd / "corrupted_target")
+        assert not first_path.exists()
+
+        assert TemplateCache.purge() > 0
+        assert not cache_folder.exists()
+        assert TemplateCache.get_size() == 0
+
+    finally:
+        teardown()
+
+
+def test_materialize_template(setup, teardown, mocker):
+    try:
+        cwd = setup()
+        project = cwd / "project"
+        os.makedirs(project / "utilities")
+        (project / "utilities" / "helpers.py").write_text("old = True\n")
+        (project / "utilities" / "same.py").write_text("same = True\r\n")
+        (project / "README.md").write_text("user readme")
+
+        def _fake_download(_, download_folder):
+            os.makedirs(download_folder)
+            with zipfile.ZipFile(download_folder / "template-1.0.0.zip", "w") as zip_ref:
+                zip_ref.writestr("template-1.0.0/setup.py", "setup()")
+                zip_ref.writestr("template-1.0.0/template/README.md", "template readme")
+                zip_ref.writestr("template-1.0.0/template/utilities/helpers.py", "old = False\n")
+                zip_ref.writestr("template-1.0.0/template/utilities/same.py", "same = True\n")
+                zip_ref.writestr("template-1.0.0/template/notebooks/analysis.ipynb", "{}")
+                zip_ref.writestr("template-1.0.0/template/src/clustering_filename.py.handlebars", "name = '{{fileName}}'")
+                zip_ref.writestr("template-1.0.0/template/src/__pycache__/cached.pyc", b"\0")
+
+        mocker.patch("gryphon.core.common_operations._download_template", side_effect=_fake_download)
+        # the larger transformed members wait for their write on disk
+        mocker.patch("gryphon.core.common_operations.TRANSFORM_SPILL_SIZE", 10)
+
+        new_files, renamed_files, suffix = materialize_template(
+            template=None,
+            destination=project,
+            transform=lambda path, contents: replace_patterns(path, contents, {"fileName": "test"}),
+            backup_subfolders=["utilities"],
+            readonly_notebooks=True
+        )
+
+        assert sorted(map(str, new_files)) == sorted([
+            "README.md", os.path.join("utilities", "helpers.py"), os.path.join("utilities", "same.py"),
+            os.path.join("notebooks", "analysis.ipynb"), os.path.join("src", "clustering_test.py")
+        ])
+        assert (project / "README.md").read_text() == "template readme"
+        assert (project / "src" / "clustering_test.py").read_text() == "name = 'test'"
+        assert not (project / "src" / "__pycache__").exists()
+        assert not (project / "setup.py").exists()
+        assert not (project / ".temp").exists()
+        assert os.stat(project / "notebooks" / "analysis.ipynb").st_mode & 0o777 == 0o444
+
+        # only the utilities whose contents changed are backed up
+        assert renamed_files == [project / "utilities" / f"helpers{suffix}.py"]
+        assert renamed_files[0].read_text() == "old = True\n"
+
+        # existing files are kept when overwrite is not allowed
+        (project / "README.md").write_text("user readme")
+        new_files, _, _ = materialize_template(template=None, destination=project, overwrite=False)
+        assert new_files == [Path("src") / "clustering_filename.py.handlebars"]
+        assert (project / "README.md").read_text() == "user readme"
+
+        # without a transform the zip members are compared with the existing files as streams
+        (project / "utilities" / "helpers.py").write_text("old = False\r\n")
+        (project / "utilities" / "same.py").write_text("changed = True\n")
+        _, renamed_files, suffix = materialize_template(
+            template=None, destination=project, backup_subfolders=["utilities"]
+        )
+        assert renamed_files == [project / "utilities" / f"same{suffix}.py"]
+        assert renamed_files[0].read_text() == "changed = True\n"
+
+        # files another template writes while this one waits for the lock are compared again
+        for backup in (project / "utilities").glob("* *.py"):
+            backup.unlink()
+
+        class _OtherTemplateWrites:
+            def __enter__(self):
+                (project / "utilities" / "helpers.py").write_text("written by another template\n")
+
+            def __exit__(self, *args):
+                pass
+
+        _, renamed_files, suffix = materialize_template(
+            template=None, destination=project, backup_subfolders=["utilities"], write_lock=_OtherTemplateWrites()
+        )
+        assert renamed_files == [project / "utilities" / f"helpers{suffix}.py"]
+        assert renamed_files[0].read_text() == "written by another template\n"
+
+    finally:
+        teardown()
+
+
+def test_backup_files_to_be_overwritten(setup, teardown):
+    try:
+        cwd = setup()
+        origin = cwd / "template"
+        destination = cwd / "project"
+
+        files = {
+            "unchanged.py": ("same = True\n", "same = True\n"),
+            "line_endings.py": ("a = 1\nb = 2\n", "a = 1\r\nb = 2\r\n"),
+            "changed.py": ("value = 1\n", "value = 2\n"),
+            "same_size.py": ("value = 1\n", "value = 3\n"),
+            "excluded.ipynb": ("{}", "{\"cells\": []}"),
+            os.path.join("nested", "changed.py"): ("new", "old"),
+        }
+        for name, (new_contents, old_contents) in files.items():
+            os.makedirs((origin / "utilities" / name).parent, exist_ok=True)
+            os.makedirs((destination / "utilities" / name).parent, exist_ok=True)
+            (origin / "utilities" / name).write_bytes(new_contents.encode())
+            (destination / "utilities" / name).write_bytes(old_contents.encode())
+
+        (destination / "utilities" / "only_in_project.py").write_text("mine")
+
+        renamed_files, suffix = backup_files_to_be_overwritten(
+            origin, destination, subfolders=["utilities"], exclude_extensions=[".ipynb"]
+        )
+
+        assert sorted(map(str, renamed_files)) == sorted([
+            str(destination / "utilities" / f"changed{suffix}.py"),
+            str(destination / "utilities" / f"same_size{suffix}.py"),
+            str(destination / "utilities" / "nested" / f"changed{suffix}.py"),
+        ])
+
+    finally:
+        teardown()
+
+
+def test_same_streams():
+    assert _same_streams(iter([b"ab", b"cd"]), iter([b"a", b"bcd"]), chunk_size=2)
+    assert not _same_streams(iter([b"ab", b"cd"]), iter([b"abc"]), chunk_size=2)
+    assert not _same_streams(iter([b"ab"]), iter([b"ab", b"c"]), chunk_size=2)
+    assert _same_streams(iter([]), iter([b""]), chunk_size=2)
+
+
+def test_log_changes(setup, teardown):
+    try:
+        cwd = setup()
+        suffix = "_20240101 1200"
+        utilities = cwd / "utilities"
+        os.makedirs(utilities)
+
+        (utilities / "small.py").write_text("a = 1\n")
+        (utilities / f"small{suffix}.py").write_text("a = 2\n")
+        (utilities / "large.py").write_text("b = 1\n" * 100)
+        (utilities / f"large{suffix}.py").write_text("b = 2\n" * 100)
+        (utilities / f"missing{suffix}.py").write_text("c = 1\n")
+        (utilities / f"data{suffix}.csv").write_text("1,2")
+
+        renamed_files = [utilities / f"{name}{suffix}{ext}" for name, ext in [
+            ("small", ".py"), ("large", ".py"), ("missing", ".py"), ("data", ".csv")
+        ]]
+        log_changes(cwd, renamed_files, suffix, html_size_limit=200)
+
+        log_folder = cwd / ".gryphon_logs" / f"changes{suffix}" / "utilities"
+        assert (log_folder / "small.html").is_file()
+        assert (log_folder / "large.diff").read_text().startswith(f"--- large{suffix}.py")
+        assert not (log_folder / "data.html").exists()
+
+        # the file whose comparison failed is reported on the warning file
+        warning = (cwd / f".gryphon_warning{suffix}.txt").read_text()
+        assert "could not be created" in warning
+        assert os.path.join("utilities", "missing.py") in warning
+
+    finally:
+        teardown()
+
+
+def test_list_files(setup, teardown, mocker):
+    try:
+        cwd = setup() / "project"
+        for file in [
+            "README.md", ".pre-commit-config.yaml", "src/main.py", "notebooks/analysis.ipynb",
+            ".gitignore", ".git/HEAD", ".venv/lib/site.py", "envs/bin/python", "src/__pycache__/main.pyc",
+            "notebooks/.ipynb_checkpoints/analysis.ipynb", "src/environments.py"
+        ]:
+            os.makedirs((cwd / file).parent, exist_ok=True)
+            (cwd / file).write_text("content")
+
+        scandir = mocker.spy(os, "scandir")
+        files = list_files(cwd)
+
+        assert sorted(files) == sorted(map(Path, [
+            "README.md", ".pre-commit-config.yaml", "src/main.py", "notebooks/analysis.ipynb", "src/environments.py",
+            ".gitignore"
+        ]))
+
+        # excluded folders are never opened
+        scanned = {Path(call.args[0]).name for call in scandir.call_args_list}
+        assert not scanned & {".git", ".venv", "envs", "__pycache__", ".ipynb_checkpoints"}
+
+    finally:
+        teardown()
+
+
+def test_rc_history(setup, teardown, mocker):
+    cwd = setup()
+    log_file = cwd / "sample_log"
+    with open(log_file, "w") as f:
+        # files and operations logged inside the rc file by older versions
+        json.dump(dict(
+            files=[dict(path=str(Path("notebooks") / "old.ipynb"), template_name="old", action="init")],
+            operations=[dict(template_name="old", action="init")]
+        ), f)
+
+    try:
+        template = Template.template_from_path(TEST_FOLDER / "data" / "trivial")
+        RCManager.log_new_files(
+            template, None, performed_action="generate", logfile=log_file,
+            files=[Path("notebooks") / "a.ipynb", Path("src") / "a.py", "README.md"]
+        )
+
+        # legacy entries are read along with the ones on the history
+        assert len(RCManager.get_gryphon_files(log_file)) == 4
+        notebooks = RCManager.get_gryphon_files(log_file, folder="notebooks")
+        assert [Path(f["path"]).name for f in notebooks] == ["old.ipynb", "a.ipynb"]
+        assert len(RCManager.get_gryphon_files(log_file, template_name=template.name, action="generate")) == 3
+
+        RCManager.initialize_log(log_file)
+        contents = json.loads(log_file.read_text())
+        assert "files" not in contents and "operations" not in contents
+        assert len(RCManager.get_gryphon_files(log_file)) == 4
+        assert RCManager.get_gryphon_operations(log_file, template_name="old")[0]["action"] == "init"
+
+        # compaction keeps only the latest entry for each file, the older ones are archived
+        RCManager.log_new_files(template, None, performed_action="generate", logfile=log_file, files=["README.md"])
+        history = RCHistory.from_rc_file(log_file)
+        assert len(history.read("files")) == 5
+        history.compact()
+        files = RCManager.get_gryphon_files(log_file)
+        assert len(files) == 4
+        assert files[-1]["path"] == "README.md"
+        assert len(history.read("files", include_archived=True)) == 5
+        assert [entry["path"] for entry in history.read("files", include_archived=True)[:1]] == ["README.md"]
+
+        # appends compact again only once the journal doubles the size left by the last compaction
+        journal = history.get_journal("files")
+        compacted_size = journal.stat().st_size
+        assert history.get_compacted_size("files") == compacted_size
+
+        mocker.patch("gryphon.core.operations.rc_history.HISTORY_COMPACTION_SIZE", 0)
+        compact = mocker.spy(history, "compact")
+        history.append("files", [dict(path="README.md")])
+        assert compact.call_count == 0
+
+        history.append("files", [dict(path="README.md")] * int(compacted_size / 20 + 1))
+        assert compact.call_count == 1
+        assert len(history.read("files")) == 4
+
+        with pytest.raises(ValueError):
+            history.query("files", name="pandas")
+
+    finally:
+        teardown()
+
+
+def test_file_lock(setup, teardown):
+    cwd = setup()
+    resource = cwd / "shared.json"
+    try_lock = (
+        "import sys\n"
+        "from gryphon.core.operations import FileLock\n"
+        "try:\n"
+        f"    FileLock({str(resource)!r}, timeout=0.2).acquire()\n"
+        "except TimeoutError:\n"
+        "    sys.exit(3)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(TEST_FOLDER.parent))
+
+    try:
+        with FileLock(resource):
+            # reentrant on the same thread
+            with FileLock(resource):
+                pass
+
+            # held against other processes until the outermost holder releases it
+            assert subprocess.run([sys.executable, "-c", try_lock], env=env).returncode == 3
+
+        assert subprocess.run([sys.executable, "-c", try_lock], env=env).returncode == 0
 
     finally:
         teardown()
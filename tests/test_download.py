@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+from gryphon.constants import GRYPHON_RC, REMOTE_INDEX
+from gryphon.core.download_all import download_all, get_host
+from gryphon.core.operations import RCManager
+
+
+def test_get_host():
+    assert get_host("https://github.com/ow-gryphon/template.git") == "github.com"
+    assert get_host("git@github.com:ow-gryphon/template.git") == "github.com"
+    assert get_host(None) == ""
+
+
+def test_download_all(setup, teardown, mocker):
+    try:
+        cwd = setup()
+
+        def _make_template(name, repo_url):
+            template = mocker.MagicMock()
+            template.name = name
+            template.version = "v1.0.0"
+            template.registry_type = REMOTE_INDEX
+            template.repo_url = repo_url
+            return template
+
+        lock = threading.Lock()
+        running = {}
+        max_running = {}
+        attempts = {}
+
+        def _fake_clone(template, temp_folder):
+            host = template.repo_url.split("/")[2]
+            with lock:
+                attempts[template.name] = attempts.get(template.name, 0) + 1
+                running[host] = running.get(host, 0) + 1
+                max_running[host] = max(max_running.get(host, 0), running[host])
+
+            try:
+                time.sleep(0.05)
+                os.makedirs(temp_folder, exist_ok=True)
+                (temp_folder / "partial.txt").write_text("partial")
+
+                # the first clone of "flaky" fails, "broken" always does
+                if template.name == "broken" or (template.name == "flaky" and attempts["flaky"] == 1):
+                    raise RuntimeError("Unable to git clone the repository. Status code 128")
+
+                (temp_folder / "README.md").write_text(template.name)
+            finally:
+                with lock:
+                    running[host] -= 1
+
+        mocker.patch("gryphon.core.common_operations._basic_download_template", side_effect=_fake_clone)
+
+        templates = [
+            _make_template(f"template_{i}", f"https://github.com/ow-gryphon/template_{i}.git")
+            for i in range(5)
+        ]
+        templates.append(_make_template("flaky", "https://gitlab.com/ow-gryphon/flaky.git"))
+        templates.append(_make_template("broken", "https://gitlab.com/ow-gryphon/broken.git"))
+
+        failed = download_all(templates, location=cwd, workers=6, per_host_limit=2, retries=1, retry_delay=0)
+
+        assert list(failed) == ["broken"]
+        assert max_running["github.com"] <= 2
+        assert attempts["flaky"] == 2
+        assert attempts["broken"] == 2
+
+        for template in templates[:-1]:
+            assert (cwd / template.name / "README.md").read_text() == template.name
+            assert not (cwd / template.name / ".target").exists()
+
+            operations = RCManager.get_gryphon_operations(cwd / template.name / GRYPHON_RC)
+            assert operations[0]["template_name"] == template.name
+
+    finally:
+        teardown()
+
+
+def test_download_all_backoff_frees_host(setup, teardown, mocker):
+    try:
+        cwd = setup()
+
+        def _make_template(name):
+            template = mocker.MagicMock()
+            template.name = name
+            template.version = "v1.0.0"
+            template.registry_type = REMOTE_INDEX
+            template.repo_url = f"https://github.com/ow-gryphon/{name}.git"
+            return template
+
+        clones = []
+
+        def _fake_clone(template, temp_folder):
+            clones.append(template.name)
+            if clones.count("flaky") == 1 and template.name == "flaky":
+                raise RuntimeError("Unable to git clone the repository. Status code 128")
+
+            os.makedirs(temp_folder, exist_ok=True)
+            (temp_folder / "README.md").write_text(template.name)
+
+        mocker.patch("gryphon.core.common_operations._basic_download_template", side_effect=_fake_clone)
+
+        templates = [_make_template("flaky"), _make_template("steady")]
+        failed = download_all(templates, location=cwd, workers=2, per_host_limit=1, retries=1, retry_delay=0.5)
+
+        assert list(failed) == []
+        # the other clone to the host runs while the failed one backs off
+        assert clones[-1] == "flaky"
+        assert clones.count("steady") == 1
+
+    finally:
+        teardown()
@@ -1,15 +1,20 @@
 import json
 import os
 import shutil
+import time
+import zipfile
 from os import path
 
-from gryphon.constants import VENV, GRYPHON_RC
+import pytest
+
+from gryphon.constants import VENV, GRYPHON_RC, REMOTE_INDEX, REQUIREMENTS
+from gryphon.core.generate_all import generate_all
 from gryphon.core.generate import (
     generate,
     parse_project_template,
     pattern_replacement
 )
-from gryphon.core.operations import SettingsManager
+from gryphon.core.operations import RCManager, SettingsManager
 from gryphon.core.registry import Template
 from .utils import create_folder_with_venv, TEST_FOLDER
 
@@ -136,11 +141,8 @@ def test_generate_5(setup, teardown, get_pip_libraries):
         log_file = cwd / GRYPHON_RC
 
         assert log_file.is_file()
-        with open(log_file, "r", encoding="utf-8") as f:
-            history = json.load(f)
-            assert "files" in history
-            assert "operations" in history
-            assert len(history["operations"]) == 1
+        assert len(RCManager.get_gryphon_files(log_file))
+        assert len(RCManager.get_gryphon_operations(log_file)) == 1
 
     finally:
         teardown()
@@ -161,3 +163,99 @@ def test_generate_6(setup, teardown):
 
     finally:
         teardown()
+
+
+def test_generate_all(setup, teardown, mocker):
+    try:
+        cwd = setup()
+        with open(cwd / GRYPHON_RC, "w", encoding="utf-8") as f:
+            json.dump(dict(environment_manager=VENV, environment_manager_path=str(cwd / ".venv")), f)
+
+        (cwd / REQUIREMENTS).write_text("pandas==1.0")
+
+        def _make_template(name, dependencies):
+            template = mocker.MagicMock()
+            template.name = name
+            template.version = "v1.0.0"
+            template.registry_type = REMOTE_INDEX
+            template.dependencies = dependencies
+            return template
+
+        def _fake_download(template, download_folder):
+            if template.name == "broken":
+                raise RuntimeError("Unable to pip download the repository.")
+
+            # the first template finishes downloading last
+            if template.name == "first":
+                time.sleep(0.5)
+
+            os.makedirs(download_folder)
+            with zipfile.ZipFile(download_folder / f"{template.name}.zip", "w") as zip_ref:
+                zip_ref.writestr(f"{template.name}/template/src/{template.name}.py", "print('{{fileName}}')")
+                zip_ref.writestr(f"{template.name}/template/utilities/shared.py", template.name)
+
+        mocker.patch("gryphon.core.common_operations._download_template", side_effect=_fake_download)
+
+        templates = [
+            _make_template("first", ["pandas==2.0"]),
+            _make_template("broken", ["numpy"]),
+            _make_template("second", ["seaborn"])
+        ]
+        failed = generate_all(templates, folder=cwd, install_dependencies=False, fileName="test")
+
+        assert list(failed) == ["broken"]
+        assert (cwd / "src" / "first.py").read_text() == "print('test')"
+        assert (cwd / "src" / "second.py").is_file()
+        assert not (cwd / ".temp").exists()
+
+        # templates are written in the given order, whatever order they were downloaded in
+        assert (cwd / "utilities" / "shared.py").read_text() == "second"
+
+        requirements = (cwd / REQUIREMENTS).read_text().split("\n")
+        assert requirements == ["pandas==2.0", "seaborn"]
+
+        log_file = cwd / GRYPHON_RC
+        assert [op["template_name"] for op in RCManager.get_gryphon_operations(log_file)] == ["first", "second"]
+        assert {file["path"] for file in RCManager.get_gryphon_files(log_file)} == {
+            path.join("src", "first.py"), path.join("src", "second.py"), path.join("utilities", "shared.py")
+        }
+        assert [lib["name"] for lib in RCManager.get_gryphon_libraries(log_file)] == ["pandas==2.0", "seaborn"]
+
+    finally:
+        teardown()
+
+
+def test_generate_failed_install(setup, teardown, mocker):
+    try:
+        cwd = setup()
+        with open(cwd / GRYPHON_RC, "w", encoding="utf-8") as f:
+            json.dump(dict(environment_manager=VENV, environment_manager_path=str(cwd / ".venv")), f)
+
+        template = mocker.MagicMock()
+        template.name = "sample"
+        template.version = "v1.0.0"
+        template.registry_type = REMOTE_INDEX
+        template.dependencies = ["seaborn"]
+
+        def _fake_download(_, download_folder):
+            os.makedirs(download_folder)
+            with zipfile.ZipFile(download_folder / "sample.zip", "w") as zip_ref:
+                zip_ref.writestr("sample/template/src/sample.py", "print('{{fileName}}')")
+
+        mocker.patch("gryphon.core.common_operations._download_template", side_effect=_fake_download)
+        mocker.patch(
+            "gryphon.core.generate.EnvironmentManagerOperations.install_libraries_venv",
+            side_effect=RuntimeError("Failed to install requirements.")
+        )
+
+        with pytest.raises(RuntimeError):
+            generate(template=template, folder=cwd, fileName="test")
+
+        # the files written before the install failed are still on the rc file
+        log_file = cwd / GRYPHON_RC
+        assert (cwd / "src" / "sample.py").is_file()
+        assert [file["path"] for file in RCManager.get_gryphon_files(log_file)] == [path.join("src", "sample.py")]
+        assert [lib["name"] for lib in RCManager.get_gryphon_libraries(log_file)] == ["seaborn"]
+
+    finally:
+        teardown()
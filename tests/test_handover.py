@@ -1,5 +1,9 @@
 import glob
+import hashlib
+import json
+import os
 import shutil
+import tarfile
 import zipfile
 from pathlib import Path
 
@@ -7,9 +11,18 @@ import pytest
 import yaml
 
 from gryphon.constants import (
-    CONDA, VENV, SYSTEM_DEFAULT, USE_LATEST, VENV_FOLDER, CONDA_FOLDER
+    CONDA, VENV, SYSTEM_DEFAULT, USE_LATEST, VENV_FOLDER, CONDA_FOLDER, GRYPHON_RC, GRYPHON_HISTORY
 )
-from gryphon.core.operations import SettingsManager
+from gryphon.core import handover_manifest
+from gryphon.core.handover import handover, get_output_file_name, get_log_file_name
+from gryphon.core.handover_archive import HandoverArchive, ZIP, TAR_GZ, TAR_XZ
+from gryphon.core.handover_files import HandoverFileTable
+from gryphon.core.handover_manifest import (
+    HandoverManifest, DELETED_FILES_NAME, MANIFEST_NAME,
+    get_manifest_file_name, find_previous_manifests, verify_handover
+)
+from gryphon.core.operations import SettingsManager, PathUtils, RCManager
+from gryphon.wizard.handover_states import ConfirmSettings
 from .ui_interaction.generate import generate_template
 from .ui_interaction.handover import generate_handover_package
 from .ui_interaction.init import start_new_project
@@ -124,3 +137,335 @@ def test_handover(
     finally:
         teardown()
         # pass
+
+
+@pytest.mark.parametrize('archive_format', [ZIP, TAR_GZ, TAR_XZ])
+def test_handover_archive(setup, teardown, mocker, archive_format):
+    cwd = setup()
+    project_folder = cwd / "project"
+    (project_folder / "data").mkdir(parents=True)
+
+    contents = {
+        "script.py": b"print('hello world')\n" * 1000,
+        "data/image.png": os.urandom(2048),
+        "data/large.csv": b"a,b,c\n" * 5000,
+    }
+    for name, data in contents.items():
+        (project_folder / name).write_bytes(data)
+
+    # streams the csv from disk instead of reading it ahead
+    mocker.patch("gryphon.core.handover_archive.PREFETCH_SIZE", 10000)
+
+    try:
+        output_file = get_output_file_name(project_folder, archive_format)
+        assert output_file.name.endswith(f".{archive_format}")
+        assert get_log_file_name(output_file).endswith("_log.txt")
+        assert f".{archive_format}" not in get_log_file_name(output_file)
+
+        with HandoverArchive(output_file, archive_format, compression_level=6, workers=2) as archive:
+            hashes = archive.add_files((project_folder / name, f"project/{name}") for name in contents)
+
+        assert output_file.stat().st_size < sum(map(len, contents.values()))
+        # the streamed csv is hashed while being written
+        assert hashes == [hashlib.sha256(data).hexdigest() for data in contents.values()]
+
+        if archive_format == ZIP:
+            with zipfile.ZipFile(output_file) as z:
+                assert z.getinfo("project/script.py").compress_type == zipfile.ZIP_DEFLATED
+                assert z.getinfo("project/data/image.png").compress_type == zipfile.ZIP_STORED
+                assert z.testzip() is None
+                z.extractall("unzipped")
+        else:
+            with tarfile.open(output_file) as t:
+                t.extractall("unzipped")
+
+        for name, data in contents.items():
+            assert (cwd / "unzipped" / "project" / name).read_bytes() == data
+
+    finally:
+        teardown()
+
+
+def test_delta_handover(setup, teardown, mocker):
+    cwd = setup()
+    project_folder = cwd / "project"
+    (project_folder / "notebooks").mkdir(parents=True)
+    (project_folder / GRYPHON_RC).write_text(json.dumps(dict(environment_manager_path=".venv")))
+
+    for name in ["a.py", "b.py", "notebooks/c.ipynb"]:
+        (project_folder / name).write_text(f"contents of {name}")
+
+    def _handover(output_file, previous_manifest=None):
+        handover(
+            path=project_folder,
+            output_path=output_file,
+            gryphon_exclusion_list=[],
+            large_files_exclusion_list=[],
+            file_list=[f for f, _ in PathUtils.scan_files(project_folder)],
+            configs={},
+            previous_manifest=previous_manifest
+        )
+        with zipfile.ZipFile(output_file) as z:
+            return set(z.namelist())
+
+    try:
+        first_output = cwd / "project_handover_1.zip"
+        assert _handover(first_output) == {
+            f"project/{name}" for name in ["a.py", "b.py", "notebooks/c.ipynb", GRYPHON_RC, MANIFEST_NAME]
+        }
+
+        first_manifest = get_manifest_file_name(first_output)
+        assert first_manifest == cwd / "project_handover_1_manifest.json"
+        assert not HandoverManifest.load(first_manifest).is_delta
+        assert find_previous_manifests(project_folder) == [first_manifest]
+
+        (project_folder / "a.py").write_text("new contents of a.py")
+        (project_folder / "b.py").unlink()
+        (project_folder / "d.py").write_text("contents of d.py")
+
+        # unchanged files keep the hash from the previous manifest
+        hash_file = mocker.spy(handover_manifest, "hash_file")
+        second_output = cwd / "project_handover_2.zip"
+        assert _handover(second_output, first_manifest) == {
+            "project/a.py", "project/d.py", f"project/{DELETED_FILES_NAME}", f"project/{MANIFEST_NAME}"
+        }
+        assert hash_file.call_count == 2
+
+        manifest = HandoverManifest.load(get_manifest_file_name(second_output))
+        assert manifest.is_delta
+        assert sorted(manifest.changed) == ["a.py", "d.py"]
+        assert manifest.deleted == ["b.py"]
+        assert set(manifest.files) == {"a.py", "d.py", "notebooks/c.ipynb", GRYPHON_RC}
+
+        with zipfile.ZipFile(second_output) as z:
+            assert z.read(f"project/{DELETED_FILES_NAME}").decode() == "b.py"
+
+        assert verify_handover(second_output) == dict(verified=2, missing=[], mismatched=[])
+
+    finally:
+        teardown()
+
+
+def test_delta_handover_strip_notebooks(setup, teardown):
+    cwd = setup()
+    project_folder = cwd / "project"
+    project_folder.mkdir()
+    (project_folder / GRYPHON_RC).write_text(json.dumps(dict(environment_manager_path=".venv")))
+
+    def _write_notebook(source, output):
+        cell = dict(cell_type="code", execution_count=1, metadata={}, source=[source],
+                    outputs=[dict(output_type="stream", name="stdout", text=[output])])
+        notebook = dict(nbformat=4, nbformat_minor=5, metadata={}, cells=[cell])
+        (project_folder / "analysis.ipynb").write_text(json.dumps(notebook))
+
+    def _handover(output_file, previous_manifest=None):
+        handover(
+            path=project_folder,
+            output_path=output_file,
+            gryphon_exclusion_list=[],
+            large_files_exclusion_list=[],
+            file_list=[f for f, _ in PathUtils.scan_files(project_folder)],
+            configs={},
+            previous_manifest=previous_manifest,
+            strip_notebooks=True
+        )
+        return HandoverManifest.load(get_manifest_file_name(output_file))
+
+    try:
+        _write_notebook("print(1)", "1")
+        first_output = cwd / "project_handover_1.zip"
+        assert _handover(first_output).files["analysis.ipynb"]["stripped"]
+
+        # only the outputs changed, the notebook packaged is the same
+        _write_notebook("print(1)", "1\n1")
+        second_output = cwd / "project_handover_2.zip"
+        assert _handover(second_output, get_manifest_file_name(first_output)).changed == []
+
+        _write_notebook("print(2)", "2")
+        third_output = cwd / "project_handover_3.zip"
+        assert _handover(third_output, get_manifest_file_name(second_output)).changed == ["analysis.ipynb"]
+        assert verify_handover(third_output) == dict(verified=1, missing=[], mismatched=[])
+
+    finally:
+        teardown()
+
+
+@pytest.mark.parametrize('archive_format', [ZIP, TAR_GZ])
+def test_verify_handover(setup, teardown, archive_format):
+    cwd = setup()
+    project_folder = cwd / "project"
+    (project_folder / "data").mkdir(parents=True)
+    (project_folder / GRYPHON_RC).write_text(json.dumps(dict(environment_manager_path=".venv")))
+    (project_folder / "main.py").write_text("print('hello world')")
+    (project_folder / "data" / "table.csv").write_bytes(os.urandom(4096))
+
+    output_file = get_output_file_name(project_folder, archive_format)
+
+    try:
+        handover(
+            path=project_folder,
+            output_path=output_file,
+            gryphon_exclusion_list=[],
+            large_files_exclusion_list=[],
+            file_list=[f for f, _ in PathUtils.scan_files(project_folder)],
+            configs={},
+            archive_format=archive_format
+        )
+
+        manifest = HandoverManifest.load(get_manifest_file_name(output_file))
+        assert manifest.files["main.py"]["sha256"] == hashlib.sha256(b"print('hello world')").hexdigest()
+
+        assert verify_handover(output_file, workers=2) == dict(verified=3, missing=[], mismatched=[])
+
+        shutil.unpack_archive(output_file, cwd / "unzipped")
+        extracted_folder = cwd / "unzipped" / "project"
+        assert (extracted_folder / MANIFEST_NAME).is_file()
+        assert verify_handover(extracted_folder, workers=2)["verified"] == 3
+
+        (extracted_folder / "main.py").write_text("print('changed')")
+        (extracted_folder / "data" / "table.csv").unlink()
+        assert verify_handover(extracted_folder, workers=2) == dict(
+            verified=1, missing=["data/table.csv"], mismatched=["main.py"]
+        )
+
+    finally:
+        teardown()
+
+
+def test_handover_file_table(setup, teardown, mocker):
+    cwd = setup()
+    project_folder = cwd / "project"
+    (project_folder / "data").mkdir(parents=True)
+    (project_folder / "notebooks").mkdir()
+
+    sizes = {
+        "main.py": 1000,
+        "data/raw.csv": 3_000_000,
+        "data/image.png": 2_000_000,
+        "data/small.csv": 10,
+        "notebooks/analysis.ipynb": 500_000,
+    }
+    for name, size in sizes.items():
+        (project_folder / name).write_bytes(b"0" * size)
+
+    scan = mocker.spy(HandoverFileTable, "scan")
+
+    try:
+        context = dict(location=project_folder)
+        table = ConfirmSettings.get_file_table(context)
+        shutil.rmtree(project_folder)
+
+        # answered from memory, the folder is gone
+        assert ConfirmSettings.get_file_table(context) is table
+        assert scan.call_count == 1
+        assert len(table) == len(sizes)
+
+        assert list(table.get_large_files(1)) == [Path("data/raw.csv"), Path("data/image.png")]
+        assert list(table.get_large_files(2)) == [Path("data/raw.csv")]
+        assert list(table.get_large_files(3)) == []
+        assert len(table.get_large_files(0)) == len(sizes)
+
+        excluded = [Path("data/raw.csv")]
+        assert Path("data/raw.csv") not in table.get_included_files(excluded, [Path("main.py")])
+        assert table.get_total_size(excluded) == sum(sizes.values()) - 3_000_000
+        assert table.estimate_compressed_size(excluded) == int(
+            2_000_000 + (1000 + 10 + 500_000) * 0.3
+        )
+
+        largest = table.get_largest_files_by_folder(n=1)
+        assert list(largest) == ["data", "notebooks", "."]
+        assert largest["data"] == [(Path("data/raw.csv"), 3_000_000)]
+        assert table.get_largest_files_by_folder(excluded, n=1)["data"] == [(Path("data/image.png"), 2_000_000)]
+
+        # shown along with the estimated package size
+        context.update(extra_lines=0, excluded_files_size=excluded, excluded_files_gryphon=[])
+        mocker.patch.object(SettingsManager, "get_handover_strip_notebook_outputs", return_value=False)
+        ConfirmSettings.print_estimated_size(context)
+        assert context["extra_lines"] == 1 + 3 + 2 + 2
+
+        context["location"] = cwd
+        assert ConfirmSettings.get_file_table(context) is not table
+        assert scan.call_count == 2
+
+    finally:
+        teardown()
+
+
+def test_handover_history_files(setup, teardown):
+    cwd = setup()
+    project_folder = cwd / "project"
+    project_folder.mkdir()
+    logfile = project_folder / GRYPHON_RC
+    logfile.write_text("{}")
+
+    try:
+        RCManager.initialize_log(logfile)
+        RCManager.log_add_library(["pandas"], logfile=logfile)
+        history_files = [
+            f.relative_to(project_folder) for f in (project_folder / GRYPHON_HISTORY).iterdir()
+        ]
+        assert len(history_files)
+
+        RCManager.set_handover_include_gryphon_generated_files(False, logfile=logfile)
+        context = dict(location=project_folder, extra_lines=0)
+        ConfirmSettings.handle_gryphon_files(context)
+        assert set(history_files) <= set(context["excluded_files_gryphon"])
+
+        RCManager.set_handover_include_gryphon_generated_files(True, logfile=logfile)
+        context = dict(location=project_folder, extra_lines=0)
+        ConfirmSettings.handle_gryphon_files(context)
+        assert context["excluded_files_gryphon"] == []
+
+    finally:
+        teardown()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_strip_notebook_outputs(setup, teardown, workers):
+    cwd = setup()
+    project_folder = cwd / "project"
+    project_folder.mkdir()
+
+    plot = dict(output_type="display_data", data={"image/png": "a" * 10000}, metadata={})
+    notebook = dict(
+        nbformat=4, nbformat_minor=5,
+        metadata=dict(kernelspec=dict(name="python3"), widgets={}),
+        cells=[
+            dict(cell_type="markdown", metadata={}, source=["# Title"]),
+            dict(cell_type="code", execution_count=3, metadata=dict(scrolled=True), outputs=[plot], source=["plot()"]),
+            dict(cell_type="code", execution_count=4, metadata=dict(keep_output=True), outputs=[plot], source=["x"]),
+        ]
+    )
+    original = json.dumps(notebook).encode("utf-8")
+    (project_folder / "analysis.ipynb").write_bytes(original)
+    (project_folder / "broken.ipynb").write_bytes(b"not a notebook")
+
+    output_file = cwd / "package.zip"
+
+    try:
+        with HandoverArchive(output_file, workers=workers, strip_notebooks=True) as archive:
+            hashes = archive.add_files(
+                (project_folder / name, f"project/{name}")
+                for name in ["analysis.ipynb", "broken.ipynb"]
+            )
+
+        with zipfile.ZipFile(output_file) as z:
+            stripped_contents = z.read("project/analysis.ipynb")
+            assert z.read("project/broken.ipynb") == b"not a notebook"
+
+        stripped = json.loads(stripped_contents)
+        assert "widgets" not in stripped["metadata"]
+        assert stripped["cells"][0] == notebook["cells"][0]
+        assert stripped["cells"][1]["outputs"] == []
+        assert stripped["cells"][1]["execution_count"] is None
+        assert stripped["cells"][1]["metadata"] == {}
+        assert stripped["cells"][2]["outputs"] == [plot]
+
+        assert archive.bytes_saved == len(original) - len(stripped_contents) > 0
+        assert hashes[0] == hashlib.sha256(stripped_contents).hexdigest()
+
+        # the working copy is untouched
+        assert (project_folder / "analysis.ipynb").read_bytes() == original
+
+    finally:
+        teardown()
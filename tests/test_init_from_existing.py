@@ -1,10 +1,14 @@
 import os
+import stat
+import zipfile
+from pathlib import Path
 
 import pytest
 
 from gryphon.constants import (
     CONDA, VENV, REQUIREMENTS, GRYPHON_RC, YES
 )
+from gryphon.core.merge_plan import MergePlan, COPY, SKIP, CONFLICT
 from gryphon.core.operations import RCManager, SettingsManager
 from .ui_interaction.init_from_existing import start_project_from_existing
 from .utils import create_folder_with_conda_env, create_folder_with_venv
@@ -99,3 +103,66 @@ def test_init_from_existing(
     finally:
         teardown()
         # pass
+
+
+def test_merge_plan(setup, teardown):
+    try:
+        cwd = setup()
+        template_folder = cwd / "template"
+        project_folder = cwd / "project"
+
+        for folder, files in [
+            (template_folder, {"README.md": "template", "src/new.py": "new", "src/same.py": "same\n",
+                               "utilities/shared.py": "template version"}),
+            (project_folder, {"README.md": "project", "src/same.py": "same\r\n",
+                              "utilities/shared.py": "project version", "data/input.csv": "1,2"})
+        ]:
+            for file, contents in files.items():
+                os.makedirs((folder / file).parent, exist_ok=True)
+                (folder / file).write_text(contents)
+
+        plan = MergePlan(template_folder, project_folder)
+
+        assert plan.get_files(COPY) == [Path("src") / "new.py"]
+        assert plan.get_files(SKIP) == [Path("src") / "same.py"]
+        assert plan.get_files(CONFLICT) == [Path("README.md"), Path("utilities") / "shared.py"]
+        assert len(plan.describe()) == 4
+        assert not (project_folder / "src" / "new.py").exists()
+
+        assert plan.execute() == [Path("src") / "new.py"]
+        assert (project_folder / "src" / "new.py").read_text() == "new"
+        assert (project_folder / "README.md").read_text() == "project"
+
+    finally:
+        teardown()
+
+
+def test_merge_plan_from_zips(setup, teardown):
+    try:
+        cwd = setup()
+        project_folder = cwd / "project"
+
+        for file, contents in {"README.md": "project", "src/same.py": "same\r\n"}.items():
+            os.makedirs((project_folder / file).parent, exist_ok=True)
+            (project_folder / file).write_text(contents)
+
+        zip_file = cwd / "template.zip"
+        with zipfile.ZipFile(zip_file, "w") as archive:
+            archive.writestr("package/template/README.md", "template")
+            archive.writestr("package/template/src/same.py", "same\n")
+            archive.writestr("package/template/notebooks/new.ipynb", "{}")
+            archive.writestr("package/setup.py", "")
+
+        plan = MergePlan.from_zips([zip_file], project_folder)
+
+        assert plan.get_files(COPY) == [Path("notebooks") / "new.ipynb"]
+        assert plan.get_files(SKIP) == [Path("src") / "same.py"]
+        assert plan.get_files(CONFLICT) == [Path("README.md")]
+
+        assert plan.execute(readonly_notebooks=True) == [Path("notebooks") / "new.ipynb"]
+        assert (project_folder / "notebooks" / "new.ipynb").read_text() == "{}"
+        assert not os.stat(project_folder / "notebooks" / "new.ipynb").st_mode & stat.S_IWUSR
+        assert (project_folder / "README.md").read_text() == "project"
+
+    finally:
+        teardown()
@@ -1,11 +1,47 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
 import pytest
+import git
 from .utils import TEST_FOLDER
+from gryphon.core.operations import FileLock
+from gryphon.core.registry import remote_index
 from gryphon.core.registry import \
     RegistryCollection, GitRegistry, \
-    LocalRegistry, TemplateRegistry
+    LocalRegistry, TemplateRegistry, RemoteIndex, RemoteIndexCollection, Template, FacetIndex, SearchIndex
 
 
 TEST_REPO = "https://github.com/vittorfp/template_registry.git"
+MOCK_GRYPHON_HOME_PATH = "gryphon.core.registry.remote_index.GRYPHON_HOME"
+
+
+def create_index_repo(path, versions):
+    """Creates a git repository with the same layout as a remote template index."""
+    repo = git.Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "gryphon")
+        config.set_value("user", "email", "gryphon@test.com")
+
+    commit_index_versions(repo, versions)
+    return repo
+
+
+def commit_index_versions(repo, versions):
+    template_folder = Path(repo.working_dir) / "sample_generate"
+    template_folder.mkdir(exist_ok=True)
+
+    metadata = [
+        dict(command="generate", display_name="Sample generate", version=version)
+        for version in versions
+    ]
+    with open(template_folder / "metadata.json", "w") as f:
+        json.dump(metadata, f)
+
+    repo.git.add(A=True)
+    repo.index.commit(f"Index with versions {versions}")
 
 
 def test_template_registry_1():
@@ -140,3 +176,221 @@ def test_registry_collection_2(setup, teardown):
             assert "Check your registries to deduplicate" in str(e)
     finally:
         teardown()
+
+
+def test_remote_index_sync(setup, teardown, mocker):
+    cwd = setup()
+    try:
+        mocker.patch(MOCK_GRYPHON_HOME_PATH, cwd / "gryphon_home")
+        upstream = create_index_repo(cwd / "upstream", ["v0.0.1"])
+
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert index.get_templates("generate")["sample_generate"].available_versions == ["v0.0.1"]
+
+        # a marker inside the clone tells whether it was kept between launches
+        marker = index.index_local_path / ".git" / "kept"
+        marker.touch()
+
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert marker.is_file()
+
+        commit_index_versions(upstream, ["v0.0.1", "v0.0.2"])
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert marker.is_file()
+        assert index.repo.head.commit.hexsha == upstream.head.commit.hexsha
+        assert index.get_templates("generate")["sample_generate"].latest.version == "v0.0.2"
+
+        # a local copy moved aside by a clone that stopped halfway is put back
+        index.repo.close()
+        os.replace(index.index_local_path, index.index_local_path.with_name("test_index.1.2.old"))
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert marker.is_file()
+        assert not index.index_local_path.with_name("test_index.1.2.old").exists()
+
+        # a corrupted local copy is cloned again
+        (index.index_local_path / ".git" / "HEAD").unlink()
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert not marker.is_file()
+        assert index.repo.head.commit.hexsha == upstream.head.commit.hexsha
+
+        # a local copy cloned from another repository is cloned again from the configured one
+        moved = create_index_repo(cwd / "moved", ["v0.0.3"])
+        marker.touch()
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "moved"), index_name="test_index")
+        assert not marker.is_file()
+        assert index.repo.remote().url == str(cwd / "moved")
+        assert index.repo.head.commit.hexsha == moved.head.commit.hexsha
+
+    finally:
+        teardown()
+
+
+def test_remote_index_snapshot(setup, teardown, mocker):
+    cwd = setup()
+    try:
+        mocker.patch(MOCK_GRYPHON_HOME_PATH, cwd / "gryphon_home")
+        create_index_repo(cwd / "upstream", ["v0.0.1", "v0.0.2"])
+
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert (cwd / "gryphon_home" / "index" / "test_index.snapshot.json").is_file()
+
+        # with an unchanged index commit the metadata files are not read anymore
+        (index.index_local_path / "sample_generate" / "metadata.json").unlink()
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        template = index.get_templates("generate")["sample_generate"]
+        assert template.latest.version == "v0.0.2"
+        assert template.display_name == "Sample generate"
+
+        # a new Template schema invalidates the snapshot
+        mocker.patch.object(Template, "schema_version", Template.schema_version + 1)
+        index = RemoteIndex(index_url="", index_repo=str(cwd / "upstream"), index_name="test_index")
+        assert "sample_generate" not in index.get_templates("generate")
+
+    finally:
+        teardown()
+
+
+def test_remote_index_collection(setup, teardown, mocker):
+    cwd = setup()
+    try:
+        mocker.patch(MOCK_GRYPHON_HOME_PATH, cwd / "gryphon_home")
+        create_index_repo(cwd / "upstream_1", ["v0.0.1"])
+        create_index_repo(cwd / "upstream_2", ["v0.0.2"])
+        index_list = [
+            dict(name="index_1", url="url_1", repo=str(cwd / "upstream_1")),
+            dict(name="index_2", url="url_2", repo=str(cwd / "upstream_2")),
+        ]
+
+        collection = RemoteIndexCollection(index_list)
+        assert [index.index_url for index in collection.indexes] == ["url_1", "url_2"]
+
+        # the duplicated template comes from the last index in the list
+        template = collection.get_templates("generate")["sample_generate"]
+        assert template.template_index == "url_2"
+
+        # a hung index is left out without blocking the others
+        sync_index = RemoteIndex.sync_index
+        release = threading.Event()
+        hung = {"url_1"}
+
+        def hung_sync_index(self):
+            if self.index_url in hung:
+                release.wait(timeout=10)
+            return sync_index(self)
+
+        def release_hung():
+            # lets the hung fetches finish, so they don't hold the index locks afterwards
+            release.set()
+            for links in index_list:
+                if links["url"] in hung:
+                    with FileLock(cwd / "gryphon_home" / "index" / links["name"], timeout=10):
+                        pass
+
+        mocker.patch.object(RemoteIndex, "sync_index", hung_sync_index)
+        mocker.patch("gryphon.core.registry.remote_index.INDEX_FETCH_TIMEOUT", 0.5)
+        warning = mocker.spy(remote_index.logger, "warning")
+
+        try:
+            collection = RemoteIndexCollection(index_list)
+        finally:
+            release_hung()
+
+        assert [index.index_url for index in collection.indexes] == ["url_2"]
+        assert warning.call_count == 1
+
+        # every index shares the same deadline, instead of waiting the timeout once per index
+        release.clear()
+        hung.add("url_2")
+        try:
+            start = time.monotonic()
+            collection = RemoteIndexCollection(index_list)
+            assert collection.indexes == []
+            assert time.monotonic() - start < 0.9
+        finally:
+            release_hung()
+
+        # an index locked by another process is given up on the same deadline, warning once
+        mocker.patch.object(RemoteIndex, "sync_index", sync_index)
+        warning.reset_mock()
+        lock = FileLock(cwd / "gryphon_home" / "index" / "index_1")
+        locked = threading.Event()
+        done = threading.Event()
+
+        def _hold_lock():
+            with lock:
+                locked.set()
+                done.wait(timeout=10)
+
+        threading.Thread(target=_hold_lock, daemon=True).start()
+        locked.wait(timeout=5)
+        try:
+            collection = RemoteIndexCollection(index_list)
+        finally:
+            done.set()
+
+        assert [index.index_url for index in collection.indexes] == ["url_2"]
+        assert warning.call_count == 1
+
+    finally:
+        teardown()
+
+
+def test_facet_index():
+    templates = {
+        name: Template(
+            template_name=name,
+            template_path=TEST_FOLDER,
+            template_metadata=metadata,
+            registry_type="local"
+        )
+        for name, metadata in [
+            ("a", dict(methodology=["Regression"], topic="Pricing", sector=["Energy", "Energy"])),
+            ("b", dict(methodology=["Regression", "Clustering"], sector=["Energy"])),
+            ("c", dict(topic=["Pricing"])),
+            ("d", dict(methodology=None, topic=[None, "Pricing"], sector=[2020])),
+        ]
+    }
+
+    # null and non string facet values load instead of failing the registry
+    assert templates["d"].methodology == ()
+    assert templates["d"].sector == ("2020",)
+
+    facet_index = FacetIndex(templates)
+
+    assert facet_index.get_template_names("methodology", "Regression") == ["a", "b"]
+    assert facet_index.get_template_names("topic", "Pricing") == ["a", "c", "d"]
+    assert facet_index.count("sector", "Energy") == 2
+    assert facet_index.count("methodology", "Clustering") == 1
+    assert facet_index.count("methodology", "Geospatial") == 0
+
+
+def test_search_index():
+    templates = {
+        name: Template(
+            template_name=name,
+            template_path=TEST_FOLDER,
+            template_metadata=metadata,
+            registry_type="local"
+        )
+        for name, metadata in [
+            ("linear", dict(display_name="Linear regression", keywords=["regression", "ols"])),
+            ("kmeans", dict(display_name="KMeans", keywords=["clustering"], methodology="Clustering")),
+            ("forest", dict(display_name="Random forest", description="Forest based regression")),
+            ("hierarchy", dict(display_name="Hierarchy", keywords=["subclustering"], description=None)),
+        ]
+    }
+
+    # null metadata fields are indexed as empty
+    search_index = SearchIndex(templates)
+
+    # keyword matches rank above description matches
+    assert search_index.search("regression") == ["linear", "forest"]
+    # prefixes and typos
+    assert search_index.search("regr") == ["linear", "forest"]
+    assert search_index.search("clustring") == ["kmeans"]
+    # words found inside longer terms
+    assert search_index.search("cluster") == ["kmeans", "hierarchy"]
+    # templates matching every typed word come first
+    assert search_index.search("forest regression") == ["forest", "linear"]
+    assert search_index.search("") == []
+    assert search_index.complete("cl") == ["clustering"]
@@ -227,3 +227,42 @@ def test_restore_registries(setup, teardown, mocker):
 
     finally:
         teardown()
+
+
+def test_settings_cache(setup, teardown, mocker):
+    try:
+        cwd = setup()
+        file = cwd / CONFIG_FILE_NAME
+        shutil.copy(
+            src=TEST_FOLDER / "data" / CONFIG_FILE_NAME,
+            dst=file
+        )
+        mocker.patch(target=MOCK_CONFIG_FILE_PATH, return_value=file)
+        json_load = mocker.spy(json, "load")
+
+        # the file is parsed once while it does not change
+        assert SettingsManager.get_environment_manager() == "conda"
+        assert SettingsManager.get_environment_manager() == "conda"
+        assert json_load.call_count == 1
+
+        # changes made by other processes are picked up
+        data = json.loads(file.read_text())
+        data["environment_management"] = "pipenv"
+        file.write_text(json.dumps(data))
+        assert SettingsManager.get_environment_manager() == "pipenv"
+
+        # changes inside a batch are written once, when it ends
+        write = mocker.spy(SettingsManager, "_write_changes")
+        with SettingsManager.batch():
+            SettingsManager.change_environment_manager("venv")
+            SettingsManager.change_default_python_version("3.10")
+            assert SettingsManager.get_environment_manager() == "venv"
+            assert json.loads(file.read_text())["environment_management"] == "pipenv"
+
+        assert write.call_count == 1
+        data = json.loads(file.read_text())
+        assert data["environment_management"] == "venv"
+        assert data["default_python_version"] == "3.10"
+
+    finally:
+        teardown()
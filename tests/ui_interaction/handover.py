@@ -25,7 +25,7 @@ def type_folder_path(process, path):
 
 def get_back_from_change_configuration(process):
     wait_for_output(process, Text.handover_prompt_change_settings[5:-2])
-    select_nth_option(process, n=3)
+    select_nth_option(process, n=4)
     wait_for_output(process, CONFIRMATION_MESSAGE[2:-2])
 
 
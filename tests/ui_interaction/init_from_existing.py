@@ -33,6 +33,11 @@ def handle_point_to_external_env(process, point_external_env, external_env):
         select_nth_option(process, n=1)
 
 
+def skip_the_changes_preview(process):
+    wait_for_output(process, Text.init_from_existing_ask_preview[:20])
+    select_nth_option(process, n=1)
+
+
 def start_project_from_existing(project_name: str, has_existing_env: bool,
                                 uses_existing_env: str, point_external_env: bool, external_env: Path,
                                 working_directory: Path = Path.cwd()):
@@ -60,6 +65,7 @@ def start_project_from_existing(project_name: str, has_existing_env: bool,
         else:
             handle_point_to_external_env(process, point_external_env, external_env)
 
+        skip_the_changes_preview(process)
         wait_for_success(process)
         quit_process(process)
     except Exception as e: